@@ -1,22 +1,20 @@
+import hashlib
+import json
+import math
+
 import kopf
 import pykube
 
 from . import constants
 from . import kube
 from . import layers
+from . import osdplstatus
+from . import settings
 from . import utils
 
 
 LOG = utils.get_logger(__name__)
-
-
-def _get(namespace, i):
-    try:
-        return kube.find(
-            pykube.DaemonSet, f"{constants.CACHE_NAME}-{i}", namespace
-        )
-    except pykube.exceptions.PyKubeError:
-        return None
+CONF = settings.CONF
 
 
 def _list(namespace):
@@ -41,40 +39,133 @@ def images(namespace):
     return images
 
 
+def get_image_groups(images):
+    """Split images into groups cached by single DaemonSet
+
+    Image is assigned to a group by its name with rendezvous hashing
+    limited by images_per_daemonset, so changing number of images moves
+    only part of images to other groups. The group name is derived from
+    its content, so changing image url changes only name of its group,
+    and other groups stay the same.
+
+    :param images: dictionary of image name and url
+    :returns: dictionary of group name and its images
+    """
+    if not images:
+        return {}
+    # NOTE(avolkov): images_per_daemonset determines how many
+    #   daemonsets start depending on total number of images we
+    #   need to cache.
+    images_per_daemonset = CONF.getint("cache", "images_per_daemonset")
+    groups_number = math.ceil(len(images) / images_per_daemonset)
+    groups = [{} for _ in range(groups_number)]
+    # NOTE(vsaienko): image prefers groups with higher weight, weights of
+    # existing groups do not depend on groups number. Images with highest
+    # weights are placed first, so image goes to less preferred group
+    # only when preferred ones are full.
+    weights = sorted(
+        (hashlib.sha256(f"{index}:{name}".encode()).digest(), name, index)
+        for name in images
+        for index in range(groups_number)
+    )
+    assigned = set()
+    for _, name, index in reversed(weights):
+        if name in assigned or len(groups[index]) >= images_per_daemonset:
+            continue
+        groups[index][name] = images[name]
+        assigned.add(name)
+    res = {}
+    for group in groups:
+        if not group:
+            continue
+        digest = hashlib.sha256(
+            json.dumps(group, sort_keys=True).encode()
+        ).hexdigest()
+        res[f"{constants.CACHE_NAME}-{digest[:10]}"] = group
+    return res
+
+
 def restart(images, osdpl, mspec):
+    """Replace cache DaemonSets which images are changed
+
+    :returns: the number of cache DaemonSets
+    """
     namespace = osdpl["metadata"]["namespace"]
-    log_showed = False
-    for ds in _list(namespace):
-        ds.delete()
-        if not log_showed:
-            LOG.info("Stopping cache ...")
-            log_showed = True
-        # TODO(avolkov): wait for delete completion
-    image_groups = []
+    image_groups = get_image_groups(images)
+    existing = {ds.name: ds for ds in _list(namespace)}
+    for name, ds in existing.items():
+        if name not in image_groups:
+            LOG.info(f"Stopping cache {name} ...")
+            ds.delete()
     if not images:
         LOG.info("No images to cache. Skip caching")
-    else:
-        image_list = list(images.items())
-        # NOTE(avolkov): images_per_daemon determines how many
-        #   daemonsets start depending on total number of images we
-        #   need to cache.
-        images_per_daemon = 50
-        image_groups = [
-            dict(image_list[i : i + images_per_daemon])
-            for i in range(0, len(image_list), images_per_daemon)
-        ]
-        LOG.info(
-            f"Starting cache (images: {len(images)}, instances: {len(image_groups)}) ..."
-        )
-        for i in range(len(image_groups)):
-            cache = layers.render_cache_template(
-                mspec, f"{constants.CACHE_NAME}-{i}", image_groups[i]
-            )
-            kopf.adopt(cache, osdpl)
-            kube.resource(cache).create()
+    for name, group in image_groups.items():
+        if name in existing:
+            continue
+        LOG.info(f"Starting cache {name} (images: {len(group)}) ...")
+        cache = layers.render_cache_template(mspec, name, group)
+        kopf.adopt(cache, osdpl)
+        kube.resource(cache).create()
+    LOG.info(
+        f"Cache instances: {len(image_groups)}, "
+        f"replaced: {len(set(image_groups) - set(existing))}"
+    )
     return len(image_groups)
 
 
-def wait_ready(namespace):
-    for ds in _list(namespace):
-        kube.wait_for_daemonset_ready(ds.obj["metadata"]["name"], namespace)
+def get_progress(namespace):
+    """Get number of cached images per node
+
+    Image is cached on the node when its container is ready.
+
+    :returns: dictionary of node name and dictionary with number of
+              ready images and total number of images.
+    """
+    progress = {}
+    pods = kube.resource_list(
+        pykube.Pod, {"app.kubernetes.io/name": "cache"}, namespace
+    )
+    for pod in pods:
+        node = pod.obj["spec"].get("nodeName")
+        if not node:
+            continue
+        node_progress = progress.setdefault(node, {"ready": 0, "total": 0})
+        node_progress["total"] += len(pod.obj["spec"]["containers"])
+        node_progress["ready"] += len(
+            [
+                status
+                for status in pod.obj.get("status", {}).get(
+                    "containerStatuses", []
+                )
+                if status.get("ready")
+            ]
+        )
+    return progress
+
+
+def update_progress(namespace, osdplst):
+    progress = get_progress(namespace)
+    ready = all(p["ready"] == p["total"] for p in progress.values())
+    osdplst.set_cache_progress(
+        {
+            "state": osdplstatus.APPLIED if ready else osdplstatus.APPLYING,
+            "nodes": {
+                node: f"{p['ready']}/{p['total']}"
+                for node, p in progress.items()
+            },
+        }
+    )
+    return ready
+
+
+def wait_ready(namespace, osdplst=None):
+    try:
+        for ds in _list(namespace):
+            kube.wait_for_daemonset_ready(
+                ds.obj["metadata"]["name"], namespace
+            )
+    finally:
+        # NOTE(vsaienko): the handler is retried until DaemonSets are ready,
+        # update progress on every attempt and when caching is completed.
+        if osdplst is not None:
+            update_progress(namespace, osdplst)
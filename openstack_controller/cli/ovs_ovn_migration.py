@@ -765,12 +765,13 @@ def finalize_migration(script_args):
         network_svc, "openvswitch-vswitchd"
     )
     ovn_daemonsets = get_objects_by_id(network_svc, "ovn-controller")
+    ovn_pods_by_node = {ds.name: ds.pods_by_node for ds in ovn_daemonsets}
     for ovs_ds in vswitchd_daemonsets:
         for ovs_pod in ovs_ds.pods:
             node = ovs_pod.obj["spec"].get("nodeName")
             LOG.info(f"Found ovs pod on node {node}")
             for ovn_ds in ovn_daemonsets:
-                if ovn_ds.get_pod_on_node(node):
+                if node in ovn_pods_by_node[ovn_ds.name]:
                     LOG.info(f"Removing ovs pod {ovs_pod} on node {node}")
                     ovs_pod.delete(propagation_policy="Background")
                     LOG.info(f"Updating ovn pod on node {node}")
@@ -2,6 +2,7 @@ import asyncio
 import kopf
 
 from openstack_controller import batch_health
+from openstack_controller import cache
 from openstack_controller import constants
 from openstack_controller import health
 from openstack_controller import hooks
@@ -72,6 +73,14 @@ def daemonsets(name, namespace, meta, status, reason, **kwargs):
     if not osdplst.exists():
         return
 
+    # NOTE(vsaienko): keep cache progress up to date when images are
+    # cached asynchronously to osdpl reconcile.
+    if (
+        reason != "delete"
+        and meta.get("labels", {}).get("k8s-app") == constants.CACHE_NAME
+    ):
+        cache.update_progress(namespace, osdplst)
+
     application, component = health.ident(meta)
     if reason == "delete":
         osdplst.remove_osdpl_service_health(application, component)
@@ -1,9 +1,12 @@
 import asyncio
+import time
 
 import kopf
 
+from openstack_controller import constants as const
 from openstack_controller import kube
 from openstack_controller import health
+from openstack_controller import openstack_utils
 from openstack_controller import settings
 from openstack_controller import utils
 from openstack_controller import services
@@ -13,12 +16,139 @@ from openstack_controller import resource_view
 
 
 LOG = utils.get_logger(__name__)
+CONF = settings.CONF
 
 
 def maintenance_node_name(body):
     return body["spec"]["nodeName"].split(".")[0]
 
 
+def get_nmr_batch_key(node):
+    """Get key to group NodeMaintenanceRequest with other nodes
+
+    :returns: tuple (roles, availability zone)
+    """
+    roles = tuple(role.value for role in const.NodeRole if node.has_role(role))
+    zone = None
+    if node.has_role(const.NodeRole.compute) and CONF.getboolean(
+        "maintenance", "respect_nova_az"
+    ):
+        os_client = openstack_utils.OpenStackClientManager()
+        compute_services = os_client.compute_get_services(host=node.name)
+        if compute_services:
+            zone = compute_services[0].location.zone
+    return roles, zone
+
+
+async def run_maintenance_hooks(hook, nwls, mspec, osdplst, child_view, *args):
+    """Run maintenance hook of all services
+
+    Hooks of services are run concurrently, respecting ordering
+    constraints declared by services. Durations of hooks are stored
+    on NodeWorkloadLocks.
+
+    :param hook: the name of hook to run, process_nmr, process_nmrs
+                 or delete_nmr
+    :param nwls: the list of NodeWorkloadLocks of handled nodes
+    :param args: the arguments to pass to the hook
+
+    :raises: the first error occurred in hooks.
+    """
+    after_attr = {
+        "process_nmr": "maintenance_process_after",
+        "process_nmrs": "maintenance_process_after",
+        "delete_nmr": "maintenance_delete_after",
+    }[hook]
+    instances = {}
+    for service_name, service_class in services.ORDERED_SERVICES:
+        service = service_class(mspec, LOG, osdplst, child_view)
+        if service.maintenance_api:
+            instances[service_name] = service
+    tasks = {}
+    durations = {}
+
+    async def _run(service_name):
+        service = instances[service_name]
+        dependencies = [
+            tasks[name]
+            for name in getattr(service, after_attr, [])
+            if name in tasks
+        ]
+        if dependencies:
+            await asyncio.gather(*dependencies)
+        LOG.info(f"Running {hook} for {service.service}")
+        start = time.monotonic()
+        await getattr(service, hook)(*args)
+        durations[service_name] = round(time.monotonic() - start, 3)
+        LOG.info(
+            f"Finished {hook} for {service.service} in {durations[service_name]} seconds"
+        )
+
+    for service_name in instances:
+        tasks[service_name] = asyncio.ensure_future(_run(service_name))
+    results = await asyncio.gather(*tasks.values(), return_exceptions=True)
+    for nwl in nwls:
+        nwl.set_hooks_durations(hook, durations)
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+
+
+async def process_nmr_batched(node, nmr, mspec, osdplst, child_view):
+    """Handle NodeMaintenanceRequest as a part of batch
+
+    :raises kopf.TemporaryError: when handling of batch failed.
+    """
+    roles, zone = get_nmr_batch_key(node)
+    max_size = min(maintenance.get_max_parallel_by_role(r) for r in roles)
+    batch, leader = maintenance.NMR_BATCHER.join(
+        (roles, zone), max_size, node, nmr
+    )
+    if leader:
+        window = CONF.getint("maintenance", "nmr_batch_window")
+        for _ in range(window):
+            if batch.full:
+                break
+            await asyncio.sleep(1)
+        nodes_nmrs = maintenance.NMR_BATCHER.close(batch)
+        LOG.info(
+            f"Handling maintenance batch {[n.name for n, _ in nodes_nmrs]} for roles {roles} in zone {zone}"
+        )
+        nwls = [
+            maintenance.NodeWorkloadLock.get_by_node(n.name)
+            for n, _ in nodes_nmrs
+        ]
+        try:
+            await run_maintenance_hooks(
+                "process_nmrs", nwls, mspec, osdplst, child_view, nodes_nmrs
+            )
+        except Exception as e:
+            batch.error = e
+        finally:
+            batch.done.set()
+    else:
+        LOG.info(f"The node {node.name} joined maintenance batch {batch.key}")
+        # NOTE(vsaienko): do not wait forever when leader handler was
+        # cancelled before marking batch as done.
+        deadline = time.monotonic() + CONF.getint(
+            "maintenance", "nmr_batch_timeout"
+        )
+        while not batch.done.is_set():
+            if time.monotonic() > deadline:
+                msg = f"Timed out waiting for maintenance batch {batch.key} is handled"
+                maintenance.NodeWorkloadLock.get_by_node(
+                    node.name
+                ).set_error_message(msg)
+                raise kopf.TemporaryError(msg)
+            await asyncio.sleep(1)
+    if batch.error:
+        msg = f"Failed to handle maintenance batch {batch.key}: {batch.error}"
+        maintenance.NodeWorkloadLock.get_by_node(node.name).set_error_message(
+            msg
+        )
+        raise kopf.TemporaryError(msg)
+
+
 @kopf.on.create(*maintenance.NodeMaintenanceRequest.kopf_on_args)
 @kopf.on.update(*maintenance.NodeMaintenanceRequest.kopf_on_args)
 @kopf.on.resume(*maintenance.NodeMaintenanceRequest.kopf_on_args)
@@ -66,25 +196,22 @@ async def _node_maintenance_request_change_handler(body, **kwargs):
         for service_name, service_class in services.ORDERED_SERVICES:
             service = service_class(mspec, LOG, osdplst, child_view)
             if service.maintenance_api:
-                services_can_handle_nmr[service_name] = (
-                    await service.can_handle_nmr(node, active_locks)
-                )
+                services_can_handle_nmr[
+                    service_name
+                ] = await service.can_handle_nmr(node, active_locks)
         if not all(services_can_handle_nmr.values()):
             msg = f"Some services blocks nmr handling {services_can_handle_nmr}. Deferring processing for node {node.name}"
             nwl.set_error_message(msg)
             raise kopf.TemporaryError(msg)
 
         nwl.set_inner_state_active()
-        for service, service_class in services.ORDERED_SERVICES:
-            service = service_class(mspec, LOG, osdplst, child_view)
-            if service.maintenance_api:
-                LOG.info(
-                    f"Got moving node {node_name} into maintenance for {service_class.service}"
-                )
-                await service.process_nmr(node, nmr)
-                LOG.info(
-                    f"The node {node_name} is ready for maintenance for {service_class.service}"
-                )
+        if CONF.getboolean("maintenance", "nmr_batch_enabled"):
+            await process_nmr_batched(node, nmr, mspec, osdplst, child_view)
+        else:
+            LOG.info(f"Got moving node {node_name} into maintenance")
+            await run_maintenance_hooks(
+                "process_nmr", [nwl], mspec, osdplst, child_view, node, nmr
+            )
     nwl.set_state_inactive()
     nwl.unset_error_message()
     LOG.info(f"Released NodeWorkloadLock for node {node_name}")
@@ -150,16 +277,10 @@ async def _node_maintenance_request_delete_handler(body, **kwargs):
             )
             child_view = resource_view.ChildObjectView(mspec)
 
-            for service, service_class in reversed(services.ORDERED_SERVICES):
-                service = service_class(mspec, LOG, osdplst, child_view)
-                if service.maintenance_api:
-                    LOG.info(
-                        f"Moving node {node_name} to operational state for {service_class.service}"
-                    )
-                    await service.delete_nmr(node, nmr)
-                    LOG.info(
-                        f"The node {node_name} is ready for operations for {service_class.service}"
-                    )
+            LOG.info(f"Moving node {node_name} to operational state")
+            await run_maintenance_hooks(
+                "delete_nmr", [nwl], mspec, osdplst, child_view, node, nmr
+            )
     nwl.set_inner_state_inactive()
     nwl.set_state_active()
     nwl.unset_error_message()
@@ -324,6 +445,18 @@ async def _node_workloadlock_request_delete_handler(body, **kwargs):
     )
 
 
+@kopf.on.event(*maintenance.NodeWorkloadLock.kopf_on_args)
+def node_workloadlock_event_handler(type, body, **kwargs):
+    maintenance.LOCKS_INDEX.update_nwl(body, deleted=type == "DELETED")
+
+
+# NOTE(vsaienko): locks index is read by nmr handlers, keep roles of nodes
+# up to date in the same process.
+@kopf.on.event("", "v1", "nodes")
+def node_event_handler(type, body, **kwargs):
+    maintenance.LOCKS_INDEX.update_node(body, deleted=type == "DELETED")
+
+
 @kopf.on.delete(*maintenance.NodeDisableNotification.kopf_on_args)
 def node_disable_notification_delete_handler(body, **kwargs):
     name = body["metadata"]["name"]
@@ -1,16 +1,16 @@
 import asyncio
-import os
 
 import kopf
 
 from openstack_controller import cache
 from openstack_controller import constants
+from openstack_controller import helm
 from openstack_controller import kube
 from openstack_controller import layers
 from openstack_controller import maintenance
 from openstack_controller import secrets
 from openstack_controller import services
-from openstack_controller import settings  # noqa
+from openstack_controller import settings
 from openstack_controller import version
 from openstack_controller import utils
 from openstack_controller import osdplstatus
@@ -18,6 +18,7 @@ from openstack_controller import resource_view
 
 
 LOG = utils.get_logger(__name__)
+CONF = settings.CONF
 
 
 def is_openstack_version_changed(diff):
@@ -147,9 +148,7 @@ def discover_images(mspec, logger):
 
 def cleanup_helm_cache():
     LOG.info(f"Cleaning helm cache in {settings.HELM_REPOSITORY_CACHE}")
-    for root, dirs, files in os.walk(settings.HELM_REPOSITORY_CACHE):
-        for file in files:
-            os.remove(os.path.join(root, file))
+    helm.cleanup_repository_cache()
 
 
 async def _rotate_creds(
@@ -295,7 +294,10 @@ async def _handle(body, meta, spec, logger, reason, **kwargs):
     images = discover_images(mspec, logger)
     if images != cache.images(meta["namespace"]):
         cache.restart(images, body, mspec)
-    cache.wait_ready(meta["namespace"])
+    if CONF.getboolean("cache", "async"):
+        cache.update_progress(meta["namespace"], osdplst)
+    else:
+        cache.wait_ready(meta["namespace"], osdplst)
 
     update, delete = layers.services(mspec, logger, **kwargs)
 
@@ -1,6 +1,7 @@
 import kopf
 import time
 
+from openstack_controller import metrics
 from openstack_controller import settings
 from openstack_controller import utils
 
@@ -8,6 +9,14 @@ from openstack_controller import utils
 LOG = utils.get_logger(__name__)
 
 
+@kopf.on.startup()
+def start_metrics_server(**kwargs):
+    if not settings.OSCTL_METRICS_PORT:
+        return
+    metrics.instrument_handlers(kopf.get_default_registry())
+    metrics.start_server(settings.OSCTL_METRICS_PORT)
+
+
 @kopf.on.probe(id="delay")
 def check_heartbeat(**kwargs):
     delay = None
@@ -16,13 +16,16 @@
 
 import abc
 from datetime import datetime
+import random
 import sys
 from threading import Thread, Lock
 import time
 
 from prometheus_client.core import GaugeMetricFamily
 
+from openstack_controller.exporter import metrics
 from openstack_controller.exporter import settings
+from openstack_controller.exporter import sharding
 from openstack_controller.exporter import collectors
 from openstack_controller import utils
 from openstack_controller import kube
@@ -35,25 +38,73 @@ class OsdplMetricsCollector(object):
     def __init__(self):
         self.collector_instances = []
         self.gather_tasks = {}
+        self.next_refresh = {}
+        # Incremented each time collector refresh is completed
+        self.generation = 0
         self.max_poll_timeout = settings.OSCTL_EXPORTER_MAX_POLL_TIMEOUT
         for name, collector in collectors.registry.items():
             if name in settings.OSCTL_EXPORTER_ENABLED_COLLECTORS:
+                if not (collector._host_sharded or sharding.is_local(name)):
+                    LOG.info(f"Collector {name} belongs to other shard")
+                    continue
                 LOG.info(f"Adding collector {name} to registry")
                 instance = collector()
                 self.collector_instances.append(instance)
-        self.init_tasks_status_tread()
-        self.initialized = False
+                # NOTE(vsaienko): spread initial refreshes same way as
+                # following ones.
+                self.next_refresh[name] = time.time() + random.uniform(
+                    0,
+                    instance.refresh_interval
+                    * settings.OSCTL_EXPORTER_REFRESH_JITTER,
+                )
+        self.init_scheduler_thread()
 
-    def init_tasks_status_tread(self):
-        LOG.info(f"Starting tasks status thread.")
-        future = Thread(target=self.watch_for_tasks, daemon=True)
+    def init_scheduler_thread(self):
+        LOG.info(f"Starting collectors scheduler thread.")
+        future = Thread(target=self.run_scheduler, daemon=True)
         future.start()
-        self.status_future = future
+        self.scheduler_future = future
 
-    def watch_for_tasks(self):
+    def run_scheduler(self):
         while True:
-            self.update_tasks_status()
-            time.sleep(5)
+            # NOTE(vsaienko): do not let API errors kill the scheduler,
+            # only stuck tasks make exporter exit.
+            try:
+                self.update_tasks_status()
+                self.schedule_tasks()
+            except Exception:
+                LOG.exception("Failed to schedule collectors refresh.")
+            time.sleep(1)
+
+    def get_next_refresh(self, collector_instance):
+        interval = collector_instance.refresh_interval
+        jitter = interval * settings.OSCTL_EXPORTER_REFRESH_JITTER
+        return time.time() + interval + random.uniform(-jitter, jitter)
+
+    def schedule_tasks(self):
+        """Submit refresh of collectors which interval is passed"""
+        now = time.time()
+        due = [
+            collector_instance
+            for collector_instance in self.collector_instances
+            if collector_instance._name not in self.gather_tasks
+            and self.next_refresh[collector_instance._name] <= now
+        ]
+        if not due:
+            return
+        osdpl = kube.get_osdpl()
+        if not osdpl:
+            for collector_instance in due:
+                self.next_refresh[
+                    collector_instance._name
+                ] = self.get_next_refresh(collector_instance)
+            return
+        LOG.info(f"The osdpl {osdpl.name} found. Collecting metrics")
+        for collector_instance in due:
+            self.submit_task(
+                collector_instance._name,
+                collector_instance.refresh_data,
+            )
 
     def submit_task(self, name, func):
         """Submit a taks with data collection
@@ -66,7 +117,7 @@ class OsdplMetricsCollector(object):
         if name in self.gather_tasks:
             running_for = start - self.gather_tasks[name]["started_at"]
             LOG.warning(
-                f"The task {name} already running for {running_for}. Highly likely this occur due to frequent metric collection."
+                f"The task {name} already running for {running_for}. Highly likely refresh interval is too short."
             )
             return False
         LOG.info(f"Starting metric collector thread for {name}")
@@ -77,6 +128,12 @@ class OsdplMetricsCollector(object):
 
     def complete_task(self, name):
         self.gather_tasks.pop(name)
+        self.generation += 1
+        for collector_instance in self.collector_instances:
+            if collector_instance._name == name:
+                self.next_refresh[name] = self.get_next_refresh(
+                    collector_instance
+                )
 
     def check_stuck_tasks(self):
         for name, task in self.gather_tasks.copy().items():
@@ -97,39 +154,25 @@ class OsdplMetricsCollector(object):
                 LOG.info(f"Task {name} took {took_time} to complete.")
         self.check_stuck_tasks()
 
-    def wait_for_tasks(self, timeout):
-        start = datetime.utcnow()
-        while any(
-            [
-                task["future"].is_alive()
-                for task in self.gather_tasks.copy().values()
-            ]
-        ):
-            if (datetime.utcnow() - start).total_seconds() >= timeout:
-                LOG.warning(
-                    f"Tasks {self.gather_tasks.copy()} did not complete in {timeout}, return cache result."
-                )
-                return
-            time.sleep(1)
+    def is_ready(self):
+        """Check if metrics can be served
 
-    def collect(self):
+        Exits when scheduler is not running.
+        """
         osdpl = kube.get_osdpl()
-        if not self.status_future.is_alive():
-            LOG.error("The status task is not running.")
+        if not self.scheduler_future.is_alive():
+            LOG.error("The scheduler task is not running.")
             sys.exit(1)
+        return bool(osdpl)
 
-        if not osdpl:
+    def collect(self):
+        if not self.is_ready():
             return
-        if self.initialized:
-            if osdpl:
-                LOG.info(f"The osdpl {osdpl.name} found. Collecting metrics")
-                for collector_instance in self.collector_instances:
-                    self.submit_task(
-                        collector_instance._name,
-                        collector_instance.refresh_data,
-                    )
-            self.wait_for_tasks(settings.OSCTL_SCRAPE_TIMEOUT)
-        self.initialized = True
+        yield from self.collect_snapshot()
+        yield from self.collect_staleness()
+
+    def collect_snapshot(self):
+        """Collect metrics which change only with snapshot generation"""
         scrape_duration = GaugeMetricFamily(
             "osdpl_scrape_collector_duration_seconds",
             "Durations in seconds taken by collector to refresh metrics.",
@@ -150,6 +193,11 @@ class OsdplMetricsCollector(object):
             "Unix timestamp when collector metrics refresh was finished.",
             labels=["collector"],
         )
+        scrape_response_bytes = GaugeMetricFamily(
+            "osdpl_scrape_collector_response_bytes",
+            "Bytes of API responses received by collector during last metrics refresh.",
+            labels=["collector"],
+        )
 
         for collector_instance in self.collector_instances:
             if collector_instance.can_collect:
@@ -170,15 +218,44 @@ class OsdplMetricsCollector(object):
                     [collector_instance._name],
                     collector_instance.scrape_end_timestamp,
                 )
+                scrape_response_bytes.add_metric(
+                    [collector_instance._name],
+                    collector_instance.scrape_response_bytes,
+                )
         yield scrape_duration
         yield scrape_sucess
         yield scrape_start_timestamp
         yield scrape_end_timestamp
+        yield scrape_response_bytes
+        yield from metrics.REGISTRY.collect()
+
+    def collect_staleness(self):
+        """Collect age of collectors data, changes with time"""
+        scrape_staleness = GaugeMetricFamily(
+            "osdpl_scrape_collector_staleness_seconds",
+            "Seconds passed since collector metrics were successfully refreshed.",
+            labels=["collector"],
+        )
+        now = time.time()
+        for collector_instance in self.collector_instances:
+            if (
+                collector_instance.can_collect
+                and collector_instance.success_timestamp
+            ):
+                scrape_staleness.add_metric(
+                    [collector_instance._name],
+                    now - collector_instance.success_timestamp,
+                )
+        yield scrape_staleness
 
 
 class BaseMetricsCollector(object):
     _name = "osdpl_metric_name"
     _description = "osdpl metric description"
+    # When exporter is sharded, collector is running on all shards and
+    # splits hosts between them. Metrics not related to hosts are
+    # collected by shard owning the collector.
+    _host_sharded = False
     registry = {}
 
     def __init_subclass__(cls, *args, **kwargs):
@@ -191,6 +268,11 @@ class BaseMetricsCollector(object):
         self.scrape_success = False
         self.scrape_start_timestamp = 0
         self.scrape_end_timestamp = 0
+        self.success_timestamp = 0
+        self.scrape_response_bytes = 0
+        self.refresh_interval = settings.OSCTL_EXPORTER_REFRESH_INTERVALS.get(
+            self._name, settings.OSCTL_EXPORTER_REFRESH_INTERVAL
+        )
         self.lock_samples = Lock()
         self.families = self.init_families()
 
@@ -210,6 +292,14 @@ class BaseMetricsCollector(object):
             for name, metric in self.families.items():
                 yield metric
 
+    @property
+    def is_shard_owner(self):
+        return sharding.is_local(self._name)
+
+    def handle_refresh_error(self, error):
+        """Handle error raised during data refresh"""
+        pass
+
     @abc.abstractmethod
     def update_samples(self):
         """Long running task for taking data."""
@@ -220,6 +310,9 @@ class BaseMetricsCollector(object):
         start = datetime.utcnow()
         self.scrape_start_timestamp = start.timestamp()
         self.scrape_end_timestamp = 0
+        response_bytes = metrics.ResponseBytes()
+        token = metrics.COLLECTOR.set(self._name)
+        bytes_token = metrics.RESPONSE_BYTES.set(response_bytes)
         try:
             self.osdpl = kube.get_osdpl()
             self.can_collect = self.can_collect_data
@@ -233,8 +326,15 @@ class BaseMetricsCollector(object):
         except Exception as e:
             self.scrape_success = False
             LOG.exception(e)
+            self.handle_refresh_error(e)
+        finally:
+            metrics.RESPONSE_BYTES.reset(bytes_token)
+            metrics.COLLECTOR.reset(token)
         now = datetime.utcnow()
         self.scrape_end_timestamp = now.timestamp()
+        if self.scrape_success:
+            self.success_timestamp = time.time()
+        self.scrape_response_bytes = response_bytes.value
         self.scrape_duration = (now - start).total_seconds()
         LOG.info(f"Finished refreshing data for {self._name}")
 
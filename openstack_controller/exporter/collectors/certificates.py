@@ -36,6 +36,9 @@ class OsdplCertsMetricCollector(base.BaseMetricsCollector):
         super().__init__()
         with open(settings.OSCTL_EXPORTER_CERTIFICATES_INFO_FILE) as f:
             self.certs_info = yaml.safe_load(f)
+        # Parsed certificates by (namespace, name, key_name) along with
+        # resourceVersion of secret they were loaded from.
+        self.certs_cache = {}
 
     @property
     def can_collect_data(self):
@@ -65,7 +68,9 @@ class OsdplCertsMetricCollector(base.BaseMetricsCollector):
         """Load certificates from kubernetes secrets
 
         Return dictionary with certificate information from certificates
-        stored in kubernetes secrets:
+        stored in kubernetes secrets. Secrets versions are checked with
+        single metadata LIST per namespace, only changed secrets are
+        fetched and parsed again:
 
         :param certs_info: Dictionary with certs info.
                            {
@@ -78,22 +83,51 @@ class OsdplCertsMetricCollector(base.BaseMetricsCollector):
         :returns : Dictionary with cert identifier and certs objects
         """
         LOG.info(f"Loading certificates: {self.certs_info}")
+        versions = {}
+        for namespace in {
+            data["namespace"] for data in self.certs_info.values()
+        }:
+            for name, metadata in kube.resource_list_metadata(
+                kube.Secret, namespace
+            ).items():
+                versions[(namespace, name)] = metadata["resourceVersion"]
+
         res = {}
+        cache = {}
+        secrets = {}
         for identifier, data in self.certs_info.items():
-            secret = kube.find(
-                kube.Secret, data["name"], data["namespace"], silent=True
-            )
+            secret_key = (data["namespace"], data["name"])
+            cache_key = (*secret_key, data["key_name"])
+            if secret_key not in versions:
+                LOG.warning(f"Specified secret {data['name']} is not found.")
+                continue
+            cached = self.certs_cache.get(cache_key)
+            if cached and cached[0] == versions[secret_key]:
+                cache[cache_key] = cached
+                res[identifier] = cached[1]
+                continue
+            if secret_key not in secrets:
+                secrets[secret_key] = kube.find(
+                    kube.Secret, data["name"], data["namespace"], silent=True
+                )
+            secret = secrets[secret_key]
             if not secret:
                 LOG.warning(f"Specified secret {data['name']} is not found.")
                 continue
-            cert_content = secret.obj["data"].get(data["key_name"])
+            cert_content = secret.obj.get("data", {}).get(data["key_name"])
             if not cert_content:
                 LOG.error(
-                    f"Specified data['key_name'] not found in secret data['name']"
+                    f"Specified {data['key_name']} not found in secret {data['name']}"
                 )
+                continue
             cert_content = base64.b64decode(cert_content)
             cert = x509.load_pem_x509_certificate(
                 cert_content, default_backend()
             )
+            cache[cache_key] = (
+                secret.obj["metadata"]["resourceVersion"],
+                cert,
+            )
             res[identifier] = cert
+        self.certs_cache = cache
         return res
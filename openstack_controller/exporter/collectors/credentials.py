@@ -37,26 +37,45 @@ class OsdplCredentialsMetricCollector(base.BaseMetricsCollector):
             )
         }
 
-    def update_samples(self):
-        credentials_samples = []
-        osdplst = OpenStackDeploymentStatus(
-            self.osdpl.name, self.osdpl.namespace
-        )
+    def __init__(self):
+        super().__init__()
+        # Parsed rotation timestamps along with resourceVersion of
+        # OpenStackDeploymentStatus they were parsed from.
+        self.rotation_timestamps = (None, {})
+
+    def get_rotation_timestamps(self, osdplst):
+        resource_version = osdplst.obj["metadata"].get("resourceVersion")
+        if (
+            resource_version
+            and resource_version == self.rotation_timestamps[0]
+        ):
+            return self.rotation_timestamps[1]
+        timestamps = {}
         for _type in ["admin", "service"]:
-            ts = osdplst.get_credentials_rotation_status(_type).get(
-                "timestamp"
+            ts = utils.get_in(
+                osdplst.obj.get("status", {}),
+                ["credentials", "rotation", _type, "timestamp"],
             )
             if not ts:
                 LOG.warning(
                     f"Rotation timestamp for {_type} credentials not found."
                 )
                 continue
-            credentials_samples.append(
-                (
-                    [_type],
-                    datetime.strptime(ts, "%Y-%m-%d %H:%M:%S.%f").timestamp(),
-                )
-            )
+            timestamps[_type] = datetime.strptime(
+                ts, "%Y-%m-%d %H:%M:%S.%f"
+            ).timestamp()
+        self.rotation_timestamps = (resource_version, timestamps)
+        return timestamps
+
+    def update_samples(self):
+        osdplst = OpenStackDeploymentStatus(
+            self.osdpl.name, self.osdpl.namespace
+        )
+        osdplst.reload()
+        credentials_samples = [
+            ([_type], ts)
+            for _type, ts in self.get_rotation_timestamps(osdplst).items()
+        ]
         self.set_samples("rotation_timestamp", credentials_samples)
 
     @property
@@ -13,23 +13,61 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+import time
+
 import requests
 from urllib3.exceptions import InsecureRequestWarning
 
-from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.core import GaugeMetricFamily, HistogramMetricFamily
+from prometheus_client.utils import floatToGoString
 
 from openstack_controller import utils
+from openstack_controller.exporter import metrics
+from openstack_controller.exporter import settings
 from openstack_controller.exporter.collectors.openstack import base
 
 
 LOG = utils.get_logger(__name__)
 
+LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    float("inf"),
+)
+
 
 class OsdplApiMetricCollector(base.OpenStackBaseMetricCollector):
     _name = "osdpl_api"
     _description = "OpenStack API endpoints"
     _os_service_types = ["identity"]
 
+    def __init__(self):
+        super().__init__()
+        # service_id: service
+        self.services = {}
+        # labels: {"buckets": [count per bucket], "sum": sum}
+        self.latency_histograms = {}
+        self.session = requests.Session()
+        self.session.verify = False
+        adapter = requests.adapters.HTTPAdapter(
+            pool_maxsize=settings.OSCTL_EXPORTER_API_PROBE_WORKERS
+        )
+        for prefix in ["http://", "https://"]:
+            self.session.mount(prefix, adapter)
+        metrics.count_response_bytes(self.session)
+
     @utils.timeit
     def init_families(self):
         return {
@@ -43,6 +81,11 @@ class OsdplApiMetricCollector(base.OpenStackBaseMetricCollector):
                 "API endpoint connection latency microseconds",
                 labels=["url", "service_type", "service_name"],
             ),
+            "latency_seconds": HistogramMetricFamily(
+                f"{self._name}_latency_seconds",
+                "API endpoint response time in seconds",
+                labels=["url", "service_type", "service_name"],
+            ),
             "success": GaugeMetricFamily(
                 f"{self._name}_success",
                 "API endpoint connection success status",
@@ -50,51 +93,101 @@ class OsdplApiMetricCollector(base.OpenStackBaseMetricCollector):
             ),
         }
 
+    def get_service(self, service_id):
+        """Get service by id, services are cached between refreshes"""
+        if service_id not in self.services:
+            self.services = {
+                service.id: service
+                for service in self.oc.oc.identity.services()
+            }
+        return self.services.get(service_id)
+
+    def probe(self, url, token):
+        """Get endpoint response status and total response time
+
+        :returns: tuple with response status code and time in seconds.
+        """
+        start = time.perf_counter()
+        # TODO(vsaienko): mount ssl ca_cert from osdpl and use here.
+        resp = self.session.get(
+            url, timeout=30, headers={"X-Auth-Token": token}
+        )
+        return resp.status_code, time.perf_counter() - start
+
+    def observe_latency(self, labels, latency):
+        histogram = self.latency_histograms.setdefault(
+            tuple(labels), {"buckets": [0] * len(LATENCY_BUCKETS), "sum": 0}
+        )
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if latency <= bound:
+                histogram["buckets"][i] += 1
+        histogram["sum"] += latency
+
     def update_samples(self):
         statuses = []
         latencies = []
         successes = []
-        for endpoint in self.oc.oc.identity.endpoints(interface="public"):
-            service = self.oc.oc.identity.get_service(endpoint.service_id)
-            service_type = self.oc.service_type_manager.get_service_type(
-                service.type
-            )
-            service_name = service["name"]
-            if not service_type:
-                LOG.warning(
-                    f"Failed to get service_type for service {service}"
-                )
-                continue
-            url = endpoint["url"].split("%")[0]
-            success = True
-            token = self.oc.oc.auth_token
-            headers = {"X-Auth-Token": token}
-            try:
-                # TODO(vsaienko): mount ssl ca_cert from osdpl and use here.
-                requests.packages.urllib3.disable_warnings(
-                    category=InsecureRequestWarning
-                )
-                resp = requests.get(
-                    url, timeout=30, verify=False, headers=headers
-                )
-                statuses.append(
-                    ([url, service_type, service_name], resp.status_code)
+        requests.packages.urllib3.disable_warnings(
+            category=InsecureRequestWarning
+        )
+        token = self.oc.oc.auth_token
+        probes = {}
+        with ThreadPoolExecutor(
+            max_workers=settings.OSCTL_EXPORTER_API_PROBE_WORKERS
+        ) as executor:
+            for endpoint in self.oc.oc.identity.endpoints(interface="public"):
+                service = self.get_service(endpoint.service_id)
+                service_type = (
+                    service
+                    and self.oc.service_type_manager.get_service_type(
+                        service.type
+                    )
                 )
-                latencies.append(
-                    (
-                        [url, service_type, service_name],
-                        resp.elapsed.microseconds,
+                if not service_type:
+                    LOG.warning(
+                        f"Failed to get service_type for service {service}"
                     )
+                    continue
+                url = endpoint["url"].split("%")[0]
+                labels = (url, service_type, service["name"])
+                probes[labels] = executor.submit(
+                    contextvars.copy_context().run, self.probe, url, token
                 )
-                if resp.status_code >= 500:
+
+        for labels, probe in probes.items():
+            url = labels[0]
+            success = True
+            try:
+                status_code, latency = probe.result()
+                statuses.append((list(labels), status_code))
+                latencies.append((list(labels), latency * 1000000))
+                self.observe_latency(labels, latency)
+                if status_code >= 500:
                     LOG.warning(
-                        f"Got bad responce code {resp.status_code} from {url}."
+                        f"Got bad responce code {status_code} from {url}."
                     )
                     success = False
             except Exception as e:
                 LOG.warning(f"Failed to get responce from {url}. Error: {e}")
                 success = False
-            successes.append(([url, service_type, service_name], int(success)))
+            successes.append((list(labels), int(success)))
         self.set_samples("status", statuses)
         self.set_samples("latency", latencies)
+        self.set_samples(
+            "latency_seconds",
+            [
+                (
+                    list(labels),
+                    [
+                        (floatToGoString(bound), count)
+                        for bound, count in zip(
+                            LATENCY_BUCKETS, histogram["buckets"]
+                        )
+                    ],
+                    histogram["sum"],
+                )
+                for labels, histogram in self.latency_histograms.items()
+                if labels in probes
+            ],
+        )
         self.set_samples("success", successes)
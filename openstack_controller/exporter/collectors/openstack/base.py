@@ -13,9 +13,17 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import functools
+from threading import Lock
+import time
+
 import keystoneauth1
+from keystoneauth1 import session as ks_session
+import requests
 
 from openstack_controller import utils
+from openstack_controller.exporter import metrics
+from openstack_controller.exporter import settings
 from openstack_controller.exporter.collectors import base
 from openstack_controller import openstack_utils
 
@@ -23,39 +31,195 @@ from openstack_controller import openstack_utils
 LOG = utils.get_logger(__name__)
 
 
-class OpenStackBaseMetricCollector(base.BaseMetricsCollector):
-    # Service type to check for presence is catalog
-    _os_service_types = []
+def is_unauthorized(error):
+    return (
+        isinstance(error, keystoneauth1.exceptions.http.Unauthorized)
+        or getattr(error, "status_code", None) == 401
+    )
+
+
+def is_connection_error(error):
+    return isinstance(
+        error,
+        (
+            keystoneauth1.exceptions.connection.ConnectionError,
+            requests.exceptions.ConnectionError,
+        ),
+    )
+
+
+class SharedClient:
+    """OpenStack client shared by all collectors
+
+    Keeps single connection with shared token and pool of HTTP connections,
+    and caches service types from catalog.
+    """
 
     def __init__(self):
-        super().__init__()
+        self.lock = Lock()
+        # Serializes catalog refreshes, not taken by get() so slow
+        # Keystone does not block collectors.
+        self.catalog_lock = Lock()
         self._oc = None
+        self._service_types = None
+        self._service_types_expire = 0
+        # Tuple with auth reference and list of (url, service_type) of
+        # endpoints from its catalog.
+        self._endpoints = (None, [])
+
+    def get(self):
+        with self.lock:
+            if self._oc is None:
+                self._oc = openstack_utils.OpenStackClientManager()
+                adapter = ks_session.TCPKeepAliveAdapter(
+                    pool_maxsize=settings.OSCTL_EXPORTER_OPENSTACK_POOL_SIZE
+                )
+                for prefix in ["http://", "https://"]:
+                    self._oc.oc.session.session.mount(prefix, adapter)
+                metrics.instrument_session(
+                    self._oc.oc.session.session,
+                    functools.partial(self.get_service_type, self._oc),
+                )
+            return self._oc
+
+    def get_service_type(self, oc, url):
+        """Get service type of catalog endpoint the url belongs to"""
+        # NOTE(vsaienko): do not call auth.get_access() as it may
+        # authenticate and is called for every sent request, also while auth
+        # lock is taken.
+        auth_ref = getattr(oc.oc.session.auth, "auth_ref", None)
+        if auth_ref is None:
+            return "unknown"
+        if self._endpoints[0] is not auth_ref:
+            endpoints = []
+            for service in auth_ref.service_catalog.catalog:
+                for endpoint in service.get("endpoints", []):
+                    if endpoint.get("url"):
+                        endpoints.append((endpoint["url"], service["type"]))
+            endpoints.sort(key=lambda endpoint: len(endpoint[0]), reverse=True)
+            self._endpoints = (auth_ref, endpoints)
+        for endpoint_url, service_type in self._endpoints[1]:
+            if url.startswith(endpoint_url):
+                return service_type
+        return "unknown"
+
+    def reset(self):
+        """Drop client and cached catalog, to reauthenticate on next use"""
+        with self.lock:
+            self._oc = None
+            self._service_types = None
+            self._service_types_expire = 0
+
+    def _get_cached_service_types(self):
+        with self.lock:
+            if time.time() < self._service_types_expire:
+                return self._service_types
+
+    def get_service_types(self):
+        service_types = self._get_cached_service_types()
+        if service_types is not None:
+            return service_types
+        with self.catalog_lock:
+            service_types = self._get_cached_service_types()
+            if service_types is not None:
+                return service_types
+            oc = self.get()
+            service_types = {
+                service.type for service in oc.oc.identity.services()
+            }
+            with self.lock:
+                self._service_types = service_types
+                self._service_types_expire = (
+                    time.time() + settings.OSCTL_EXPORTER_CATALOG_TTL
+                )
+            return service_types
+
+
+CLIENT = SharedClient()
+
+
+class OpenStackBaseMetricCollector(base.BaseMetricsCollector):
+    # Service type to check for presence is catalog
+    _os_service_types = []
 
     @property
     def oc(self):
-        # NOTE(vsaienko): if we got any exception during  update_samples
-        # re initialize oc in this case.
-        if not self.scrape_success or self._oc is None:
-            try:
-                self._oc = openstack_utils.OpenStackClientManager()
-            except Exception as e:
-                LOG.warning("Failed to initialize openstack client manager")
-                LOG.exception(e)
-        return self._oc
+        try:
+            return CLIENT.get()
+        except Exception as e:
+            LOG.warning("Failed to initialize openstack client manager")
+            LOG.exception(e)
 
     @property
     def is_service_available(self):
+        service_types = CLIENT.get_service_types()
         for service_type in self._os_service_types:
-            try:
-                for svc in self.oc.oc.identity.services(type=service_type):
-                    return True
-            except keystoneauth1.exceptions.http.Unauthorized:
-                # NOTE(vsaienko): reset client and let it reinitiate on next run.
-                self._oc = None
-                raise
+            if service_type in service_types:
+                return True
         LOG.info(f"Service not found for types {self._os_service_types}")
         return False
 
+    def handle_refresh_error(self, error):
+        # NOTE(vsaienko): reset client and let it reinitiate on next run.
+        if is_unauthorized(error) or is_connection_error(error):
+            LOG.warning(
+                f"Got {type(error).__name__} error, resetting openstack client."
+            )
+            CLIENT.reset()
+
+    def list_resources(
+        self, proxy, path, key, fields, params=None, projection=True
+    ):
+        """Yield tuples with fields of listed resources
+
+        Resources are requested with big pages, when API supports
+        projection only required fields are requested. Pagination links
+        are followed when API returns them, otherwise the next page is
+        requested with marker of the last resource.
+
+        :param proxy: the openstacksdk service proxy to send requests with.
+        :param path: the path of resources collection.
+        :param key: the key with resources in response body.
+        :param fields: the list of fields to yield.
+        :param params: the dictionary with additional query parameters.
+        :param projection: whether API supports fields query parameter.
+        """
+        limit = settings.OSCTL_EXPORTER_LIST_LIMIT
+        params = dict(params or {})
+        params["limit"] = limit
+        if projection:
+            params["fields"] = ["id", *fields]
+        url = path
+        while True:
+            body = proxy.get(url, params=params).json()
+            items = body[key]
+            # NOTE(vsaienko): some backends ignore marker and return the
+            # same page again, do not count its resources twice.
+            if params and params.get("marker") and items:
+                if items[-1]["id"] == params["marker"]:
+                    LOG.warning(f"The marker is ignored by {path} API.")
+                    return
+            for item in items:
+                yield tuple(item.get(field) for field in fields)
+            next_links = [
+                link.get("href")
+                for link in body.get(f"{key}_links", [])
+                if link.get("rel") == "next" and link.get("href")
+            ]
+            if next_links:
+                if next_links[0] == url:
+                    LOG.warning(f"The next link of {path} API is not changed.")
+                    return
+                # NOTE(vsaienko): next link already contains all query
+                # parameters and marker.
+                url, params = next_links[0], None
+                continue
+            if params is None or not items or len(items) > limit:
+                return
+            if len(items) < limit and not body.get("next"):
+                return
+            params = {**params, "marker": items[-1]["id"]}
+
     @property
     def can_collect_data(self):
         if self.oc is None:
@@ -100,11 +100,18 @@ class OsdplCinderMetricCollector(base.OpenStackBaseMetricCollector):
         for zone in self.oc.oc.volume.availability_zones():
             volume_zone_total[zone["name"]] = 0
 
-        for volume in self.oc.oc.volume.volumes(all_tenants=True):
-            volume_zone = volume.get("availability_zone", "None")
+        for volume_zone, volume_size in self.list_resources(
+            self.oc.oc.volume,
+            "/volumes/detail",
+            "volumes",
+            ["availability_zone", "size"],
+            params={"all_tenants": 1},
+            projection=False,
+        ):
+            volume_zone = volume_zone or "None"
             volumes_total += 1
             # NOTE(vsaienko): the size may be None from API.
-            volumes_size += volume.get("size") or 0
+            volumes_size += volume_size or 0
             volume_zone_total.setdefault(volume_zone, 0)
             volume_zone_total[volume_zone] += 1
         self.set_samples("volumes", [([], volumes_total)])
@@ -113,9 +120,16 @@ class OsdplCinderMetricCollector(base.OpenStackBaseMetricCollector):
         for zone, volumes in volume_zone_total.items():
             zone_volumes_samples.append(([zone], volume_zone_total[zone]))
         self.set_samples("zone_volumes", zone_volumes_samples)
-        for snapshot in self.oc.oc.volume.snapshots(all_tenants=True):
+        for (snapshot_size,) in self.list_resources(
+            self.oc.oc.volume,
+            "/snapshots/detail",
+            "snapshots",
+            ["size"],
+            params={"all_tenants": 1},
+            projection=False,
+        ):
             snapshots_total += 1
-            snapshots_size += snapshot.get("size") or 0
+            snapshots_size += snapshot_size or 0
         self.set_samples("snapshots", [([], snapshots_total)])
         self.set_samples(
             "snapshots_size",
@@ -46,9 +46,11 @@ class OsdplGlanceMetricCollector(base.OpenStackBaseMetricCollector):
     def update_samples(self):
         images_total = 0
         images_size = 0
-        for image in self.oc.oc.image.images():
+        for (image_size,) in self.list_resources(
+            self.oc.oc.image, "/images", "images", ["size"], projection=False
+        ):
             images_total += 1
             # NOTE(vsaienko): the size may be None from API.
-            images_size += image.get("size") or 0
+            images_size += image_size or 0
         self.set_samples("images", [([], images_total)])
         self.set_samples("images_size", [([], images_size)])
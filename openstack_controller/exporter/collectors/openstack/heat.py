@@ -39,5 +39,14 @@ class OsdplHeatMetricCollector(base.OpenStackBaseMetricCollector):
 
     @utils.timeit
     def update_samples(self):
-        stacks = len(list(self.oc.oc.orchestration.stacks()))
+        stacks = sum(
+            1
+            for _ in self.list_resources(
+                self.oc.oc.orchestration,
+                "/stacks",
+                "stacks",
+                [],
+                projection=False,
+            )
+        )
         self.set_samples("stacks", [([], stacks)])
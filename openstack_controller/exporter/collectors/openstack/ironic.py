@@ -18,6 +18,7 @@ from prometheus_client.core import GaugeMetricFamily, InfoMetricFamily
 from openstack_controller import utils
 from openstack_controller.exporter.collectors.openstack import base
 from openstack_controller.exporter import constants
+from openstack_controller.exporter import sharding
 
 
 LOG = utils.get_logger(__name__)
@@ -27,6 +28,7 @@ class OsdplIronicMetricCollector(base.OpenStackBaseMetricCollector):
     _name = "osdpl_ironic"
     _description = "OpenStack Baremetal service metrics"
     _os_service_types = ["baremetal"]
+    _host_sharded = True
 
     @utils.timeit
     def init_families(self):
@@ -61,8 +63,9 @@ class OsdplIronicMetricCollector(base.OpenStackBaseMetricCollector):
     def update_samples(self):
 
         nodes = list(self.oc.baremetal_get_nodes())
-        nodes_total = len(nodes)
-        self.set_samples("nodes", [([], nodes_total)])
+        if self.is_shard_owner:
+            self.set_samples("nodes", [([], len(nodes))])
+        nodes = [node for node in nodes if sharding.is_local(node["uuid"])]
 
         baremetal_node_info_samples = []
         for node in nodes:
@@ -88,16 +88,22 @@ class OsdplNeutronMetricCollector(base.OpenStackBaseMetricCollector):
     @utils.timeit
     def update_samples(self):
         for resource in ["networks", "subnets"]:
-            total = len(list(getattr(self.oc.oc.network, resource)()))
+            total = sum(
+                1
+                for _ in self.list_resources(
+                    self.oc.oc.network, f"/{resource}", resource, []
+                )
+            )
             self.set_samples(resource, [([], total)])
 
         routers_total = 0
         zone_routers = {}
-        for router in self.oc.oc.network.routers() or []:
+        for (router_zones,) in self.list_resources(
+            self.oc.oc.network, "/routers", "routers", ["availability_zones"]
+        ):
             routers_total += 1
             # NOTE(vsaienko): TF return None instead of []
-            router_zones = router.get("availability_zones") or []
-            for zone in router_zones:
+            for zone in router_zones or []:
                 zone_routers.setdefault(zone, 0)
                 zone_routers[zone] += 1
 
@@ -110,9 +116,11 @@ class OsdplNeutronMetricCollector(base.OpenStackBaseMetricCollector):
         ports = {"total": 0}
         for port_status in self.port_statuses:
             ports[port_status] = 0
-        for port in self.oc.oc.network.ports():
+        for (port_status,) in self.list_resources(
+            self.oc.oc.network, "/ports", "ports", ["status"]
+        ):
             ports["total"] += 1
-            port_status = port["status"].lower()
+            port_status = port_status.lower()
             if port_status in ports.keys():
                 ports[port_status] += 1
 
@@ -125,8 +133,10 @@ class OsdplNeutronMetricCollector(base.OpenStackBaseMetricCollector):
 
         floating_ips_associated = 0
         floating_ips_not_associated = 0
-        for fip in self.oc.oc.network.ips():
-            if fip.get("port_id") is not None:
+        for (port_id,) in self.list_resources(
+            self.oc.oc.network, "/floatingips", "floatingips", ["port_id"]
+        ):
+            if port_id is not None:
                 floating_ips_associated += 1
             else:
                 floating_ips_not_associated += 1
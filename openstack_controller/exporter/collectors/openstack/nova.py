@@ -13,11 +13,18 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+import datetime
+import time
+
 from prometheus_client.core import GaugeMetricFamily, InfoMetricFamily
 
 from openstack_controller import utils
 from openstack_controller.exporter.collectors.openstack import base
 from openstack_controller.exporter import constants
+from openstack_controller.exporter import settings
+from openstack_controller.exporter import sharding
 
 
 LOG = utils.get_logger(__name__)
@@ -27,6 +34,7 @@ class OsdplNovaMetricCollector(base.OpenStackBaseMetricCollector):
     _name = "osdpl_nova"
     _description = "OpenStack Compute service metrics"
     _os_service_types = ["compute"]
+    _host_sharded = True
 
     def __init__(self):
         self.hypervisor_resource_classes = [
@@ -42,6 +50,10 @@ class OsdplNovaMetricCollector(base.OpenStackBaseMetricCollector):
             "availability_zone": ["zone"],
         }
         self.cache = {}
+        # server_id: {"status", "host", "zone"}
+        self.instances = {}
+        self.instances_changes_since = None
+        self.instances_synced_at = 0
         super().__init__()
 
     @utils.timeit
@@ -59,15 +71,23 @@ class OsdplNovaMetricCollector(base.OpenStackBaseMetricCollector):
         )
         self.cache["hypervisors"] = list(self.oc.oc.compute.hypervisors())
         self.cache["services"] = list(self.oc.oc.compute.services())
-        self.cache["resource_providers"] = list(
-            self.oc.oc.placement.resource_providers()
-        )
+        self.cache["resource_providers"] = {
+            resource_provider["name"]: resource_provider
+            for resource_provider in self.oc.oc.placement.resource_providers()
+        }
+        self.cache["host_availability_zone"] = {}
+        self.cache["availability_zone_hosts"] = {}
+        for service in self.cache["services"]:
+            self.cache["host_availability_zone"].setdefault(
+                service["host"], service["availability_zone"]
+            )
+            if service.get("binary") == "nova-compute":
+                self.cache["availability_zone_hosts"].setdefault(
+                    service.get("availability_zone", "nova"), []
+                ).append(service["host"])
 
-    @utils.timeit
     def get_host_resource_provider(self, name):
-        for resource_provider in self.cache.get("resource_providers", []):
-            if resource_provider["name"] == name:
-                return resource_provider
+        return self.cache.get("resource_providers", {}).get(name)
 
     @utils.timeit
     def get_resource_provider_inventories(self, rp):
@@ -81,22 +101,11 @@ class OsdplNovaMetricCollector(base.OpenStackBaseMetricCollector):
             f"/resource_providers/{rp.id}/usages"
         ).json()["usages"]
 
-    @utils.timeit
     def get_host_availability_zone(self, host):
-        for service in self.cache.get("services", []):
-            if service["host"] == host:
-                return service["availability_zone"]
+        return self.cache.get("host_availability_zone", {}).get(host)
 
-    @utils.timeit
     def get_availability_zone_hosts(self, zone):
-        res = []
-        for service in self.cache.get("services", []):
-            if (
-                service.get("availability_zone", "nova") == zone
-                and service.get("binary") == "nova-compute"
-            ):
-                res.append(service["host"])
-        return res
+        return self.cache.get("availability_zone_hosts", {}).get(zone, [])
 
     @utils.timeit
     def get_hosts_placement_metrics(self):
@@ -106,12 +115,38 @@ class OsdplNovaMetricCollector(base.OpenStackBaseMetricCollector):
         self.hypervisor_resource_classes
         """
         hosts = {}
-        for hypervisor in self.cache.get("hypervisors", []):
-            host_name = hypervisor["name"].split(".")[0]
+        placement_data = {}
+        with ThreadPoolExecutor(
+            max_workers=settings.OSCTL_EXPORTER_PLACEMENT_WORKERS
+        ) as executor:
+            for hypervisor in self.cache.get("hypervisors", []):
+                if not sharding.is_local(hypervisor["name"].split(".")[0]):
+                    continue
+                rp = self.get_host_resource_provider(hypervisor["name"])
+                if rp is None:
+                    LOG.warning(
+                        f"Resource provider for hypervisor {hypervisor['name']} is not found."
+                    )
+                    continue
+                # NOTE(vsaienko): run in context of collector to account
+                # API requests to it.
+                placement_data[hypervisor["name"].split(".")[0]] = (
+                    executor.submit(
+                        contextvars.copy_context().run,
+                        self.get_resource_provider_usages,
+                        rp,
+                    ),
+                    executor.submit(
+                        contextvars.copy_context().run,
+                        self.get_resource_provider_inventories,
+                        rp,
+                    ),
+                )
+
+        for host_name, (usages, inventories) in placement_data.items():
             host = {}
-            rp = self.get_host_resource_provider(hypervisor["name"])
-            usages = self.get_resource_provider_usages(rp)
-            inventories = self.get_resource_provider_inventories(rp)
+            usages = usages.result()
+            inventories = inventories.result()
             for k, used in usages.items():
                 rc = k.lower()
                 if rc not in self.hypervisor_resource_classes:
@@ -131,6 +166,13 @@ class OsdplNovaMetricCollector(base.OpenStackBaseMetricCollector):
             hosts[host_name] = host
         return hosts
 
+    @property
+    def shard_labels(self):
+        """Labels added to metrics summarized over hosts of shard"""
+        if sharding.is_sharded():
+            return [str(settings.OSCTL_EXPORTER_SHARD_INDEX)]
+        return []
+
     @utils.timeit
     def summ_hosts_metrics(self, host_placement_metrics, hosts):
         res = {}
@@ -233,6 +275,9 @@ class OsdplNovaMetricCollector(base.OpenStackBaseMetricCollector):
             )
         for group_type in self.host_group_types:
             labels = self.host_group_types_labels[group_type]
+            # NOTE(vsaienko): each shard summarizes only its hosts.
+            if sharding.is_sharded():
+                labels = labels + ["shard"]
             for resource_class in self.hypervisor_resource_classes:
                 res[f"{group_type}_{resource_class}"] = GaugeMetricFamily(
                     f"{self._name}_{group_type}_{resource_class}",
@@ -277,7 +322,7 @@ class OsdplNovaMetricCollector(base.OpenStackBaseMetricCollector):
                     f"aggregate_{metric_name}", []
                 )
                 aggregate_metric_samples[f"aggregate_{metric_name}"].append(
-                    ([aggregate_name], metric_value)
+                    ([aggregate_name, *self.shard_labels], metric_value)
                 )
 
         for metric_name, samples in aggregate_metric_samples.items():
@@ -302,7 +347,7 @@ class OsdplNovaMetricCollector(base.OpenStackBaseMetricCollector):
                     f"availability_zone_{metric_name}", []
                 )
                 az_metric_samples[f"availability_zone_{metric_name}"].append(
-                    ([zone_name], metric_value)
+                    ([zone_name, *self.shard_labels], metric_value)
                 )
 
         for metric_name, samples in az_metric_samples.items():
@@ -388,6 +433,8 @@ class OsdplNovaMetricCollector(base.OpenStackBaseMetricCollector):
         state_samples = []
         status_samples = []
         for service in self.cache.get("services", {}):
+            if not sharding.is_local(service["host"]):
+                continue
             zone = service.get("availability_zone", "nova")
             state_samples.append(
                 (
@@ -413,6 +460,47 @@ class OsdplNovaMetricCollector(base.OpenStackBaseMetricCollector):
         self.set_samples("service_state", state_samples)
         self.set_samples("service_status", status_samples)
 
+    @utils.timeit
+    def update_instances(self):
+        """Update instances table
+
+        Full list of servers is taken periodically, in between only
+        servers changed since previous update are requested including
+        deleted ones.
+        """
+        # NOTE(vsaienko): shift the timestamp to tolerate clock skew between
+        # exporter and nova api.
+        changes_since = (
+            datetime.datetime.utcnow() - datetime.timedelta(minutes=10)
+        ).isoformat(timespec="seconds")
+        full_sync = (
+            self.instances_changes_since is None
+            or time.time() - self.instances_synced_at
+            >= settings.OSCTL_EXPORTER_NOVA_INSTANCES_RESYNC_INTERVAL
+        )
+        if full_sync:
+            instances = {}
+            servers = self.oc.oc.compute.servers(all_projects=True)
+        else:
+            instances = self.instances.copy()
+            servers = self.oc.oc.compute.servers(
+                all_projects=True,
+                changes_since=self.instances_changes_since,
+            )
+        for server in servers:
+            if server["status"] == "DELETED":
+                instances.pop(server["id"], None)
+                continue
+            instances[server["id"]] = {
+                "status": server["status"].lower(),
+                "host": server.get("compute_host"),
+                "zone": server.get("availability_zone"),
+            }
+        self.instances = instances
+        self.instances_changes_since = changes_since
+        if full_sync:
+            self.instances_synced_at = time.time()
+
     @utils.timeit
     def update_instances_samples(self):
         instances = {"total": 0, "active": 0, "error": 0}
@@ -420,10 +508,11 @@ class OsdplNovaMetricCollector(base.OpenStackBaseMetricCollector):
         availability_zone_instances_total = {}
         for zone in self.cache.get("availability_zones", []):
             availability_zone_instances_total[zone["name"]] = 0
-        for instance in self.oc.oc.compute.servers(all_projects=True):
-            status = instance["status"].lower()
-            host = instance.get("compute_host")
-            zone = instance.get("availability_zone")
+        self.update_instances()
+        for instance in self.instances.values():
+            status = instance["status"]
+            host = instance["host"]
+            zone = instance["zone"]
             instances["total"] += 1
             if status in instances.keys():
                 instances[status] += 1
@@ -491,9 +580,11 @@ class OsdplNovaMetricCollector(base.OpenStackBaseMetricCollector):
 
         self.update_service_samples()
         self.update_hypervisor_samples(host_placement_metrics)
-        self.update_host_aggregate_samples()
         self.update_aggregate_samples(host_placement_metrics)
         self.update_availability_zone_samples(host_placement_metrics)
+        if not self.is_shard_owner:
+            return
+        self.update_host_aggregate_samples()
         self.update_availability_zone_info_samples()
         self.update_availability_zone_hosts()
         hypervisor_instances = self.update_instances_samples()
@@ -44,9 +44,12 @@ class OsdplOctaviaMetricCollector(base.OpenStackBaseMetricCollector):
         for status in constants.LoadbalancerStatus:
             for p_status in constants.LoadbalancerProvisioningStatus:
                 loadbalancers_by_status[(status.name, p_status.name)] = 0
-        for lb in self.oc.oc.load_balancer.load_balancers():
-            status = lb.get("operating_status")
-            pr_status = lb.get("provisioning_status")
+        for status, pr_status in self.list_resources(
+            self.oc.oc.load_balancer,
+            "/lbaas/loadbalancers",
+            "loadbalancers",
+            ["operating_status", "provisioning_status"],
+        ):
             if not hasattr(
                 constants.LoadbalancerStatus, status
             ) or not hasattr(
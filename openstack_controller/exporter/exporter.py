@@ -13,8 +13,13 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from threading import Lock
+import uuid
+import zlib
+
 import prometheus_client
 from prometheus_client.core import REGISTRY
+from prometheus_client import exposition
 
 from openstack_controller import utils
 from openstack_controller.exporter import collectors
@@ -23,6 +28,111 @@ from openstack_controller.exporter import collectors
 LOG = utils.get_logger(__name__)
 
 
+class MetricsView:
+    """Registry like object to render metrics returned by collect function"""
+
+    def __init__(self, collect):
+        self.collect = collect
+
+
+class ExpositionCache:
+    """Text exposition of collectors snapshot
+
+    Snapshot metrics are rendered and compressed once per generation,
+    only metrics that change with time are rendered on each request.
+    """
+
+    def __init__(self, collector):
+        self.collector = collector
+        self.lock = Lock()
+        # NOTE(vsaienko): generation is started from 0 by every process,
+        # make etags of different processes distinct.
+        self.instance_id = uuid.uuid4().hex[:16]
+        self.generation = None
+        self.etag = None
+        self.body = b""
+        self.gzip_body = b""
+        self.gzip_compressor = None
+
+    def update(self):
+        with self.lock:
+            generation = self.collector.generation
+            if generation == self.generation:
+                return
+            LOG.info(f"Rendering metrics of generation {generation}")
+            body = exposition.generate_latest(
+                MetricsView(self.collector.collect_snapshot)
+            )
+            compressor = zlib.compressobj(wbits=31)
+            self.gzip_body = compressor.compress(body)
+            self.gzip_compressor = compressor
+            self.body = body
+            self.generation = generation
+            # NOTE(vsaienko): the etag is weak as staleness metrics are
+            # changing with time while generation is the same.
+            self.etag = f'W/"{self.instance_id}-{generation}"'
+
+    def get(self, gzip=False):
+        """Get etag and exposition of snapshot with current metrics
+
+        :param gzip: return gzip encoded exposition.
+        :returns: tuple with etag and exposition bytes
+        """
+        self.update()
+        with self.lock:
+            etag = self.etag
+            body = self.gzip_body if gzip else self.body
+            compressor = self.gzip_compressor.copy() if gzip else None
+        current = exposition.generate_latest(
+            MetricsView(self.collector.collect_staleness)
+        )
+        if gzip:
+            current = compressor.compress(current) + compressor.flush()
+        return etag, body + current
+
+
+def make_wsgi_app(collector, registry):
+    """Get wsgi app serving cached exposition of collector
+
+    Requests for OpenMetrics format or with query parameters are passed
+    to prometheus_client wsgi app.
+    """
+    fallback_app = prometheus_client.make_wsgi_app(registry)
+    cache = ExpositionCache(collector)
+
+    def app(environ, start_response):
+        if (
+            environ.get("PATH_INFO") == "/favicon.ico"
+            or environ.get("QUERY_STRING")
+            or "application/openmetrics-text" in environ.get("HTTP_ACCEPT", "")
+        ):
+            return fallback_app(environ, start_response)
+
+        headers = [
+            ("Content-Type", exposition.CONTENT_TYPE_LATEST),
+            ("Vary", "Accept-Encoding"),
+        ]
+        if not collector.is_ready():
+            start_response("200 OK", headers)
+            return [b""]
+
+        gzip = "gzip" in environ.get("HTTP_ACCEPT_ENCODING", "")
+        etag, body = cache.get(gzip=gzip)
+        headers.append(("ETag", etag))
+        if etag in [
+            tag.strip()
+            for tag in environ.get("HTTP_IF_NONE_MATCH", "").split(",")
+        ]:
+            start_response("304 Not Modified", headers)
+            return [b""]
+        if gzip:
+            headers.append(("Content-Encoding", "gzip"))
+        start_response("200 OK", headers)
+        return [body]
+
+    return app
+
+
 def main():
     # Unregister default metrics controller
     REGISTRY.unregister(prometheus_client.GC_COLLECTOR)
@@ -32,5 +142,5 @@ def main():
     osdpl_collector = collectors.OsdplMetricsCollector()
 
     REGISTRY.register(osdpl_collector)
-    app = prometheus_client.make_wsgi_app(REGISTRY)
+    app = make_wsgi_app(osdpl_collector, REGISTRY)
     return app
@@ -0,0 +1,127 @@
+#    Copyright 2024 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import contextvars
+import functools
+import re
+import threading
+import time
+import urllib.parse
+
+import prometheus_client
+
+from openstack_controller import utils
+
+
+# NOTE(vsaienko): metrics about exporter itself, exposed together with
+# collectors metrics.
+REGISTRY = prometheus_client.CollectorRegistry()
+
+# The name of collector the code is running for.
+COLLECTOR = contextvars.ContextVar("osdpl_collector", default="unknown")
+
+# Bytes of API responses received by collector during refresh.
+RESPONSE_BYTES = contextvars.ContextVar("osdpl_response_bytes", default=None)
+
+API_REQUEST_DURATION = prometheus_client.Histogram(
+    "osdpl_exporter_api_request_duration_seconds",
+    "Duration of requests to OpenStack APIs made by collectors",
+    ["collector", "service_type", "url"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float("inf")),
+    registry=REGISTRY,
+)
+
+STEP_DURATION = prometheus_client.Gauge(
+    "osdpl_exporter_collector_step_duration_seconds",
+    "Duration of collector refresh step during last run",
+    ["collector", "step"],
+    registry=REGISTRY,
+)
+
+URL_ID_SEGMENT = re.compile(
+    r"^([0-9a-f]{32}|[0-9a-f]{8}(-[0-9a-f]{4}){3}-[0-9a-f]{12}|\d+)$"
+)
+
+
+def get_url_template(url):
+    """Get URL path with ids replaced by placeholder
+
+    https://nova/v2.1/servers/<uuid>/os-interface -> /v2.1/servers/{id}/os-interface
+    """
+    path = urllib.parse.urlsplit(url).path
+    return "/".join(
+        "{id}" if URL_ID_SEGMENT.match(part) else part
+        for part in path.split("/")
+    )
+
+
+class ResponseBytes:
+    """Thread safe counter of API responses bytes"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.value = 0
+
+    def add(self, value):
+        with self.lock:
+            self.value += value
+
+
+def observe_step(step, duration):
+    STEP_DURATION.labels(COLLECTOR.get(), step).set(duration)
+
+
+def instrument_session(session, get_service_type):
+    """Account requests sent with requests session
+
+    Duration includes downloading of response body, unless response is
+    streamed.
+
+    :param session: the requests.Session object.
+    :param get_service_type: function to get service type by url.
+    """
+    send = session.send
+
+    @functools.wraps(send)
+    def _send(request, **kwargs):
+        start = time.perf_counter()
+        response = send(request, **kwargs)
+        API_REQUEST_DURATION.labels(
+            COLLECTOR.get(),
+            get_service_type(request.url),
+            get_url_template(request.url),
+        ).observe(time.perf_counter() - start)
+        return response
+
+    session.send = _send
+    return count_response_bytes(session)
+
+
+def count_response_bytes(session):
+    """Account bytes of responses received with session by collector
+
+    :param session: the requests.Session object.
+    """
+
+    def _response_hook(response, *args, **kwargs):
+        counter = RESPONSE_BYTES.get()
+        # NOTE(vsaienko): do not consume content of streamed responses.
+        if counter is not None and not kwargs.get("stream"):
+            counter.add(len(response.content))
+
+    session.hooks["response"].append(_response_hook)
+    return session
+
+
+utils.TIMEIT_OBSERVERS.append(observe_step)
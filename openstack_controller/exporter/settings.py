@@ -30,6 +30,65 @@ OSCTL_EXPORTER_MAX_POLL_TIMEOUT = int(
     os.getenv("OSCTL_EXPORTER_MAX_POLL_TIMEOUT", "900")
 )
 
-# Number of seconds we can wait for polling tasks before return cached result
-# Should be lover than prometheus scrape_timeout which is 1m by default.
-OSCTL_SCRAPE_TIMEOUT = int(os.getenv("OSCTL_SCRAPE_TIMEOUT", "45"))
+# Number of seconds between data refreshes of collector. Collectors are
+# refreshed in background, scrapes return the latest collected data.
+OSCTL_EXPORTER_REFRESH_INTERVAL = int(
+    os.getenv("OSCTL_EXPORTER_REFRESH_INTERVAL", "60")
+)
+
+# Refresh intervals per collector in format <collector>:<seconds>,...
+# For example: osdpl_nova:300,osdpl_certificate:3600
+OSCTL_EXPORTER_REFRESH_INTERVALS = {
+    name: int(interval)
+    for name, interval in (
+        item.split(":")
+        for item in os.getenv("OSCTL_EXPORTER_REFRESH_INTERVALS", "").split(
+            ","
+        )
+        if item
+    )
+}
+
+# Fraction of refresh interval to randomly shift refreshes by, to not
+# start all collectors at the same time.
+OSCTL_EXPORTER_REFRESH_JITTER = float(
+    os.getenv("OSCTL_EXPORTER_REFRESH_JITTER", "0.1")
+)
+
+# Number of parallel requests to placement API during hypervisors
+# metrics collection.
+OSCTL_EXPORTER_PLACEMENT_WORKERS = int(
+    os.getenv("OSCTL_EXPORTER_PLACEMENT_WORKERS", "10")
+)
+
+# Number of seconds between full resyncs of instances in Nova collector,
+# in between only changed instances are requested.
+OSCTL_EXPORTER_NOVA_INSTANCES_RESYNC_INTERVAL = int(
+    os.getenv("OSCTL_EXPORTER_NOVA_INSTANCES_RESYNC_INTERVAL", "3600")
+)
+
+# Page size to list OpenStack resources with in collectors, should not
+# exceed maximum page size allowed by services.
+OSCTL_EXPORTER_LIST_LIMIT = int(os.getenv("OSCTL_EXPORTER_LIST_LIMIT", "1000"))
+
+# Maximum number of HTTP connections kept to each OpenStack endpoint by
+# client shared between collectors.
+OSCTL_EXPORTER_OPENSTACK_POOL_SIZE = int(
+    os.getenv("OSCTL_EXPORTER_OPENSTACK_POOL_SIZE", "32")
+)
+
+# Number of seconds to cache service types from Keystone catalog for.
+OSCTL_EXPORTER_CATALOG_TTL = int(
+    os.getenv("OSCTL_EXPORTER_CATALOG_TTL", "600")
+)
+
+# Number of API endpoints probed in parallel by API collector.
+OSCTL_EXPORTER_API_PROBE_WORKERS = int(
+    os.getenv("OSCTL_EXPORTER_API_PROBE_WORKERS", "10")
+)
+
+# Total number of exporter shards and index of this shard. Collectors
+# are split between shards, hosts of Nova and Ironic collectors are split
+# between shards as well.
+OSCTL_EXPORTER_SHARDS = int(os.getenv("OSCTL_EXPORTER_SHARDS", "1"))
+OSCTL_EXPORTER_SHARD_INDEX = int(os.getenv("OSCTL_EXPORTER_SHARD_INDEX", "0"))
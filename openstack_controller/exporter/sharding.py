@@ -0,0 +1,46 @@
+#    Copyright 2024 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import hashlib
+
+from openstack_controller.exporter import settings
+
+
+def get_shard(key, shards):
+    """Get index of shard the key belongs to
+
+    Uses rendezvous hashing, so when number of shards is changed
+    only keys of added or removed shards are moved.
+
+    :param key: the string to get shard for.
+    :param shards: the total number of shards.
+    """
+    return max(
+        range(shards),
+        key=lambda shard: hashlib.sha256(f"{shard}:{key}".encode()).digest(),
+    )
+
+
+def is_sharded():
+    return settings.OSCTL_EXPORTER_SHARDS > 1
+
+
+def is_local(key):
+    """Check if key belongs to shard of this exporter"""
+    if not is_sharded():
+        return True
+    return (
+        get_shard(key, settings.OSCTL_EXPORTER_SHARDS)
+        == settings.OSCTL_EXPORTER_SHARD_INDEX
+    )
@@ -1,3 +1,6 @@
+from openstack_controller.filters.tempest.base_section import (
+    get_charts_values,
+)
 from openstack_controller.filters.tempest.conf import SECTIONS
 from openstack_controller import utils
 
@@ -5,9 +8,12 @@ from openstack_controller import utils
 @utils.log_exception_and_raise
 def generate_tempest_config(spec, helmbundle_spec):
     config = {}
+    # NOTE(vsaienko): index is shared by all sections to not scan
+    # helmbundles on every option lookup.
+    charts_values = get_charts_values(helmbundle_spec)
 
     for ts in SECTIONS:
-        ts_inst = ts(spec, helmbundle_spec)
+        ts_inst = ts(spec, helmbundle_spec, charts_values)
         if not ts_inst.enabled:
             continue
         config[ts_inst.name] = {}
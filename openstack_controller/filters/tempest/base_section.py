@@ -1,15 +1,32 @@
 import abc
 import operator
-from jsonpath_ng import parse
 
 from openstack_controller import constants
+from openstack_controller import utils
+
+
+def get_charts_values(helmbundles_body):
+    """Get index of release values by chart name
+
+    When chart is present in multiple releases the first one is used.
+    """
+    charts_values = {}
+    for component_name, component in helmbundles_body.items():
+        for release in component.get("spec", {}).get("releases", []):
+            charts_values.setdefault(
+                release["chart"], release.get("values", {})
+            )
+    return charts_values
 
 
 class BaseSection(object):
-    def __init__(self, spec, helmbundles_body):
+    def __init__(self, spec, helmbundles_body, charts_values=None):
         super(BaseSection, self).__init__()
         self.spec = spec
         self.helmbundles_body = helmbundles_body
+        if charts_values is None:
+            charts_values = get_charts_values(helmbundles_body)
+        self.charts_values = charts_values
 
     @abc.abstractproperty
     def name(self):
@@ -37,20 +54,18 @@ class BaseSection(object):
             pass
 
     def get_values_item(self, service_name, item_path, item_default=None):
-        for component_name, component in self.helmbundles_body.items():
-            for release in component.get("spec", {}).get("releases", []):
-                chart_name = release["chart"]
-                if chart_name == service_name:
-                    res = parse(item_path).find(release["values"])
-                    if res:
-                        return res[0].value
-                    else:
-                        return item_default
+        if service_name not in self.charts_values:
+            return
+        res = utils.jsonpath_find(item_path, self.charts_values[service_name])
+        if res:
+            return res[0]
+        else:
+            return item_default
 
     def get_spec_item(self, item_path, item_default=None):
-        res = parse(item_path).find(self.spec)
+        res = utils.jsonpath_find(item_path, self.spec)
         if res:
-            return res[0].value
+            return res[0]
         else:
             return item_default
 
@@ -69,12 +84,7 @@ class BaseSection(object):
         :param service:
         :param pillars:
         """
-        for component_name, component in self.helmbundles_body.items():
-            for release in component.get("spec", {}).get("releases", []):
-                chart_name = release["chart"]
-                if chart_name == service:
-                    return True
-        return False
+        return service in self.charts_values
 
     def os_version_compare(self, version, expression):
         """Compare OpenStack versions based on expression
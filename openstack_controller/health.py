@@ -5,6 +5,7 @@ import kopf
 
 from openstack_controller.services import base
 from openstack_controller import constants
+from openstack_controller import kube
 from openstack_controller import settings
 from openstack_controller import layers
 
@@ -54,7 +55,10 @@ def set_multi_application_health(osdplst, patch):
 
 def is_application_ready(application, osdplst):
     osdplst.reload()
+    return _is_application_ready(application, osdplst)
 
+
+def _is_application_ready(application, osdplst):
     app_status = (
         osdplst.obj.get("status", {}).get("health", {}).get(application)
     )
@@ -85,11 +89,12 @@ def is_application_ready(application, osdplst):
 
 async def _wait_application_ready(application, osdplst, delay=None):
     delay = delay or CONF.getint("osctl", "wait_application_ready_delay")
-    i = 1
-    while not is_application_ready(application, osdplst):
-        LOG.info(f"Checking application {application} health, attempt: {i}")
-        i += 1
-        await asyncio.sleep(delay)
+    await kube.wait_for(
+        osdplst,
+        lambda obj: obj is not None
+        and _is_application_ready(application, obj),
+        resync=delay,
+    )
 
 
 async def wait_application_ready(
@@ -5,8 +5,10 @@ from datetime import datetime
 import os
 import re
 import yaml
+import tarfile
 import tempfile
 import threading
+import time
 from asyncio.subprocess import PIPE
 
 import kopf
@@ -15,6 +17,7 @@ from openstack_controller import utils
 from openstack_controller import constants
 from openstack_controller import exception
 from openstack_controller import kube
+from openstack_controller import metrics
 from openstack_controller import settings
 
 LOG = utils.get_logger(__name__)
@@ -67,6 +70,101 @@ def helm_retry(func):
     return wrapper
 
 
+class RepositoryCache:
+    """Size and age bounded helm repository cache
+
+    Files are checked for integrity once after they are changed, the
+    corrupted files and files older than max_age are removed. When the
+    cache is bigger than max_size least recently used files are evicted.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        # Files checked for integrity, path -> (size, mtime)
+        self.checked = {}
+
+    def _is_valid(self, path):
+        try:
+            if os.path.getsize(path) == 0:
+                return False
+            if path.endswith((".yaml", ".yml")):
+                with open(path) as f:
+                    yaml.safe_load(f)
+            elif path.endswith(".tgz"):
+                with tarfile.open(path, "r:gz") as tar:
+                    tar.getmembers()
+        except Exception as e:
+            LOG.warning(f"Helm cache file {path} is corrupted: {e}")
+            return False
+        return True
+
+    def _remove(self, path, reason):
+        LOG.info(f"Removing helm cache file {path}, reason: {reason}")
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        self.checked.pop(path, None)
+        metrics.HELM_CACHE_EVICTIONS.labels(reason).inc()
+
+    def cleanup(self, max_size, max_age):
+        """Remove expired, corrupted and least recently used files
+
+        :param max_size: max size of the cache in bytes
+        :param max_age: max age of the file in seconds
+        """
+        now = time.time()
+        files = {}
+        for root, dirs, names in os.walk(self.path):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    files[path] = os.stat(path)
+                except FileNotFoundError:
+                    continue
+
+        hits = len(set(files).intersection(self.checked))
+        metrics.HELM_CACHE_FILES.labels("hit").inc(hits)
+        metrics.HELM_CACHE_FILES.labels("miss").inc(len(files) - hits)
+        for path in set(self.checked) - set(files):
+            self.checked.pop(path)
+
+        for path, stat in list(files.items()):
+            if now - stat.st_mtime > max_age:
+                self._remove(path, "age")
+                files.pop(path)
+                continue
+            signature = (stat.st_size, stat.st_mtime)
+            if self.checked.get(path) == signature:
+                continue
+            if not self._is_valid(path):
+                self._remove(path, "corrupted")
+                files.pop(path)
+                continue
+            self.checked[path] = signature
+
+        size = sum(stat.st_size for stat in files.values())
+        for path, stat in sorted(
+            files.items(), key=lambda x: max(x[1].st_atime, x[1].st_mtime)
+        ):
+            if size <= max_size:
+                break
+            self._remove(path, "size")
+            size -= stat.st_size
+        metrics.HELM_CACHE_SIZE.set(size)
+        return size
+
+
+REPOSITORY_CACHE = RepositoryCache(settings.HELM_REPOSITORY_CACHE)
+
+
+def cleanup_repository_cache():
+    REPOSITORY_CACHE.cleanup(
+        CONF.getint("helm_cache", "max_size") * 1024 * 1024,
+        CONF.getint("helm_cache", "max_age"),
+    )
+
+
 class HelmManager:
     def __init__(
         self,
@@ -153,6 +251,7 @@ class HelmManager:
             "Running helm command started: '%s'",
             cmd,
         )
+        start = time.monotonic()
         process = await asyncio.create_subprocess_exec(
             self.binary,
             *cmd,
@@ -164,6 +263,11 @@ class HelmManager:
         stdout, stderr = await process.communicate()
         stdout = stdout.decode()
         stderr = stderr.decode()
+        metrics.HELM_DURATION.labels(
+            release_name or "",
+            cmd[0],
+            "error" if process.returncode else "success",
+        ).observe(time.monotonic() - start)
 
         LOG.debug(
             "Helm command %s output is: stdout: %s, stderr: %s",
@@ -243,7 +347,7 @@ class HelmManager:
             "json",
             *args,
         ]
-        stdout, stderr = await self.run_cmd(cmd)
+        stdout, stderr = await self.run_cmd(cmd, release_name=name)
         return yaml.safe_load(stdout)
 
     async def set_release_values(self, name, values, chart, args=None):
@@ -306,7 +410,9 @@ class HelmManager:
         args = args or []
         cmd = ["delete", name, "--namespace", self.namespace, *args]
 
-        stdout, stderr = await self.run_cmd(cmd, raise_on_error=False)
+        stdout, stderr = await self.run_cmd(
+            cmd, raise_on_error=False, release_name=name
+        )
         if stderr and "Release not loaded" not in stderr:
             raise kopf.TemporaryError(f"Helm command failed: {stderr}")
 
@@ -1,23 +1,30 @@
 import abc
 import asyncio
 import base64
+import contextlib
+import copy
 from dataclasses import dataclass, field
 import inspect
 import json
+import math
 from os import urandom
+import socket
 import sys
+import threading
 from typing import List
 import functools
 from urllib.parse import urlencode
 
 import kopf
 import pykube
+import requests
 from typing import Dict
 
 from . import constants as const
 from . import settings
 from . import utils
 from . import layers
+from . import metrics
 from . import websocket_client
 from . import exception
 from . import osdplstatus
@@ -33,6 +40,7 @@ def kube_client():
     client = pykube.HTTPClient(
         config=config, timeout=settings.OSCTL_PYKUBE_HTTP_REQUEST_TIMEOUT
     )
+    metrics.instrument_session(client.session, "kubernetes")
     LOG.debug(f"Created k8s api client from context {config.current_context}")
     return client
 
@@ -112,17 +120,17 @@ class OpenStackDeployment(pykube.objects.NamespacedAPIObject):
             return False
         return True
 
-    async def _wait_applied(self, interval):
-        while not self.is_applied:
-            await asyncio.sleep(interval)
-
-    async def wait_applied(self, timeout=600, interval=30):
+    async def wait_applied(self, timeout=600, interval=None):
         LOG.info(
             f"Waiting {timeout} seconds {self.kind}/{self.name} status is applied"
         )
-        await asyncio.wait_for(
-            self._wait_applied(interval),
+        # NOTE(vsaienko): status of osdpl is updated after osdplst, so
+        # watch osdpl changes.
+        await wait_for(
+            self,
+            lambda osdpl: osdpl is not None and osdpl.is_applied,
             timeout=timeout,
+            resync=interval,
         )
         LOG.info(f"{self.kind}/{self.name} is applied")
 
@@ -373,16 +381,18 @@ class ObjectStatusMixin(abc.ABC):
 
     @property
     @abc.abstractmethod
-    def ready(self):
+    def is_ready(self):
+        """Check object is ready according to its current state"""
         pass
 
-    async def _wait_ready(self, interval):
-        while not self.ready:
-            await asyncio.sleep(interval)
-
-    async def wait_ready(self, timeout=None, interval=10):
+    async def wait_ready(self, timeout=None, interval=None):
         LOG.info(f"Waiting for {timeout} {self.kind}/{self.name} is ready")
-        await asyncio.wait_for(self._wait_ready(interval), timeout=timeout)
+        await wait_for(
+            self,
+            lambda obj: obj is not None and obj.is_ready,
+            timeout=timeout,
+            resync=interval,
+        )
         LOG.info(f"The {self.kind}/{self.name} is ready")
 
 
@@ -415,6 +425,10 @@ class StatefulSet(pykube.StatefulSet, HelmBundleMixin, ObjectStatusMixin):
     @property
     def ready(self):
         self.reload()
+        return self.is_ready
+
+    @property
+    def is_ready(self):
         return (
             self.obj["status"]["observedGeneration"]
             >= self.obj["metadata"]["generation"]
@@ -423,13 +437,18 @@ class StatefulSet(pykube.StatefulSet, HelmBundleMixin, ObjectStatusMixin):
         )
 
     async def wait_for_replicas(self, count, times=60, seconds=10):
-        for i in range(times):
-            self.reload()
+        def _replicas_ready(obj):
             # NOTE(vsaienko): the key doesn't exist when have 0 replicas
-            if self.obj["status"].get("readyReplicas", 0) == count:
-                return True
-            await asyncio.sleep(seconds)
-        raise ValueError("Not ready yet.")
+            return (
+                obj is not None
+                and obj.obj.get("status", {}).get("readyReplicas", 0) == count
+            )
+
+        try:
+            await wait_for(self, _replicas_ready, timeout=times * seconds)
+        except asyncio.TimeoutError:
+            raise ValueError("Not ready yet.")
+        return True
 
     @property
     def pods(self):
@@ -515,6 +534,10 @@ class Job(pykube.Job, HelmBundleMixin, ObjectStatusMixin):
     @property
     def ready(self):
         self.reload()
+        return self.is_ready
+
+    @property
+    def is_ready(self):
         conditions = self.obj.get("status", {}).get("conditions", [])
         # TODO(vsaienko): there is no official documentation that describes when job is considered complete.
         # revisit this place in future.
@@ -699,7 +722,7 @@ class CronJob(pykube.CronJob, HelmBundleMixin):
             timeout=timeout,
         )
 
-    async def run(self, wait_completion=False, timeout=600, delay=10):
+    async def run(self, wait_completion=False, timeout=600, delay=None):
         """Force run job from cronjob.
 
         :returns : the job object
@@ -713,14 +736,12 @@ class CronJob(pykube.CronJob, HelmBundleMixin):
         kube_job = Job(kube_api, job)
         kube_job.create()
 
-        async def _wait_completion(job, delay):
-            while not job.ready:
-                await asyncio.sleep(delay)
-
         if wait_completion:
-            await asyncio.wait_for(
-                _wait_completion(kube_job, delay=delay),
+            await wait_for(
+                kube_job,
+                lambda job: job is not None and job.is_ready,
                 timeout=timeout,
+                resync=delay,
             )
         return kube_job
 
@@ -729,6 +750,10 @@ class Deployment(pykube.Deployment, HelmBundleMixin, ObjectStatusMixin):
     @property
     def ready(self):
         self.reload()
+        return self.is_ready
+
+    @property
+    def is_ready(self):
         return (
             self.obj["status"]["observedGeneration"]
             >= self.obj["metadata"]["generation"]
@@ -737,13 +762,18 @@ class Deployment(pykube.Deployment, HelmBundleMixin, ObjectStatusMixin):
         )
 
     async def wait_for_replicas(self, count, times=60, seconds=10):
-        for i in range(times):
-            self.reload()
+        def _replicas_ready(obj):
             # NOTE(vsaienko): the key doesn't exist when have 0 replicas
-            if self.obj["status"].get("readyReplicas", 0) == count:
-                return True
-            await asyncio.sleep(seconds)
-        raise ValueError("Not ready yet.")
+            return (
+                obj is not None
+                and obj.obj.get("status", {}).get("readyReplicas", 0) == count
+            )
+
+        try:
+            await wait_for(self, _replicas_ready, timeout=times * seconds)
+        except asyncio.TimeoutError:
+            raise ValueError("Not ready yet.")
+        return True
 
 
 class DaemonSet(pykube.DaemonSet, HelmBundleMixin, ObjectStatusMixin):
@@ -755,6 +785,10 @@ class DaemonSet(pykube.DaemonSet, HelmBundleMixin, ObjectStatusMixin):
     @property
     def ready(self):
         self.reload()
+        return self.is_ready
+
+    @property
+    def is_ready(self):
         if (
             self.obj["status"]["observedGeneration"]
             < self.obj["metadata"]["generation"]
@@ -773,20 +807,42 @@ class DaemonSet(pykube.DaemonSet, HelmBundleMixin, ObjectStatusMixin):
         else:
             return ready == self.obj["status"].get("updatedNumberScheduled", 0)
 
+    @property
+    def pod_selector(self):
+        pod_labels = self.obj["spec"]["selector"].get("matchLabels", {})
+        return {f"{k}__in": [v] for k, v in pod_labels.items()}
+
     @property
     def pods(self):
         self.reload()
-        pod_labels = self.obj["spec"]["selector"].get("matchLabels", {})
-        selector = {f"{k}__in": [v] for k, v in pod_labels.items()}
         pods_query = resource_list(
-            Pod, selector=selector, namespace=self.namespace
+            Pod, selector=self.pod_selector, namespace=self.namespace
         )
         pods = [x for x in pods_query if x.is_owned_by(self.uid)]
         return pods
 
+    @property
+    def pods_by_node(self):
+        """Index of daemonset pods by node name"""
+        return {
+            pod.obj["spec"]["nodeName"]: pod
+            for pod in self.pods
+            if pod.obj["spec"].get("nodeName")
+        }
+
     def get_pod_on_node(self, node_name):
-        for pod in self.pods:
-            if pod.obj["spec"].get("nodeName") == node_name:
+        """Get daemonset pod on the node
+
+        Only pods on the node are requested from API with field selector.
+        """
+        kube_api = kube_client()
+        pods = Pod.objects(kube_api).filter(
+            namespace=self.namespace,
+            selector=self.pod_selector,
+            field_selector={"spec.nodeName": node_name},
+        )
+        for pod in pods:
+            if pod.is_owned_by(self.uid):
                 return pod
 
     async def ensure_pod_generation_on_node(self, node_name, wait_ready=True):
@@ -797,6 +853,7 @@ class DaemonSet(pykube.DaemonSet, HelmBundleMixin, ObjectStatusMixin):
         :param node_name: the name of the node
         :param wait_ready: boolean to wait for pod is ready after restart
         """
+        self.reload()
         pod = self.get_pod_on_node(node_name)
         if not pod:
             return
@@ -813,35 +870,33 @@ class DaemonSet(pykube.DaemonSet, HelmBundleMixin, ObjectStatusMixin):
 
     async def wait_pod_on_node(self, node_name):
         LOG.info(f"Waiting pods for {self.name} on {node_name} are ready.")
-        while True:
-            pod = self.get_pod_on_node(node_name)
-            if (
-                pod
-                and "deletionTimestamp" not in pod.obj["metadata"]
-                and pod.ready
-            ):
-                break
-            await asyncio.sleep(5)
+
+        def _pod_ready(pods):
+            for pod in pods:
+                if (
+                    pod.is_owned_by(self.uid)
+                    and "deletionTimestamp" not in pod.obj["metadata"]
+                    and pod.ready
+                ):
+                    return True
+            return False
+
+        await wait_for_objects(
+            Pod,
+            _pod_ready,
+            namespace=self.namespace,
+            selector=self.pod_selector,
+            field_selector={"spec.nodeName": node_name},
+        )
         LOG.info(f"Pods for {self.name} on {node_name} are ready.")
 
-    async def ensure_pod_generation(self):
-        """Ensure pod template generation matches ds generation"""
-        for pod in self.pods:
-            pod_generation = pod.generation
-            ds_generation = self.generation
-            if (
-                pod
-                and pod_generation
-                and ds_generation
-                and pod_generation != ds_generation
-            ):
-                LOG.info(
-                    f"Pod {pod.name} generation {pod_generation} does not match ds generation {ds_generation}. Restarting..."
-                )
-                pod_node = pod.obj["spec"].get("nodeName")
-                pod.delete()
-                if pod_node:
-                    await self.wait_pod_on_node(pod_node)
+    async def ensure_pod_generation(self, osdplst=None):
+        """Ensure pod template generation matches ds generation
+
+        :param osdplst: the OpenStackDeploymentStatus object to store
+                        rollout progress.
+        """
+        await DaemonSetRolloutEngine(self, osdplst=osdplst).run()
 
     @property
     def finalizers(self):
@@ -884,6 +939,168 @@ class DaemonSet(pykube.DaemonSet, HelmBundleMixin, ObjectStatusMixin):
         return generation
 
 
+class DaemonSetRolloutEngine:
+    """Restart outdated pods of DaemonSet in batches.
+
+    Pods which generation does not match DaemonSet generation are
+    restarted in batches of up to max_unavailable pods. Pods on nodes
+    with different value of topology_label are never restarted in the
+    same batch. The batch is started when number of unavailable pods of
+    DaemonSet allows it, and the next batch is started only when all pods
+    of previous batch are ready. Progress is stored in
+    OpenStackDeploymentStatus to resume rollout after restart.
+    """
+
+    def __init__(
+        self,
+        ds,
+        osdplst=None,
+        max_unavailable=None,
+        topology_label=None,
+        batch_timeout=None,
+    ):
+        self.ds = ds
+        self.osdplst = osdplst
+        self.max_unavailable = (
+            max_unavailable
+            if max_unavailable is not None
+            else CONF.get("daemonset_rollout", "max_unavailable")
+        )
+        self.topology_label = (
+            topology_label
+            if topology_label is not None
+            else CONF.get("daemonset_rollout", "topology_label")
+        )
+        self.batch_timeout = (
+            batch_timeout
+            if batch_timeout is not None
+            else CONF.getint("daemonset_rollout", "batch_timeout")
+        )
+        self.generation = None
+
+    def get_max_unavailable(self, desired):
+        """Get absolute max unavailable pods number
+
+        :param desired: the number of desired pods of DaemonSet
+        """
+        value = str(self.max_unavailable).strip()
+        if value.endswith("%"):
+            return max(math.ceil(desired * int(value[:-1]) / 100), 1)
+        return max(int(value), 1)
+
+    def _get_outdated_pods(self):
+        return {
+            node_name: pod
+            for node_name, pod in self.ds.pods_by_node.items()
+            if pod.generation
+            and self.generation
+            and pod.generation != self.generation
+        }
+
+    def _get_nodes_topology(self, node_names):
+        kube_api = kube_client()
+        return {
+            node.name: node.labels.get(self.topology_label, "")
+            for node in Node.objects(kube_api)
+            if node.name in node_names
+        }
+
+    def _save_progress(self, state, updated, total, batch):
+        if self.osdplst is None:
+            return
+        self.osdplst.set_daemonset_rollout(
+            self.ds.name,
+            {
+                "generation": self.generation,
+                "state": state,
+                "updated": updated,
+                "total": total,
+                "batch": batch,
+            },
+        )
+
+    async def _wait_batch(self, nodes):
+        await asyncio.wait_for(
+            asyncio.gather(*[self.ds.wait_pod_on_node(n) for n in nodes]),
+            timeout=self.batch_timeout,
+        )
+
+    async def _get_batch_size(self, max_unavailable):
+        def _unavailable(ds):
+            return ds.obj.get("status", {}).get("numberUnavailable", 0)
+
+        try:
+            ds = await wait_for(
+                self.ds,
+                lambda ds: ds is not None
+                and _unavailable(ds) < max_unavailable,
+                timeout=self.batch_timeout,
+            )
+        except asyncio.TimeoutError:
+            LOG.error(
+                f"DaemonSet {self.ds.name} still has too many unavailable pods, stopping rollout."
+            )
+            raise
+        return max_unavailable - _unavailable(ds)
+
+    async def run(self):
+        self.generation = self.ds.generation
+        if self.osdplst is not None:
+            progress = self.osdplst.get_daemonset_rollout(self.ds.name)
+            if (
+                progress.get("state") == osdplstatus.APPLYING
+                and progress.get("generation") == self.generation
+                and progress.get("batch")
+            ):
+                LOG.info(
+                    f"Resuming rollout of {self.ds.name}, waiting for pods on nodes {progress['batch']}"
+                )
+                await self._wait_batch(progress["batch"])
+
+        outdated = self._get_outdated_pods()
+        if not outdated:
+            return
+        total = self.ds.obj.get("status", {}).get(
+            "desiredNumberScheduled"
+        ) or len(outdated)
+        max_unavailable = self.get_max_unavailable(total)
+        topology = self._get_nodes_topology(outdated)
+        queue = sorted(outdated, key=lambda n: (topology.get(n, ""), n))
+        updated = total - len(queue)
+        LOG.info(
+            f"Restarting {len(queue)} pods of {self.ds.name} with generation other than {self.generation}, max unavailable {max_unavailable}."
+        )
+        while queue:
+            try:
+                batch_size = await self._get_batch_size(max_unavailable)
+            except asyncio.TimeoutError:
+                self._save_progress(osdplstatus.FAILED, updated, total, [])
+                raise
+            domain = topology.get(queue[0], "")
+            batch = []
+            while (
+                queue
+                and len(batch) < batch_size
+                and topology.get(queue[0], "") == domain
+            ):
+                batch.append(queue.pop(0))
+            self._save_progress(osdplstatus.APPLYING, updated, total, batch)
+            LOG.info(f"Restarting pods of {self.ds.name} on nodes {batch}")
+            for node_name in batch:
+                outdated[node_name].delete()
+            try:
+                await self._wait_batch(batch)
+            except asyncio.TimeoutError:
+                LOG.error(
+                    f"Timed out waiting pods of {self.ds.name} on nodes {batch} are ready, stopping rollout."
+                )
+                self._save_progress(osdplstatus.FAILED, updated, total, batch)
+                raise
+            updated += len(batch)
+        self._save_progress(osdplstatus.APPLIED, updated, total, [])
+        LOG.info(f"All pods of {self.ds.name} are restarted.")
+
+
 class Pod(pykube.Pod):
     # NOTE(vsaienko): override delete method unless client accepts grace_period parameter
     def delete(
@@ -1060,6 +1277,10 @@ class Node(pykube.Node, ObjectStatusMixin):
         Return whether the given pykube Node has "Ready" status
         """
         self.reload()
+        return self.is_ready
+
+    @property
+    def is_ready(self):
         for condition in self.obj.get("status", {}).get("conditions", []):
             if condition["type"] == "Ready" and condition["status"] == "True":
                 return True
@@ -1201,6 +1422,31 @@ def resource_list(klass, selector, namespace=None):
     )
 
 
+def resource_list_metadata(klass, namespace=None, selector=None):
+    """Get metadata of resources with single LIST request
+
+    API server returns only objects metadata, so resourceVersion of
+    large objects like secrets may be checked without fetching them.
+
+    :returns: dictionary with resource name and its metadata.
+    """
+    kube_api = kube_client()
+    response = (
+        klass.objects(kube_api)
+        .filter(namespace=namespace, selector=selector)
+        .execute(
+            headers={
+                "Accept": "application/json;as=PartialObjectMetadataList;"
+                "g=meta.k8s.io;v=v1,application/json"
+            }
+        )
+    )
+    return {
+        item["metadata"]["name"]: item["metadata"]
+        for item in response.json()["items"]
+    }
+
+
 def wait_for_resource(klass, name, namespace=None, delay=60):
     try:
         find(klass, name, namespace)
@@ -1261,16 +1507,232 @@ def save_secret_data(
         pykube.Secret(kube_api, secret).update()
 
 
+def _close_stream(response):
+    """Close streaming response read in other thread
+
+    Closing the response does not interrupt blocked read, so shut down
+    its socket first.
+    """
+    with contextlib.suppress(Exception):
+        response.raw._fp.fp.raw._sock.shutdown(socket.SHUT_RDWR)
+    with contextlib.suppress(Exception):
+        response.close()
+
+
+def _watch_until(
+    api, klass, namespace, params, predicate, stop, resync, streams=None
+):
+    """Track objects state with list and watch until predicate is true.
+
+    The objects are listed first, then changes are received with watch
+    starting from resourceVersion of the list. Watch is restarted with
+    new list every resync seconds or when failed.
+
+    Is run in separate thread as pykube client is synchronous.
+
+    :param predicate: callable that accepts dictionary with objects bodies
+                      by name and returns True when waiting is done.
+    :param stop: threading.Event to interrupt waiting.
+    :param streams: set to keep active watch response in, to close it
+                    when waiting is interrupted.
+    :returns: dictionary with objects bodies by name.
+    """
+    streams = streams if streams is not None else set()
+    kwargs = {"version": klass.version}
+    if klass.base:
+        kwargs["base"] = klass.base
+    if namespace is not None:
+        kwargs["namespace"] = namespace
+    url = klass.endpoint
+    while not stop.is_set():
+        try:
+            r = api.get(url=f"{url}?{urlencode(params)}", **kwargs)
+            api.raise_for_status(r)
+            body = r.json()
+            objects = {
+                item["metadata"]["name"]: item
+                for item in body.get("items") or []
+            }
+            if predicate(objects):
+                return objects
+            watch_params = {
+                **params,
+                "watch": "true",
+                "allowWatchBookmarks": "true",
+                "resourceVersion": body["metadata"]["resourceVersion"],
+                "timeoutSeconds": resync,
+            }
+            r = api.get(
+                url=f"{url}?{urlencode(watch_params)}",
+                stream=True,
+                timeout=resync + 10,
+                **kwargs,
+            )
+            api.raise_for_status(r)
+            streams.add(r)
+            with contextlib.closing(r):
+                if stop.is_set():
+                    return objects
+                for line in r.iter_lines():
+                    if stop.is_set():
+                        return objects
+                    event = json.loads(line.decode("utf-8"))
+                    # NOTE(vsaienko): ERROR events are sent when
+                    # resourceVersion is too old, relist objects.
+                    if event["type"] == "ERROR":
+                        LOG.debug(f"Got error event {event['object']}")
+                        break
+                    name = event["object"]["metadata"]["name"]
+                    if event["type"] == "DELETED":
+                        objects.pop(name, None)
+                    elif event["type"] in ["ADDED", "MODIFIED"]:
+                        objects[name] = event["object"]
+                    else:
+                        continue
+                    if predicate(objects):
+                        return objects
+        except (
+            requests.exceptions.RequestException,
+            pykube.exceptions.HTTPError,
+        ) as e:
+            if stop.is_set():
+                return None
+            LOG.warning(f"Failed to watch {klass.kind}, restarting. {e}")
+            stop.wait(1)
+        finally:
+            streams.clear()
+
+
+async def _wait_for_objects(
+    api, klass, namespace, params, predicate, timeout=None, resync=None
+):
+    resync = resync or settings.OSCTL_WATCH_RESYNC_INTERVAL
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    stop = threading.Event()
+    streams = set()
+
+    def _set_result(result, error):
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def _run():
+        result, error = None, None
+        try:
+            result = _watch_until(
+                api, klass, namespace, params, predicate, stop, resync, streams
+            )
+        except Exception as e:
+            error = e
+        if not stop.is_set():
+            with contextlib.suppress(RuntimeError):
+                loop.call_soon_threadsafe(_set_result, result, error)
+
+    threading.Thread(target=_run, daemon=True).start()
+    try:
+        return await asyncio.wait_for(future, timeout=timeout)
+    finally:
+        stop.set()
+        # NOTE(vsaienko): do not leave the thread blocked on watch
+        # until next event or watch timeout.
+        for stream in list(streams):
+            _close_stream(stream)
+
+
+async def wait_for(obj, predicate, timeout=None, resync=None):
+    """Wait for kubernetes object state matches predicate.
+
+    The object state is tracked with kubernetes watch API instead of
+    periodic polling, predicate is checked on every object change.
+
+    :param obj: the pykube object to wait for.
+    :param predicate: callable that accepts the copy of object with
+                      actual state or None when object does not exist.
+                      Should not reload the object.
+    :param timeout: the number of seconds to wait, None to wait forever.
+    :param resync: the number of seconds to restart watch with full
+                   relisting of object.
+
+    :raises asyncio.TimeoutError: when timeout is reached.
+    :returns: the copy of object with actual state or None.
+    """
+
+    def _get_obj(objects):
+        if obj.name not in objects:
+            return None
+        actual = copy.copy(obj)
+        actual.set_obj(objects[obj.name])
+        return actual
+
+    objects = await _wait_for_objects(
+        obj.api,
+        obj.__class__,
+        obj.namespace,
+        {"fieldSelector": f"metadata.name={obj.name}"},
+        lambda objects: predicate(_get_obj(objects)),
+        timeout=timeout,
+        resync=resync,
+    )
+    return _get_obj(objects)
+
+
+async def wait_for_objects(
+    klass,
+    predicate,
+    namespace=None,
+    selector=None,
+    field_selector=None,
+    timeout=None,
+    resync=None,
+):
+    """Wait for kubernetes objects state matches predicate.
+
+    The same as wait_for but tracks all objects matching selectors.
+
+    :param predicate: callable that accepts list of objects with actual
+                      state.
+    :param selector: labels selector in pykube format.
+    :param field_selector: fields selector in pykube format.
+
+    :raises asyncio.TimeoutError: when timeout is reached.
+    :returns: the list of objects with actual state.
+    """
+    kube_api = kube_client()
+    params = {}
+    if selector:
+        params["labelSelector"] = pykube.query.as_selector(selector)
+    if field_selector:
+        params["fieldSelector"] = pykube.query.as_selector(field_selector)
+
+    def _get_objs(objects):
+        return [klass(kube_api, obj) for obj in objects.values()]
+
+    objects = await _wait_for_objects(
+        kube_api,
+        klass,
+        namespace,
+        params,
+        lambda objects: predicate(_get_objs(objects)),
+        timeout=timeout,
+        resync=resync,
+    )
+    return _get_objs(objects)
+
+
 async def wait_for_deleted(
     obj,
     times=settings.OSCTL_RESOURCE_DELETED_WAIT_RETRIES,
     seconds=settings.OSCTL_RESOURCE_DELETED_WAIT_TIMEOUT,
 ):
-    for i in range(times):
-        if not obj.exists():
-            return True
-        await asyncio.sleep(seconds)
-    return False
+    try:
+        await wait_for(obj, lambda actual: actual is None, times * seconds)
+    except asyncio.TimeoutError:
+        return False
+    return True
 
 
 def get_osdpl(namespace=settings.OSCTL_OS_DEPLOYMENT_NAMESPACE):
@@ -1,6 +1,9 @@
+import asyncio
+import copy
 import datetime
 import logging
 import threading
+import time
 
 import enum
 import json
@@ -180,6 +183,19 @@ class LockBase(pykube.objects.APIObject):
     def unset_error_message(self):
         self.patch({"status": {"errorMessage": None}}, subresource="status")
 
+    def set_inactivation_progress(self, percentage, description):
+        self.patch(
+            {
+                "status": {
+                    "inactivationProgress": {
+                        "percentage": min(max(int(percentage), 0), 100),
+                        "description": description,
+                    }
+                }
+            },
+            subresource="status",
+        )
+
 
 class ClusterWorkloadLock(LockBase):
     endpoint = "clusterworkloadlocks"
@@ -238,16 +254,37 @@ class NodeWorkloadLock(LockBase):
             if o.obj["spec"]["controllerName"] == cls.workload
         ]
 
+    def set_inner_state(self, state):
+        super().set_inner_state(state)
+        # NOTE(vsaienko): update index right away, do not wait for watch
+        # event to avoid races between parallel nmr handlers.
+        LOCKS_INDEX.update_nwl(self.obj)
+
     def maintenance_locks(self):
-        locks = {role.value: [] for role in const.NodeRole}
-        for nwl in self.get_all():
-            if nwl.is_maintenance():
-                node = kube.safe_get_node(nwl.obj["spec"]["nodeName"])
-                if node.exists():
-                    for role in const.NodeRole:
-                        if node.has_role(role):
-                            locks[role.value].append(nwl)
-        return locks
+        return LOCKS_INDEX.maintenance_locks()
+
+    def set_hooks_durations(self, hook, durations):
+        """Store durations of services maintenance hooks
+
+        :param hook: the name of hook
+        :param durations: dictionary {service: seconds}
+        """
+        annotation = (
+            f"{NodeMaintenanceConfig.opts_prefix}/maintenance-hooks-durations"
+        )
+        current = json.loads(
+            self.obj["metadata"].get("annotations", {}).get(annotation, "{}")
+        )
+        current[hook] = durations
+        self.patch(
+            {
+                "metadata": {
+                    "annotations": {
+                        annotation: json.dumps(current, sort_keys=True)
+                    }
+                }
+            }
+        )
 
     def can_handle_nmr(self):
         """Check if we can handle more NodeMaintenanceRequests
@@ -289,6 +326,384 @@ class NodeWorkloadLock(LockBase):
             self.set_inner_state_active()
 
 
+# Terminal statuses of live migration in os-migrations API
+MIGRATION_STATUSES_COMPLETED = ["completed"]
+MIGRATION_STATUSES_FAILED = ["error", "failed", "cancelled"]
+
+
+class LiveMigrationEngine:
+    """Drain compute host by live migrating servers from it.
+
+    Keeps up to concurrency migrations in flight, each migration is tracked
+    via os-migrations API with a single listing per poll interval. Servers
+    are migrated from the biggest to the smallest one, so long migrations
+    do not tail the drain. Failed migrations are retried with exponential
+    backoff until number of attempts is exhausted.
+    """
+
+    # The number of seconds between checks of in flight migrations.
+    poll_interval = 5
+    # The number of seconds to wait for migration record appears in the API
+    # after live migration request was accepted.
+    record_timeout = 120
+    # The number of seconds to wait before first retry, doubled with
+    # every next attempt.
+    retry_backoff = 10
+    retry_backoff_max = 300
+
+    def __init__(self, os_client, host, nwl, concurrency=1, attempts=3):
+        self.os_client = os_client
+        self.host = host
+        self.nwl = nwl
+        self.concurrency = max(int(concurrency), 1)
+        self.attempts = max(int(attempts), 1)
+        # Servers waiting for migration ordered by size
+        self.queue = []
+        # server_id: {"server", "started", "seen"}
+        self.in_flight = {}
+        self.attempts_done = {}
+        self.retry_at = {}
+        self.completed = set()
+        self.abandoned = set()
+        # server_id: set of ids of migrations known for the server
+        self.migration_ids = {}
+        self.started_at = None
+        self.changes_since = None
+        self._last_progress = None
+
+    @staticmethod
+    def server_size(server):
+        flavor = server.flavor or {}
+        return (
+            flavor.get("ram") or 0,
+            flavor.get("disk") or 0,
+            flavor.get("vcpus") or 0,
+        )
+
+    @property
+    def total(self):
+        return (
+            len(self.queue)
+            + len(self.in_flight)
+            + len(self.completed)
+            + len(self.abandoned)
+        )
+
+    def _enqueue(self, servers):
+        known = (
+            {s.id for s in self.queue}
+            | set(self.in_flight)
+            | self.completed
+            | self.abandoned
+        )
+        added = [s for s in servers if s.id not in known]
+        self.queue.extend(added)
+        self.queue.sort(key=self.server_size, reverse=True)
+        return added
+
+    def _refresh_queue(self):
+        return self._enqueue(
+            self.os_client.compute_get_servers_valid_for_live_migration(
+                host=self.host
+            )
+        )
+
+    def _get_migrations(self):
+        migrations = {}
+        for migration in self.os_client.compute_get_migrations(
+            source_compute=self.host,
+            migration_type="live-migration",
+            changes_since=self.changes_since,
+        ):
+            migrations.setdefault(migration.server_id, []).append(migration)
+        return migrations
+
+    def _retry_or_abandon(self, server, reason):
+        attempts = self.attempts_done.get(server.id, 0)
+        if attempts >= self.attempts:
+            msg = f"Giving up migration of server {server.id} after {attempts} attempts: {reason}"
+            LOG.warning(msg)
+            self.nwl.set_error_message(msg)
+            self.abandoned.add(server.id)
+            return
+        delay = min(
+            self.retry_backoff * 2 ** (attempts - 1), self.retry_backoff_max
+        )
+        msg = f"Migration of server {server.id} failed: {reason}. Retrying in {delay} seconds."
+        LOG.warning(msg)
+        self.nwl.set_error_message(msg)
+        self.retry_at[server.id] = time.monotonic() + delay
+        self._enqueue([server])
+
+    def _update_in_flight(self):
+        migrations = self._get_migrations()
+        now = time.monotonic()
+        for server_id, attempt in list(self.in_flight.items()):
+            records = [
+                m
+                for m in migrations.get(server_id, [])
+                if m.id not in attempt["seen"]
+            ]
+            if not records:
+                if now - attempt["started"] > self.record_timeout:
+                    self.in_flight.pop(server_id)
+                    self._retry_or_abandon(
+                        attempt["server"], "migration record is not found"
+                    )
+                continue
+            migration = max(records, key=lambda m: m.id)
+            if migration.status in MIGRATION_STATUSES_COMPLETED:
+                LOG.info(f"Migration of server {server_id} is completed.")
+                self.in_flight.pop(server_id)
+                self.completed.add(server_id)
+            elif migration.status in MIGRATION_STATUSES_FAILED:
+                self.in_flight.pop(server_id)
+                self._retry_or_abandon(
+                    attempt["server"],
+                    f"migration {migration.id} is in {migration.status} status",
+                )
+        self._set_migration_ids(migrations)
+
+    def _set_migration_ids(self, migrations):
+        self.migration_ids = {
+            server_id: {m.id for m in records}
+            for server_id, records in migrations.items()
+        }
+
+    def _start_migrations(self):
+        now = time.monotonic()
+        for server in list(self.queue):
+            if len(self.in_flight) >= self.concurrency:
+                break
+            if self.retry_at.get(server.id, 0) > now:
+                continue
+            self.queue.remove(server)
+            self.attempts_done[server.id] = (
+                self.attempts_done.get(server.id, 0) + 1
+            )
+            LOG.info(
+                f"Starting migration for {server.id}, attempt {self.attempts_done[server.id]}"
+            )
+            try:
+                self.os_client.oc.compute.live_migrate_server(server)
+            except Exception as e:
+                self._retry_or_abandon(server, e)
+                continue
+            self.in_flight[server.id] = {
+                "server": server,
+                "started": now,
+                "seen": self.migration_ids.get(server.id, set()),
+            }
+
+    def _report_progress(self):
+        state = (
+            len(self.completed),
+            len(self.abandoned),
+            len(self.in_flight),
+            self.total,
+        )
+        if state == self._last_progress:
+            return
+        self._last_progress = state
+        completed, abandoned, in_flight, total = state
+        done = completed + abandoned
+        elapsed = time.monotonic() - self.started_at
+        description = f"Migrated {completed} of {total} servers, {in_flight} in progress, {abandoned} failed."
+        if completed and elapsed:
+            throughput = completed / elapsed
+            eta = int((total - done) / throughput)
+            description += f" Throughput {throughput * 60:.2f} servers/min, ETA {eta} seconds."
+        LOG.info(f"Host {self.host} drain progress: {description}")
+        self.nwl.set_inactivation_progress(done * 100 / total, description)
+
+    async def run(self):
+        self.started_at = time.monotonic()
+        # NOTE(vsaienko): shift the timestamp to tolerate clock skew between
+        # controller and nova api.
+        self.changes_since = (
+            datetime.datetime.utcnow() - datetime.timedelta(minutes=10)
+        ).isoformat(timespec="seconds")
+        if self._refresh_queue():
+            # NOTE(vsaienko): remember migrations left by previous runs, so
+            # their records are not taken as result of our attempts.
+            self._set_migration_ids(self._get_migrations())
+        while self.queue or self.in_flight:
+            if self.in_flight:
+                self._update_in_flight()
+            self._start_migrations()
+            self._report_progress()
+            if not self.queue and not self.in_flight:
+                # Pick up servers that became valid for migration meanwhile.
+                if not self._refresh_queue():
+                    break
+                continue
+            await asyncio.sleep(self.poll_interval)
+        return self.completed, self.abandoned
+
+
+class MaintenanceLocksIndex:
+    """In-memory index of NodeWorkloadLocks in maintenance by node role
+
+    The index is primed with a single listing of NodeWorkloadLocks and
+    Nodes, after that is kept up to date from their watch streams, so
+    concurrency checks do not call kubernetes API.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._primed = False
+        # node_name: NodeWorkloadLock body in maintenance
+        self._locks = {}
+        # node_name: resourceVersion of last seen NodeWorkloadLock, kept
+        # after lock deletion to skip outdated events.
+        self._versions = {}
+        # node_name: set of node roles
+        self._roles = {}
+
+    @staticmethod
+    def _get_roles(node):
+        labels = node["metadata"].get("labels", {})
+        return {
+            role.value
+            for role in const.NodeRole
+            if any(
+                labels.get(k) == v
+                for k, v in settings.OSCTL_OPENSTACK_NODE_LABELS[role].items()
+            )
+        }
+
+    @staticmethod
+    def _get_version(nwl):
+        try:
+            return int(nwl["metadata"].get("resourceVersion"))
+        except (TypeError, ValueError):
+            return None
+
+    def _update_nwl(self, nwl, deleted=False):
+        if nwl["spec"].get("controllerName") != LockBase.workload:
+            return
+        node_name = nwl["spec"]["nodeName"]
+        # NOTE(vsaienko): the lock is updated directly by handlers, so
+        # watch events may be older than the state in the index.
+        version = self._get_version(nwl)
+        if version is not None:
+            if version < self._versions.get(node_name, 0):
+                return
+            self._versions[node_name] = version
+        inner_state = nwl["metadata"].get("annotations", {}).get("inner_state")
+        if not deleted and inner_state == LockInnerState.active.value:
+            # NOTE(vsaienko): kopf body is a view on event object, keep
+            # own copy.
+            self._locks[node_name] = copy.deepcopy(dict(nwl))
+        else:
+            self._locks.pop(node_name, None)
+
+    def _update_node(self, node, deleted=False):
+        node_name = node["metadata"]["name"]
+        if deleted:
+            self._roles.pop(node_name, None)
+        else:
+            self._roles[node_name] = self._get_roles(node)
+
+    def _prime(self):
+        kube_api = kube.kube_client()
+        for nwl in NodeWorkloadLock.objects(kube_api):
+            self._update_nwl(nwl.obj)
+        for node in kube.Node.objects(kube_api):
+            self._update_node(node.obj)
+        self._primed = True
+
+    def update_nwl(self, nwl, deleted=False):
+        with self._lock:
+            self._update_nwl(nwl, deleted=deleted)
+
+    def update_node(self, node, deleted=False):
+        with self._lock:
+            self._update_node(node, deleted=deleted)
+
+    def reset(self):
+        with self._lock:
+            self._locks = {}
+            self._versions = {}
+            self._roles = {}
+            self._primed = False
+
+    def maintenance_locks(self):
+        """Get NodeWorkloadLocks in maintenance grouped by node role
+
+        :returns: dictionary {role: [NodeWorkloadLock,]}
+        """
+        with self._lock:
+            if not self._primed:
+                self._prime()
+            kube_api = kube.kube_client()
+            locks = {role.value: [] for role in const.NodeRole}
+            for node_name, nwl in self._locks.items():
+                for role in self._roles.get(node_name, []):
+                    locks[role].append(NodeWorkloadLock(kube_api, nwl))
+            return locks
+
+
+LOCKS_INDEX = MaintenanceLocksIndex()
+
+
+class NodeMaintenanceBatch:
+    def __init__(self, key, max_size):
+        self.key = key
+        self.max_size = max_size
+        # node_name: (node, nmr)
+        self.members = {}
+        self.closed = False
+        self.done = threading.Event()
+        self.error = None
+
+    @property
+    def full(self):
+        return len(self.members) >= self.max_size
+
+
+class NodeMaintenanceBatcher:
+    """Groups NodeMaintenanceRequests of nodes with same roles and AZ
+
+    The handler that opens a batch becomes its leader, it waits for
+    other nodes to join and processes the whole group. The rest of
+    handlers wait for the leader to finish and share its result.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._batches = {}
+
+    def join(self, key, max_size, node, nmr):
+        """Join the open batch or open a new one
+
+        :returns: tuple (batch, is_leader)
+        """
+        with self._lock:
+            batch = self._batches.get(key)
+            leader = False
+            if batch is None or batch.closed or batch.full:
+                batch = NodeMaintenanceBatch(key, max_size)
+                self._batches[key] = batch
+                leader = True
+            batch.members[node.name] = (node, nmr)
+            return batch, leader
+
+    def close(self, batch):
+        """Close the batch for new members
+
+        :returns: list of (node, nmr) tuples to process.
+        """
+        with self._lock:
+            batch.closed = True
+            if self._batches.get(batch.key) is batch:
+                self._batches.pop(batch.key)
+            return list(batch.members.values())
+
+
+NMR_BATCHER = NodeMaintenanceBatcher()
+
+
 class MaintenanceRequestBase(pykube.objects.APIObject):
     version = "lcm.mirantis.com/v1alpha1"
 
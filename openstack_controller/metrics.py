@@ -0,0 +1,342 @@
+#    Copyright 2024 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import asyncio
+import collections
+import contextlib
+import contextvars
+import dataclasses
+import functools
+import re
+import sys
+import time
+import urllib.parse
+
+import kopf
+import prometheus_client
+
+from openstack_controller import settings
+from openstack_controller import utils
+
+
+LOG = utils.get_logger(__name__)
+
+# NOTE(vsaienko): use own registry to not mix controller metrics with
+# default process metrics.
+REGISTRY = prometheus_client.CollectorRegistry()
+
+# The id of kopf handler the code is running for, used to account
+# API calls per caller.
+CALLER = contextvars.ContextVar("osctl_caller", default="unknown")
+
+LONG_BUCKETS = (
+    0.1,
+    0.5,
+    1.0,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    300.0,
+    600.0,
+    1800.0,
+    3600.0,
+    float("inf"),
+)
+
+HANDLER_DURATION = prometheus_client.Histogram(
+    "osctl_handler_duration_seconds",
+    "Duration of kopf handlers execution",
+    ["handler", "outcome"],
+    buckets=LONG_BUCKETS,
+    registry=REGISTRY,
+)
+
+QUEUED_TASKS = prometheus_client.Gauge(
+    "osctl_queued_tasks",
+    "Number of tasks in kopf event queue",
+    registry=REGISTRY,
+)
+QUEUED_TASKS.set_function(lambda: settings.CURRENT_NUMBER_OF_TASKS)
+
+HELM_DURATION = prometheus_client.Histogram(
+    "osctl_helm_command_duration_seconds",
+    "Duration of helm commands",
+    ["release", "command", "outcome"],
+    buckets=LONG_BUCKETS,
+    registry=REGISTRY,
+)
+
+HELM_CACHE_FILES = prometheus_client.Counter(
+    "osctl_helm_cache_files",
+    "Number of helm repository cache files found on cleanup, hit when "
+    "the file was reused since previous cleanup, miss when it is new",
+    ["result"],
+    registry=REGISTRY,
+)
+
+HELM_CACHE_EVICTIONS = prometheus_client.Counter(
+    "osctl_helm_cache_evictions",
+    "Number of files removed from helm repository cache",
+    ["reason"],
+    registry=REGISTRY,
+)
+
+HELM_CACHE_SIZE = prometheus_client.Gauge(
+    "osctl_helm_cache_size_bytes",
+    "Disk usage of helm repository cache",
+    registry=REGISTRY,
+)
+
+API_REQUESTS = prometheus_client.Counter(
+    "osctl_api_requests",
+    "Number of requests to Kubernetes and OpenStack APIs",
+    ["api", "method", "caller", "code"],
+    registry=REGISTRY,
+)
+
+API_DURATION = prometheus_client.Histogram(
+    "osctl_api_request_duration_seconds",
+    "Duration of requests to Kubernetes and OpenStack APIs",
+    ["api", "method", "caller"],
+    registry=REGISTRY,
+)
+
+API_CALLS = prometheus_client.Counter(
+    "osctl_api_calls",
+    "Number of API calls by resource and calling function",
+    ["api", "method", "resource", "function"],
+    registry=REGISTRY,
+)
+
+RENDER_DURATION = prometheus_client.Histogram(
+    "osctl_render_duration_seconds",
+    "Duration of rendering helmbundle of service",
+    ["service"],
+    registry=REGISTRY,
+)
+
+
+def get_outcome(error):
+    if error is None:
+        return "success"
+    if isinstance(error, kopf.TemporaryError):
+        return "temporary_error"
+    if isinstance(error, kopf.PermanentError):
+        return "permanent_error"
+    if isinstance(error, asyncio.CancelledError):
+        return "cancelled"
+    return "error"
+
+
+def instrument_handler(fn, handler_id):
+    """Wrap kopf handler to account its duration and outcome
+
+    :param fn: the handler function, sync or async.
+    :param handler_id: the id of handler to use in metrics.
+    """
+    if getattr(fn, "_osctl_instrumented", False):
+        return fn
+
+    def _observe(start, error):
+        HANDLER_DURATION.labels(handler_id, get_outcome(error)).observe(
+            time.monotonic() - start
+        )
+
+    if asyncio.iscoroutinefunction(fn):
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            token = CALLER.set(handler_id)
+            start = time.monotonic()
+            error = None
+            try:
+                return await fn(*args, **kwargs)
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                _observe(start, error)
+                CALLER.reset(token)
+
+    else:
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            token = CALLER.set(handler_id)
+            start = time.monotonic()
+            error = None
+            try:
+                return fn(*args, **kwargs)
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                _observe(start, error)
+                CALLER.reset(token)
+
+    wrapper._osctl_instrumented = True
+    return wrapper
+
+
+def instrument_handlers(registry):
+    """Instrument all resource handlers from kopf registry
+
+    Should be called before kopf starts processing resources,
+    ie from startup handler. Handlers are left as is when layout
+    of kopf registry is not supported.
+    """
+    # NOTE(vsaienko): kopf does not provide public API to wrap handlers,
+    # rely on private attributes and keep handlers intact when they
+    # change.
+    try:
+        instrumented = [
+            (
+                handlers_registry,
+                [
+                    dataclasses.replace(
+                        handler, fn=instrument_handler(handler.fn, handler.id)
+                    )
+                    for handler in handlers_registry._handlers
+                ],
+            )
+            for handlers_registry in [
+                registry._changing,
+                registry._watching,
+                registry._spawning,
+            ]
+        ]
+    except (AttributeError, TypeError) as e:
+        LOG.warning(
+            f"Handlers are not instrumented, unsupported kopf registry: {e}"
+        )
+        return
+    for handlers_registry, handlers in instrumented:
+        handlers_registry._handlers = handlers
+
+
+# Modules which are wrappers around API clients, the calling function
+# is looked up outside of them.
+API_WRAPPER_MODULES = {
+    "openstack_controller.metrics",
+    "openstack_controller.kube",
+    "openstack_controller.openstack_utils",
+}
+
+# Active API calls recorders, see record_api_calls()
+API_CALL_RECORDERS = []
+
+OPENSTACK_SKIP_SEGMENT = re.compile(r"^(v\d+(\.\d+)?|[0-9a-f]{32})$")
+
+
+def get_kubernetes_resource(path):
+    """Get resource name from kubernetes API path
+
+    /api/v1/namespaces/openstack/pods/foo/status -> pods/status
+    """
+    parts = [p for p in path.split("/") if p]
+    if parts[:1] == ["api"]:
+        parts = parts[2:]
+    elif parts[:1] == ["apis"]:
+        parts = parts[3:]
+    else:
+        return ""
+    if len(parts) > 2 and parts[0] == "namespaces":
+        parts = parts[2:]
+    if not parts:
+        return ""
+    if len(parts) > 2:
+        return f"{parts[0]}/{parts[2]}"
+    return parts[0]
+
+
+def get_openstack_resource(path):
+    """Get resource name from OpenStack API path
+
+    /v3/<project_id>/volumes/detail -> volumes
+    """
+    for part in path.split("/"):
+        if part and not OPENSTACK_SKIP_SEGMENT.match(part):
+            return part
+    return ""
+
+
+def get_calling_function():
+    """Get the controller function which initiated API call
+
+    Frames of API wrappers are skipped, so kube.find() called from
+    service is accounted to the service method.
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if (
+            module.startswith("openstack_controller.")
+            and module not in API_WRAPPER_MODULES
+        ):
+            module = module[len("openstack_controller.") :]
+            return f"{module}:{frame.f_code.co_name}"
+        frame = frame.f_back
+    return "unknown"
+
+
+@contextlib.contextmanager
+def record_api_calls():
+    """Record API calls made in the context
+
+    Yields collections.Counter with number of calls by
+    (api, method, resource, function).
+    """
+    calls = collections.Counter()
+    API_CALL_RECORDERS.append(calls)
+    try:
+        yield calls
+    finally:
+        API_CALL_RECORDERS.remove(calls)
+
+
+def instrument_session(session, api):
+    """Account requests sent with requests session
+
+    :param session: the requests.Session object.
+    :param api: the name of API to use in metrics.
+    """
+    get_resource = (
+        get_kubernetes_resource
+        if api == "kubernetes"
+        else get_openstack_resource
+    )
+
+    def _response_hook(response, *args, **kwargs):
+        method = response.request.method
+        caller = CALLER.get()
+        API_REQUESTS.labels(api, method, caller, response.status_code).inc()
+        API_DURATION.labels(api, method, caller).observe(
+            response.elapsed.total_seconds()
+        )
+        resource = get_resource(
+            urllib.parse.urlsplit(response.request.url).path
+        )
+        function = get_calling_function()
+        API_CALLS.labels(api, method, resource, function).inc()
+        for calls in API_CALL_RECORDERS:
+            calls[(api, method, resource, function)] += 1
+
+    session.hooks["response"].append(_response_hook)
+    return session
+
+
+def start_server(port):
+    LOG.info(f"Starting metrics server on port {port}")
+    prometheus_client.start_http_server(port, registry=REGISTRY)
@@ -25,6 +25,7 @@ import os_service_types
 from openstack_controller import settings
 from openstack_controller import utils
 from openstack_controller import maintenance
+from openstack_controller import metrics as osctl_metrics
 
 LOG = utils.get_logger(__name__)
 
@@ -75,6 +76,7 @@ class OpenStackClientManager:
         self.oc = openstack.connect(
             cloud=cloud, metrics=metrics, api_timeout=300
         )
+        osctl_metrics.instrument_session(self.oc.session.session, "openstack")
         self.service_type_manager = os_service_types.ServiceTypes()
 
     def volume_get_services(self, **kwargs):
@@ -85,20 +87,58 @@ class OpenStackClientManager:
             res = resp.json()["services"]
         return res
 
-    def volume_get_volumes(self, host=None, all_tenants=True):
-        def match_host(volume, host=None):
+    def _get_paginated(self, proxy, url, resources_key, params=None):
+        """Iterate over raw API listing following pagination links
+
+        :param proxy: the openstacksdk service proxy to send requests with.
+        :param url: the url of collection.
+        :param resources_key: the key in response body with resources.
+        :param params: dictionary with query parameters.
+        :returns: generator of resources dictionaries.
+        """
+        while url:
+            resp = proxy.get(url, params=params)
+            openstack.exceptions.raise_from_response(resp)
+            data = resp.json()
+            yield from data.get(resources_key, [])
+            url = None
+            for link in data.get(f"{resources_key}_links", []):
+                if link.get("rel") == "next":
+                    # NOTE(vsaienko): next link already contains all
+                    # query parameters and marker.
+                    url = link["href"]
+                    params = None
+                    break
+
+    def volume_get_volumes(self, host=None, all_tenants=True, limit=1000):
+        """Get volumes, optionally scheduled to the specific host
+
+        Cinder API host filter matches the exact volume host value, which
+        is in host@backend#pool form, so volumes are filtered by host name
+        on client side.
+
+        :param host: the name of host.
+        :param all_tenants: list volumes from all projects.
+        :param limit: the page size.
+        :returns: generator of volume dictionaries.
+        """
+
+        def match_host(volume):
             if host is None:
                 return True
-            volume_host = volume.get("host")
+            volume_host = volume.get("os-vol-host-attr:host")
             if volume_host is None:
-                return
-            return host == volume_host.split("@")[0]
-
-        return [
-            x
-            for x in self.oc.block_storage.volumes(all_tenants=all_tenants)
-            if match_host(x, host)
-        ]
+                return False
+            return host == volume_host.split("@")[0].split("#")[0]
+
+        params = {"limit": limit}
+        if all_tenants:
+            params["all_tenants"] = True
+        for volume in self._get_paginated(
+            self.oc.block_storage, "/volumes/detail", "volumes", params
+        ):
+            if match_host(volume):
+                yield volume
 
     def volume_ensure_service_disabled(
         self, host, binary="cinder-volume", disabled_reason=None
@@ -163,18 +203,49 @@ class OpenStackClientManager:
             detailed=False, all_projects=True, filters=filters
         )
 
+    def compute_get_servers(self, host=None, status=None, limit=1000):
+        """Get servers from all projects
+
+        :param host: the name of compute host.
+        :param status: the status or list of statuses to filter by,
+                       the list is handled by Nova API in a single request.
+        :param limit: the page size.
+        :returns: generator of servers.
+        """
+        query = {"all_projects": True, "limit": limit}
+        if host:
+            query["compute_host"] = host
+        if status:
+            query["status"] = status
+        yield from self.oc.compute.servers(details=True, **query)
+
     def compute_get_servers_valid_for_live_migration(self, host=None):
-        servers = []
-        for status in ["ACTIVE", "PAUSED"]:
-            servers.extend(
-                list(self.compute_get_all_servers(host=host, status=status))
-            )
-        servers = [s for s in servers if s.task_state != "migrating"]
-        return servers
+        for server in self.compute_get_servers(
+            host=host, status=["ACTIVE", "PAUSED"]
+        ):
+            if server.task_state != "migrating":
+                yield server
 
     def compute_get_servers_in_migrating_state(self, host=None):
         return self.compute_get_all_servers(host=host, status="MIGRATING")
 
+    def compute_get_migrations(
+        self,
+        source_compute=None,
+        status=None,
+        migration_type=None,
+        changes_since=None,
+    ):
+        query = {
+            "source_compute": source_compute,
+            "status": status,
+            "migration_type": migration_type,
+            "changes_since": changes_since,
+        }
+        return self.oc.compute.migrations(
+            **{k: v for k, v in query.items() if v is not None}
+        )
+
     def compute_get_availability_zones(self, details=False):
         return list(self.oc.compute.availability_zones(details=details))
 
@@ -267,10 +338,12 @@ class OpenStackClientManager:
             pass
         return []
 
-    def network_get_ports(self, device_owner=None):
+    def network_get_ports(self, device_owner=None, fields=None):
         kwargs = {}
         if device_owner is not None:
             kwargs["device_owner"] = device_owner
+        if fields is not None:
+            kwargs["fields"] = fields
         try:
             yield from self.oc.network.ports(**kwargs)
         except openstack.exceptions.ResourceNotFound:
@@ -278,14 +351,30 @@ class OpenStackClientManager:
         return []
 
     def network_ensure_ports_absent(self, device_owner):
-        for port in self.network_get_ports(device_owner=device_owner):
+        for port in self.network_get_ports(
+            device_owner=device_owner, fields=["id"]
+        ):
             self.oc.network.delete_port(port)
 
     def placement_resource_provider_absent(self, host):
-        rp_list = list(self.oc.placement.resource_providers())
+        def _match(rp):
+            return rp["name"].split(".")[0] == host
+
+        # NOTE(vsaienko): placement supports only exact match by name, fallback
+        # to full listing only when provider is registered with fqdn.
+        rp_list = [
+            rp
+            for rp in self.oc.placement.resource_providers(name=host)
+            if _match(rp)
+        ]
+        if not rp_list:
+            rp_list = [
+                rp
+                for rp in self.oc.placement.resource_providers()
+                if _match(rp)
+            ]
         for rp in rp_list:
-            if rp["name"].split(".")[0] == host:
-                self.oc.placement.delete_resource_provider(rp)
+            self.oc.placement.delete_resource_provider(rp)
 
     def network_floating_ip_update(self, fip_id, data):
         return self.oc.network.put(
@@ -21,6 +21,8 @@ APPLIED = "APPLIED"
 DELETING = "DELETING"
 # When waiting for Applying changes, ie waiting other services to upgrade
 WAITING = "WAITING"
+# When applying changes is stopped due to error
+FAILED = "FAILED"
 
 
 class OpenStackDeploymentStatus(pykube.objects.NamespacedAPIObject):
@@ -100,6 +102,16 @@ class OpenStackDeploymentStatus(pykube.objects.NamespacedAPIObject):
             {"status": {"credentials": {"rotation": {group_name: patch}}}}
         )
 
+    def get_daemonset_rollout(self, name):
+        self.reload()
+        return utils.get_in(self.obj["status"], ["rollouts", name], {})
+
+    def set_daemonset_rollout(self, name, progress):
+        self.patch({"status": {"rollouts": {name: progress}}})
+
+    def set_cache_progress(self, progress):
+        self.patch({"status": {"cache": progress}})
+
     def set_service_state(self, service_name, state):
         self.patch({"status": {"services": {service_name: {"state": state}}}})
 
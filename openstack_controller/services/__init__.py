@@ -15,7 +15,6 @@
 import asyncio
 import base64
 import json
-import random
 
 import kopf
 import openstack
@@ -1504,7 +1503,7 @@ class Neutron(OpenStackService, MaintenanceApiMixin):
                 for ovs_ds in self.get_child_objects_dynamic(
                     "DaemonSet", daemonset
                 ):
-                    await ovs_ds.ensure_pod_generation()
+                    await ovs_ds.ensure_pod_generation(self.osdplst)
 
     async def remove_node_from_scheduling(self, node):
         pass
@@ -1584,6 +1583,8 @@ class Neutron(OpenStackService, MaintenanceApiMixin):
 class Nova(OpenStackServiceWithCeph, MaintenanceApiMixin):
     service = "compute"
     openstack_chart = "nova"
+    # Do not bring compute back to scheduling before network agents are up.
+    maintenance_delete_after = ["networking"]
     available_releases = [
         "openstack-nova-rabbitmq",
         "openstack-libvirt",
@@ -1762,6 +1763,50 @@ class Nova(OpenStackServiceWithCeph, MaintenanceApiMixin):
             nwl.set_error_message(msg)
             raise kopf.TemporaryError(msg)
 
+    async def remove_nodes_from_scheduling(self, nodes):
+        """Disable compute services on a group of nodes in one pass
+
+        :param nodes: list of compute nodes.
+        """
+        hosts = {node.name for node in nodes}
+        try:
+            os_client = openstack_utils.OpenStackClientManager()
+            for service in os_client.compute_get_services():
+                if service["host"] in hosts:
+                    os_client.compute_ensure_service_disabled(
+                        service,
+                        disabled_reason=openstack_utils.COMPUTE_SERVICE_DISABLE_REASON,
+                    )
+        except exceptions.SDKException as e:
+            LOG.error(f"Cannot execute openstack commands, error: {e}")
+            msg = "Can not disable compute services on a group of hosts"
+            for node in nodes:
+                maintenance.NodeWorkloadLock.get_by_node(
+                    node.name
+                ).set_error_message(msg)
+            raise kopf.TemporaryError(msg)
+
+    async def process_nmrs(self, nodes_nmrs):
+        computes = [
+            (node, nmr)
+            for node, nmr in nodes_nmrs
+            if node.has_role(constants.NodeRole.compute)
+        ]
+        if not computes:
+            return
+        await self.remove_nodes_from_scheduling([node for node, _ in computes])
+        results = await asyncio.gather(
+            *[
+                self.prepare_node_for_reboot(node)
+                for node, nmr in computes
+                if nmr.is_reboot_possible()
+            ],
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+
     async def _migrate_servers(self, os_client, host, cfg, nwl, concurrency=1):
         async def _check_migration_completed():
             all_servers = os_client.compute_get_all_servers(host=host)
@@ -1785,65 +1830,17 @@ class Nova(OpenStackServiceWithCeph, MaintenanceApiMixin):
                 nwl.set_error_message(msg)
                 raise kopf.TemporaryError(msg)
 
-        async def _do_servers_migration():
-            servers_to_migrate = (
-                os_client.compute_get_servers_valid_for_live_migration(
-                    host=host
-                )
-            )
-            servers_migrating_count = {}
-            while servers_to_migrate:
-                LOG.info(
-                    f"Got servers to migrate {[s.id for s in servers_to_migrate]}"
-                )
-                servers_in_migrating_state = (
-                    os_client.compute_get_servers_in_migrating_state(host=host)
-                )
-                if len(servers_in_migrating_state) < concurrency:
-                    random.shuffle(servers_to_migrate)
-                    srv = servers_to_migrate.pop()
-                    msg = f"Starting migration for {srv.id}"
-                    LOG.info(msg)
-                    nwl.set_error_message(msg)
-                    try:
-                        servers_migrating_count[srv.id] = (
-                            servers_migrating_count.get(srv.id, 1) + 1
-                        )
-                        os_client.oc.compute.live_migrate_server(srv)
-                        # NOTE(vsaienko): do not call API extensively, give some time for API
-                        # to set correct status for instance.
-                        await asyncio.sleep(5)
-                    except Exception as e:
-                        msg = f"Got error while trying to migrate server {srv.id}: {e}"
-                        LOG.warning(msg)
-                        nwl.set_error_message(msg)
-                else:
-                    msg = f"Waiting servers migration is completed: {[s.id for s in servers_in_migrating_state]}"
-                    LOG.info(msg)
-                    nwl.set_error_message(msg)
-                    await asyncio.sleep(30)
-                await asyncio.sleep(5)
-                servers_migrating_skip = [
-                    srv_id
-                    for srv_id, error_count in servers_migrating_count.items()
-                    if error_count > int(cfg.instance_migration_attempts)
-                ]
-                servers_to_migrate = (
-                    os_client.compute_get_servers_valid_for_live_migration(
-                        host=host
-                    )
-                )
-                servers_to_migrate = [
-                    srv
-                    for srv in servers_to_migrate
-                    if srv.id not in servers_migrating_skip
-                ]
-
         if cfg.instance_migration_mode == "skip":
             LOG.info(f"Skip intance migration for node {host}")
             return
         elif cfg.instance_migration_mode == "live":
-            await _do_servers_migration()
+            await maintenance.LiveMigrationEngine(
+                os_client,
+                host,
+                nwl,
+                concurrency=concurrency,
+                attempts=cfg.instance_migration_attempts,
+            ).run()
 
         await _check_migration_completed()
 
@@ -2,7 +2,6 @@ from abc import abstractmethod
 import asyncio
 import base64
 import json
-from jsonpath_ng import parse
 from typing import List
 import hashlib
 
@@ -14,6 +13,7 @@ from openstack_controller import constants
 from openstack_controller import health
 from openstack_controller import layers
 from openstack_controller import kube
+from openstack_controller import metrics
 from openstack_controller import secrets
 from openstack_controller import settings
 from openstack_controller import version
@@ -233,9 +233,7 @@ class Service:
         hasher = hashlib.sha256()
         resource_hash_data = {}
         for field in child_object.helmbundle_ext.hash_fields:
-            resource_hash_data[field] = [
-                match.value for match in parse(field).find(values)
-            ]
+            resource_hash_data[field] = utils.jsonpath_find(field, values)
         hasher.update(json.dumps(resource_hash_data, sort_keys=True).encode())
         return hasher.hexdigest()
 
@@ -530,13 +528,14 @@ class Service:
     def render(self, openstack_version=""):
         if openstack_version:
             self.mspec["openstack_version"] = openstack_version
-        template_args = self.template_args()
-        data = layers.merge_all_layers(
-            self.service,
-            self.mspec,
-            self.logger,
-            **template_args,
-        )
+        with metrics.RENDER_DURATION.labels(self.service).time():
+            template_args = self.template_args()
+            data = layers.merge_all_layers(
+                self.service,
+                self.mspec,
+                self.logger,
+                **template_args,
+            )
 
         data.update(self.resource_def)
         kopf.adopt(data, self.osdpl.obj)
@@ -585,6 +584,13 @@ class Service:
 
 
 class MaintenanceApiMixin:
+    # Names of services which maintenance hooks have to be completed
+    # before hooks of this service are started, when moving node into
+    # maintenance and back to operational state. Hooks of services without
+    # constraints are run concurrently.
+    maintenance_process_after = []
+    maintenance_delete_after = []
+
     @abstractmethod
     async def remove_node_from_scheduling(self, node):
         pass
@@ -611,6 +617,23 @@ class MaintenanceApiMixin:
         await self.prepare_node_after_reboot(node)
         await self.add_node_to_scheduling(node)
 
+    async def process_nmrs(self, nodes_nmrs):
+        """Process NodeMaintenanceRequests for a group of nodes
+
+        By default handles each node concurrently with process_nmr.
+
+        :param nodes_nmrs: list of (node, nmr) tuples.
+
+        :raises: the first error that occurred while handling nodes.
+        """
+        results = await asyncio.gather(
+            *[self.process_nmr(node, nmr) for node, nmr in nodes_nmrs],
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+
     async def can_handle_nmr(self, node, locks):
         """Check if it is possible to handle nmr for node
 
@@ -171,6 +171,12 @@ OSCTL_RESOURCE_DELETED_WAIT_TIMEOUT = int(
     os.environ.get("OSCTL_RESOURCE_DELETED_WAIT_TIMEOUT", 1)
 )
 
+# The number of seconds after which watch used to wait for kubernetes
+# objects state is restarted with full relisting of objects
+OSCTL_WATCH_RESYNC_INTERVAL = int(
+    os.environ.get("OSCTL_WATCH_RESYNC_INTERVAL", 300)
+)
+
 OSCTL_REDIS_NAMESPACE = os.environ.get(
     "OSCTL_REDIS_NAMESPACE", "openstack-redis"
 )
@@ -191,6 +197,9 @@ OSCTL_PYKUBE_HTTP_REQUEST_TIMEOUT = float(
 
 OSCTL_MAX_TASKS = int(os.environ.get("OSCTL_MAX_TASKS", 150))
 
+# The port to expose controller metrics on, 0 disables metrics
+OSCTL_METRICS_PORT = int(os.environ.get("OSCTL_METRICS_PORT", 0))
+
 OSCTL_HEARTBEAT_PEERING_OBJECT_NAME = os.environ.get(
     "OSCTL_HEARTBEAT_PEERING_OBJECT_NAME", "openstack-controller.osdpl"
 )
@@ -30,6 +30,7 @@ import yaml
 
 import deepmerge
 import deepmerge.exception
+import jsonpath_ng
 from deepmerge.strategy import dict as merge_dict
 from deepmerge.strategy import list as merge_list
 import deepmerge.strategy.type_conflict
@@ -57,6 +58,44 @@ def get_in(d: Dict, keys: List, default=None):
         return default
 
 
+# Dotted path of plain keys, resolved without jsonpath parser.
+JSONPATH_SIMPLE = re.compile(
+    r"^[a-zA-Z_][a-zA-Z0-9_\-]*(\.[a-zA-Z_][a-zA-Z0-9_\-]*)*$"
+)
+JSONPATH_RESERVED = {"where", "wherenot"}
+
+
+@functools.lru_cache(maxsize=1024)
+def jsonpath_parse(path):
+    """Get compiled jsonpath-ng expression
+
+    Parsing is very slow, so expressions are cached per process.
+    """
+    return jsonpath_ng.parse(path)
+
+
+def jsonpath_find(path, data):
+    """Get list of values matching jsonpath-ng expression
+
+    >>> jsonpath_find("a.b", {"a": {"b": 1}})
+    [1]
+    >>> jsonpath_find("a.*", {"a": {"b": 1, "c": 2}})
+    [1, 2]
+    >>> jsonpath_find("a.x", {"a": {"b": 1}})
+    []
+
+    """
+    if JSONPATH_SIMPLE.match(path):
+        keys = path.split(".")
+        if not JSONPATH_RESERVED.intersection(keys):
+            for key in keys:
+                if not isinstance(data, dict) or key not in data:
+                    return []
+                data = data[key]
+            return [data]
+    return [match.value for match in jsonpath_parse(path).find(data)]
+
+
 OSCTL_LOGGING_CONF_FILE = os.environ.get(
     "OSCTL_LOGGING_CONF_FILE", "/etc/openstack-controller/logging.conf"
 )
@@ -377,12 +416,19 @@ def download_file(url, dst, timeout=60, chunk_size=8192):
     return dst
 
 
+# Functions called with qualified name and duration of each timeit
+# decorated function call.
+TIMEIT_OBSERVERS = []
+
+
 def timeit(f):
     def timed(*args, **kw):
         start = time.time()
         result = f(*args, **kw)
         end = time.time()
         LOG.debug("%s took: %2.4f sec" % (f.__qualname__, end - start))
+        for observer in TIMEIT_OBSERVERS:
+            observer(f.__qualname__, end - start)
         return result
 
     return timed
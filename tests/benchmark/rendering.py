@@ -0,0 +1,266 @@
+#    Copyright 2024 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Benchmarks of OpenStackDeployment rendering
+
+Measures rendering functions on small and large fixtures and compares
+results with the JSON baseline:
+
+    python -m tests.benchmark.rendering --baseline rendering.json --save
+    python -m tests.benchmark.rendering --baseline rendering.json
+
+The run fails when the best time of any benchmark is slower than the
+baseline by more than the threshold.
+"""
+
+import argparse
+import copy
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+from unittest import mock
+
+import yaml
+
+# NOTE(vsaienko): k8s config is parsed during layers import, the same
+# way as in unit tests.
+mock.patch("pykube.KubeConfig").start()
+mock.patch("pykube.HTTPClient").start()
+
+from openstack_controller import kube  # noqa: E402
+from openstack_controller import layers  # noqa: E402
+from openstack_controller import resource_view  # noqa: E402
+from openstack_controller.filters.tempest import (  # noqa: E402
+    generate_tempest_config,
+)
+
+LOG = logging.getLogger(__name__)
+
+FIXTURES_DIR = "tests/fixtures"
+RENDER_INPUT_DIR = f"{FIXTURES_DIR}/render_service_template/input"
+RENDER_OUTPUT_DIR = f"{FIXTURES_DIR}/render_service_template/output"
+
+# OpenStackDeployment fixtures, spec is merged with preset and size.
+OSDPL_FIXTURES = {
+    "small": {
+        "openstack_version": "antelope",
+        "preset": "compute",
+        "size": "tiny",
+    },
+    "large": f"{FIXTURES_DIR}/openstackdeployment.yaml",
+}
+
+# Service rendering contexts, spec is already merged.
+RENDER_CONTEXTS = {
+    "small": "ussuri_ceph_local_non_dvr",
+    "large": "ussuri_ceph_local_non_dvr_telemetry",
+}
+
+DEFAULT_THRESHOLD = 0.2
+DEFAULT_ROUNDS = 5
+
+
+def _load_yaml(path):
+    with open(path) as f:
+        return yaml.safe_load(f)
+
+
+def load_osdpl_spec(fixture):
+    if isinstance(fixture, dict):
+        return copy.deepcopy(fixture)
+    return _load_yaml(fixture)["spec"]
+
+
+def load_render_context(context):
+    """Get spec and template arguments per service of render context"""
+    spec = _load_yaml(f"{RENDER_INPUT_DIR}/{context}/context_spec.yaml")
+    context_args = _load_yaml(
+        f"{RENDER_INPUT_DIR}/{context}/context_template_args.yaml"
+    )
+    common_args = _load_yaml(f"{RENDER_INPUT_DIR}/common_template_args.yaml")
+    child_view = resource_view.ChildObjectView(spec)
+    services = {}
+    for service in sorted(os.listdir(RENDER_OUTPUT_DIR)):
+        if not os.path.exists(f"{RENDER_OUTPUT_DIR}/{service}/{context}.yaml"):
+            continue
+        template_args = copy.deepcopy(context_args[service])
+        for key in [
+            "admin_creds",
+            "guest_creds",
+            "proxy_vars",
+            "proxy_settings",
+            "network_policies",
+        ]:
+            template_args[key] = context_args.get(key, common_args[key])
+        template_args["service_childs"] = child_view.childs
+        # NOTE(vsaienko): images are rendered by merge_all_layers
+        template_args.pop("images", None)
+        services[service] = template_args
+    return spec, services
+
+
+def get_benchmarks():
+    """Get benchmarks as dictionary of name and function to measure"""
+    benchmarks = {}
+    for size, fixture in OSDPL_FIXTURES.items():
+        spec = load_osdpl_spec(fixture)
+        mspec = layers.merge_spec(spec, LOG)
+        benchmarks[
+            f"merge_spec[{size}]"
+        ] = lambda spec=spec: layers.merge_spec(spec, LOG)
+        benchmarks[
+            f"spec_hash[{size}]"
+        ] = lambda mspec=mspec: layers.spec_hash(mspec)
+        benchmarks[
+            f"get_child_tree[{size}]"
+        ] = lambda mspec=mspec: layers.get_child_tree(mspec)
+        benchmarks[
+            f"ChildObjectView[{size}]"
+        ] = lambda mspec=mspec: resource_view.ChildObjectView(mspec)
+
+    for size, context in RENDER_CONTEXTS.items():
+        spec, services = load_render_context(context)
+        helmbundles = {}
+        for service, template_args in services.items():
+            helmbundles[service] = layers.merge_all_layers(
+                service, spec, LOG, **template_args
+            )
+            benchmarks[
+                f"merge_all_layers[{size}-{service}]"
+            ] = lambda service=service, spec=spec, args=template_args: (
+                layers.merge_all_layers(service, spec, LOG, **args)
+            )
+        benchmarks[
+            f"generate_tempest_config[{size}]"
+        ] = lambda spec=spec, helmbundles=helmbundles: (
+            generate_tempest_config(spec, helmbundles)
+        )
+    return benchmarks
+
+
+def measure(func, rounds):
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "rounds": rounds,
+    }
+
+
+def compare(results, baseline, threshold):
+    """Get regressions of results comparing to baseline
+
+    Best times are compared as they are least affected by noise.
+
+    :returns: dictionary of benchmark name and ratio to baseline
+    """
+    regressions = {}
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result["min"] / baseline[name]["min"]
+        if ratio > 1 + threshold:
+            regressions[name] = ratio
+    return regressions
+
+
+def parse_args(args):
+    parser = argparse.ArgumentParser(
+        description="Benchmark OpenStackDeployment rendering."
+    )
+    parser.add_argument(
+        "--baseline",
+        help="Path to JSON baseline to compare results with, "
+        "created when does not exist.",
+    )
+    parser.add_argument(
+        "--save",
+        action="store_true",
+        help="Save results as new baseline instead of comparing.",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Allowed slowdown comparing to baseline, 0.2 means 20%%.",
+    )
+    parser.add_argument(
+        "--rounds",
+        type=int,
+        default=DEFAULT_ROUNDS,
+        help="Number of times to run each benchmark.",
+    )
+    parser.add_argument(
+        "-k",
+        dest="filter",
+        default="",
+        help="Run only benchmarks which names contain the string.",
+    )
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    args = parse_args(args)
+    logging.basicConfig(level=logging.WARNING)
+    osdpl = mock.Mock()
+    osdpl.obj = {"metadata": {"name": "osh-dev"}}
+    with mock.patch.object(
+        kube, "get_osdpl", return_value=osdpl
+    ), mock.patch.object(kube, "artifacts_configmap", return_value=None):
+        results = {}
+        for name, func in get_benchmarks().items():
+            if args.filter not in name:
+                continue
+            results[name] = measure(func, args.rounds)
+            print(
+                f"{name:<60} min {results[name]['min'] * 1000:10.2f}ms "
+                f"median {results[name]['median'] * 1000:10.2f}ms"
+            )
+
+    if not args.baseline:
+        return 0
+
+    if args.save or not os.path.exists(args.baseline):
+        with open(args.baseline, "w") as f:
+            json.dump(
+                {
+                    "machine": platform.node(),
+                    "python": platform.python_version(),
+                    "benchmarks": results,
+                },
+                f,
+                indent=2,
+                sort_keys=True,
+            )
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)["benchmarks"]
+    regressions = compare(results, baseline, args.threshold)
+    for name, ratio in sorted(regressions.items()):
+        print(f"REGRESSION {name}: {ratio:.2f}x of baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
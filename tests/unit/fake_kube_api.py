@@ -0,0 +1,308 @@
+#    Copyright 2024 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Minimal in-memory kubernetes API server for tests
+
+Supports get, list, create, replace, merge patch and delete of any
+resource. Workloads become ready as soon as they are stored. Watch
+requests return no events after short pause.
+"""
+
+import copy
+import http.server
+import json
+import threading
+import time
+import urllib.parse
+import uuid
+
+import pykube
+
+
+def _merge(dst, src):
+    for key, value in src.items():
+        if value is None:
+            dst.pop(key, None)
+        elif isinstance(value, dict) and isinstance(dst.get(key), dict):
+            _merge(dst[key], value)
+        else:
+            dst[key] = copy.deepcopy(value)
+    return dst
+
+
+def _match_labels(labels, selector):
+    for expr in filter(None, selector.split(",")):
+        if " notin " in expr:
+            key, values = expr.split(" notin ")
+            if labels.get(key) in values.strip("()").split(","):
+                return False
+        elif " in " in expr:
+            key, values = expr.split(" in ")
+            if labels.get(key) not in values.strip("()").split(","):
+                return False
+        elif "!=" in expr:
+            key, value = expr.split("!=")
+            if labels.get(key) == value:
+                return False
+        elif "=" in expr:
+            key, value = expr.split("=", 1)
+            if labels.get(key.rstrip("=")) != value.lstrip("="):
+                return False
+        elif expr.startswith("!"):
+            if expr[1:] in labels:
+                return False
+        elif expr not in labels:
+            return False
+    return True
+
+
+def _match_fields(obj, selector):
+    for expr in filter(None, selector.split(",")):
+        key, value = expr.split("=", 1)
+        current = obj
+        for part in key.split("."):
+            current = (current or {}).get(part)
+        if str(current or "") != value:
+            return False
+    return True
+
+
+def _get_api_resources(group_version):
+    """Get API discovery resources from known pykube objects"""
+    resources = {}
+    classes = [pykube.objects.APIObject]
+    while classes:
+        klass = classes.pop()
+        classes.extend(klass.__subclasses__())
+        if getattr(klass, "version", None) != group_version:
+            continue
+        if not getattr(klass, "kind", None):
+            continue
+        resources[klass.endpoint] = {
+            "name": klass.endpoint,
+            "kind": klass.kind,
+            "namespaced": issubclass(
+                klass, pykube.objects.NamespacedAPIObject
+            ),
+        }
+    return list(resources.values())
+
+
+def _set_ready_status(resource, obj):
+    """Emulate kubernetes controllers by making workloads ready"""
+    generation = obj["metadata"]["generation"]
+    status = obj.setdefault("status", {})
+    if resource == "daemonsets":
+        status.update(
+            {
+                "observedGeneration": generation,
+                "desiredNumberScheduled": 1,
+                "currentNumberScheduled": 1,
+                "updatedNumberScheduled": 1,
+                "numberAvailable": 1,
+                "numberReady": 1,
+            }
+        )
+    elif resource in ["deployments", "statefulsets"]:
+        replicas = obj["spec"].get("replicas", 1)
+        status.update(
+            {
+                "observedGeneration": generation,
+                "replicas": replicas,
+                "updatedReplicas": replicas,
+                "readyReplicas": replicas,
+                "availableReplicas": replicas,
+            }
+        )
+    elif resource == "jobs":
+        status["conditions"] = [{"type": "Complete", "status": "True"}]
+
+
+class FakeKubeAPI:
+    def __init__(self):
+        self.objects = {}
+        self.resource_version = 0
+        self.lock = threading.Lock()
+        self.server = http.server.ThreadingHTTPServer(
+            ("127.0.0.1", 0), self._get_handler()
+        )
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, daemon=True
+        )
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def get_config(self):
+        return pykube.config.KubeConfig(
+            {
+                "current-context": "fake",
+                "clusters": [
+                    {"name": "fake", "cluster": {"server": self.url}}
+                ],
+                "users": [{"name": "fake", "user": {}}],
+                "contexts": [
+                    {
+                        "name": "fake",
+                        "context": {
+                            "cluster": "fake",
+                            "user": "fake",
+                            "namespace": "openstack",
+                        },
+                    }
+                ],
+            }
+        )
+
+    @staticmethod
+    def parse_path(path):
+        """Parse path to (group_version, resource, namespace, name, subresource)"""
+        parts = [p for p in path.split("/") if p]
+        if parts[:1] == ["api"]:
+            group_version, parts = parts[1], parts[2:]
+        else:
+            group_version, parts = "/".join(parts[1:3]), parts[3:]
+        namespace = None
+        if len(parts) > 2 and parts[0] == "namespaces":
+            namespace, parts = parts[1], parts[2:]
+        parts += [None] * (3 - len(parts))
+        return (group_version, *parts[:1], namespace, *parts[1:3])
+
+    def add(self, group_version, resource, obj):
+        with self.lock:
+            return self._store(group_version, resource, copy.deepcopy(obj))
+
+    def get(self, group_version, resource, namespace, name):
+        return self.objects.get((group_version, resource, namespace, name))
+
+    def _store(self, group_version, resource, obj):
+        self.resource_version += 1
+        meta = obj.setdefault("metadata", {})
+        meta.setdefault("uid", str(uuid.uuid4()))
+        meta.setdefault("creationTimestamp", "2024-01-01T00:00:00Z")
+        meta.setdefault("generation", 1)
+        meta["resourceVersion"] = str(self.resource_version)
+        _set_ready_status(resource, obj)
+        key = (group_version, resource, meta.get("namespace"), meta["name"])
+        self.objects[key] = obj
+        return obj
+
+    def handle(self, method, path, query, body):
+        group_version, resource, namespace, name, sub = self.parse_path(path)
+        if not resource:
+            return 200, {
+                "kind": "APIResourceList",
+                "groupVersion": group_version,
+                "resources": _get_api_resources(group_version),
+            }
+        key = (group_version, resource, namespace, name)
+        with self.lock:
+            if method == "GET" and name is None:
+                if query.get("watch") == "true":
+                    return 200, None
+                items = [
+                    copy.deepcopy(obj)
+                    for (gv, res, ns, _), obj in self.objects.items()
+                    if gv == group_version
+                    and res == resource
+                    and namespace in (None, ns)
+                    and _match_labels(
+                        obj["metadata"].get("labels", {}),
+                        query.get("labelSelector", ""),
+                    )
+                    and _match_fields(obj, query.get("fieldSelector", ""))
+                ]
+                return 200, {
+                    "kind": "List",
+                    "metadata": {
+                        "resourceVersion": str(self.resource_version)
+                    },
+                    "items": items,
+                }
+            if method == "POST":
+                body.setdefault("metadata", {})
+                if namespace:
+                    body["metadata"]["namespace"] = namespace
+                key = (
+                    group_version,
+                    resource,
+                    namespace,
+                    body["metadata"].get("name"),
+                )
+                if key in self.objects:
+                    return 409, {"kind": "Status", "code": 409}
+                return 201, self._store(group_version, resource, body)
+            if key not in self.objects:
+                return 404, {
+                    "kind": "Status",
+                    "code": 404,
+                    "reason": "NotFound",
+                    "message": f"{resource} {name} not found",
+                }
+            obj = self.objects[key]
+            if method == "GET":
+                return 200, copy.deepcopy(obj)
+            if method == "DELETE":
+                return 200, self.objects.pop(key)
+            if method == "PUT":
+                obj = body
+            elif method == "PATCH":
+                obj = _merge(copy.deepcopy(obj), body)
+            if sub is None and obj.get("spec") != self.objects[key].get(
+                "spec"
+            ):
+                obj["metadata"]["generation"] = (
+                    obj["metadata"].get("generation", 1) + 1
+                )
+            return 200, copy.deepcopy(
+                self._store(group_version, resource, obj)
+            )
+
+    def _get_handler(self):
+        api = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def _handle(self):
+                url = urllib.parse.urlsplit(self.path)
+                query = dict(urllib.parse.parse_qsl(url.query))
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or "{}")
+                code, data = api.handle(self.command, url.path, query, body)
+                if data is None:
+                    # Watch, emulate timeout without events.
+                    time.sleep(0.1)
+                    data = ""
+                else:
+                    data = json.dumps(data)
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data.encode())
+
+            do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _handle
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
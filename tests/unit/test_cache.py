@@ -0,0 +1,162 @@
+#    Copyright 2024 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from unittest import mock
+
+import pytest
+
+from openstack_controller import cache
+from openstack_controller import osdplstatus
+from openstack_controller import settings
+
+IMAGES = {f"image-{i}": f"image-{i}:1.0" for i in range(120)}
+
+
+def _get_ds(name):
+    ds = mock.Mock()
+    ds.name = name
+    return ds
+
+
+@pytest.fixture
+def cache_list(mocker):
+    mock_list = mocker.patch.object(cache, "_list")
+    mocker.patch.object(cache.kopf, "adopt")
+    mocker.patch.object(cache.kube, "resource")
+    mocker.patch.object(
+        cache.layers,
+        "render_cache_template",
+        side_effect=lambda mspec, name, images: {"name": name},
+    )
+    yield mock_list
+    mocker.stopall()
+
+
+def test_get_image_groups():
+    groups = cache.get_image_groups(IMAGES)
+    assert len(groups) == 3
+    assert sorted(i for g in groups.values() for i in g) == sorted(IMAGES)
+    assert groups == cache.get_image_groups(dict(reversed(IMAGES.items())))
+    assert cache.get_image_groups({}) == {}
+
+
+def test_get_image_groups_change_one_image():
+    groups = cache.get_image_groups(IMAGES)
+    new_groups = cache.get_image_groups({**IMAGES, "image-7": "image-7:2.0"})
+    assert len(set(groups) - set(new_groups)) == 1
+    assert len(set(new_groups) - set(groups)) == 1
+
+
+def test_get_image_groups_limit():
+    settings.CONF["cache"]["images_per_daemonset"] = "7"
+    try:
+        groups = cache.get_image_groups(IMAGES)
+    finally:
+        settings.CONF["cache"]["images_per_daemonset"] = "50"
+    assert len(groups) == 18
+    assert max(len(g) for g in groups.values()) == 7
+    assert sorted(i for g in groups.values() for i in g) == sorted(IMAGES)
+
+
+def test_get_image_groups_add_group():
+    images = dict(list(IMAGES.items())[:80])
+    groups = cache.get_image_groups(images)
+    new_groups = cache.get_image_groups(IMAGES)
+    assert len(groups) == 2
+    assert len(new_groups) == 3
+    # Existing images are moved only to the added group
+    moved = [
+        g
+        for g in new_groups.values()
+        if not any(set(g) & set(images) <= set(old) for old in groups.values())
+    ]
+    assert len(moved) == 1
+
+
+def test_restart_replace_changed_groups(cache_list):
+    groups = cache.get_image_groups(IMAGES)
+    existing = [_get_ds(name) for name in groups]
+    old_ds = _get_ds("image-precaching-0")
+    cache_list.return_value = existing + [old_ds]
+    new_images = {**IMAGES, "image-7": "image-7:2.0"}
+    new_groups = cache.get_image_groups(new_images)
+    osdpl = {"metadata": {"namespace": "openstack"}}
+
+    assert cache.restart(new_images, osdpl, {}) == 3
+
+    old_ds.delete.assert_called_once()
+    deleted = [ds.name for ds in existing if ds.delete.called]
+    assert deleted == list(set(groups) - set(new_groups))
+    created = [c.args[0]["name"] for c in cache.kube.resource.call_args_list]
+    assert created == list(set(new_groups) - set(groups))
+
+
+def test_restart_no_images(cache_list):
+    ds = _get_ds("image-precaching-1234567890")
+    cache_list.return_value = [ds]
+    assert cache.restart({}, {"metadata": {"namespace": "openstack"}}, {}) == 0
+    ds.delete.assert_called_once()
+    cache.kube.resource.assert_not_called()
+
+
+def _get_pod(node, ready, total):
+    return mock.Mock(
+        obj={
+            "spec": {"nodeName": node, "containers": [{}] * total},
+            "status": {
+                "containerStatuses": [{"ready": True}] * ready
+                + [{"ready": False}] * (total - ready)
+            },
+        }
+    )
+
+
+def test_update_progress(mocker):
+    mocker.patch.object(
+        cache.kube,
+        "resource_list",
+        return_value=[
+            _get_pod("node1", 50, 50),
+            _get_pod("node1", 10, 40),
+            _get_pod("node2", 40, 40),
+            mock.Mock(obj={"spec": {"containers": [{}]}}),
+        ],
+    )
+    osdplst = mock.Mock()
+    assert cache.update_progress("openstack", osdplst) is False
+    osdplst.set_cache_progress.assert_called_once_with(
+        {
+            "state": osdplstatus.APPLYING,
+            "nodes": {"node1": "60/90", "node2": "40/40"},
+        }
+    )
+
+
+def test_wait_ready_updates_progress(cache_list, mocker):
+    ds = _get_ds("image-precaching-1")
+    ds.obj = {"metadata": {"name": ds.name}}
+    cache_list.return_value = [ds]
+    wait = mocker.patch.object(
+        cache.kube,
+        "wait_for_daemonset_ready",
+        side_effect=[cache.kopf.TemporaryError("Not ready yet"), None],
+    )
+    update_progress = mocker.patch.object(cache, "update_progress")
+    osdplst = mock.Mock()
+    with pytest.raises(cache.kopf.TemporaryError):
+        cache.wait_ready("openstack", osdplst)
+    update_progress.assert_called_once_with("openstack", osdplst)
+    cache.wait_ready("openstack", osdplst)
+    assert update_progress.call_count == 2
+    assert wait.call_count == 2
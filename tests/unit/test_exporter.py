@@ -0,0 +1,817 @@
+#    Copyright 2024 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import base64
+import datetime
+import gzip
+import io
+from unittest import mock
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+import keystoneauth1
+from openstack.identity.v3 import endpoint
+from openstack.identity.v3 import service
+from openstack.placement.v1 import resource_provider
+import pytest
+import requests
+
+from openstack_controller.exporter import exporter
+from openstack_controller.exporter import metrics as exporter_metrics
+from openstack_controller.exporter import settings
+from openstack_controller.exporter import sharding
+from openstack_controller.exporter.collectors import base
+from openstack_controller.exporter.collectors import certificates
+from openstack_controller.exporter.collectors import credentials
+from openstack_controller.exporter.collectors.openstack import (
+    base as openstack_base,
+)
+from openstack_controller.exporter.collectors.openstack import api
+from openstack_controller.exporter.collectors.openstack import glance
+from openstack_controller.exporter.collectors.openstack import nova
+
+
+@pytest.fixture
+def osdpl_collector(mocker):
+    mocker.patch.dict(base.BaseMetricsCollector.registry, clear=True)
+
+    class FastCollector(base.BaseMetricsCollector):
+        _name = "fast"
+        can_collect_data = True
+        update_samples = mock.Mock()
+
+    class SlowCollector(base.BaseMetricsCollector):
+        _name = "slow"
+        can_collect_data = True
+        update_samples = mock.Mock()
+
+    mocker.patch.object(
+        settings, "OSCTL_EXPORTER_ENABLED_COLLECTORS", ["fast", "slow"]
+    )
+    mocker.patch.object(settings, "OSCTL_EXPORTER_REFRESH_INTERVAL", 10)
+    mocker.patch.object(
+        settings, "OSCTL_EXPORTER_REFRESH_INTERVALS", {"slow": 100}
+    )
+    mocker.patch.object(settings, "OSCTL_EXPORTER_REFRESH_JITTER", 0.1)
+    mocker.patch.object(base.OsdplMetricsCollector, "init_scheduler_thread")
+    mocker.patch.object(base.kube, "get_osdpl")
+    collector = base.OsdplMetricsCollector()
+    collector.scheduler_future = mock.Mock()
+    return collector
+
+
+def _run_scheduler(collector):
+    collector.schedule_tasks()
+    for task in collector.gather_tasks.values():
+        task["future"].join()
+    collector.update_tasks_status()
+
+
+def test_refresh_intervals(osdpl_collector):
+    fast, slow = osdpl_collector.collector_instances
+    assert fast.refresh_interval == 10
+    assert slow.refresh_interval == 100
+    assert osdpl_collector.next_refresh["slow"] <= base.time.time() + 10
+
+
+def test_schedule_tasks(osdpl_collector, mocker):
+    fast, slow = osdpl_collector.collector_instances
+    now = base.time.time()
+    osdpl_collector.next_refresh = {"fast": now, "slow": now + 50}
+    _run_scheduler(osdpl_collector)
+    assert fast.update_samples.call_count == 1
+    assert slow.update_samples.call_count == 0
+    assert 9 <= osdpl_collector.next_refresh["fast"] - now <= 12
+    assert fast.success_timestamp >= now
+
+    mocker.patch.object(base.time, "time", return_value=now + 60)
+    _run_scheduler(osdpl_collector)
+    assert fast.update_samples.call_count == 2
+    assert slow.update_samples.call_count == 1
+    assert 90 <= osdpl_collector.next_refresh["slow"] - (now + 60) <= 110
+
+
+def test_schedule_tasks_no_osdpl(osdpl_collector):
+    now = base.time.time()
+    osdpl_collector.next_refresh = {"fast": now, "slow": now}
+    base.kube.get_osdpl.return_value = None
+    _run_scheduler(osdpl_collector)
+    assert osdpl_collector.gather_tasks == {}
+    assert osdpl_collector.next_refresh["fast"] > now
+
+
+class _StopScheduler(BaseException):
+    pass
+
+
+def test_run_scheduler_survives_api_error(osdpl_collector, mocker):
+    mocker.patch.object(
+        base.kube,
+        "get_osdpl",
+        side_effect=[Exception("API error"), mock.Mock()],
+    )
+    mocker.patch.object(
+        base.time, "sleep", side_effect=[None, _StopScheduler()]
+    )
+    osdpl_collector.next_refresh = {"fast": 0, "slow": 0}
+    with pytest.raises(_StopScheduler):
+        osdpl_collector.run_scheduler()
+    assert set(osdpl_collector.gather_tasks) == {"fast", "slow"}
+
+
+def test_collect_from_snapshot(osdpl_collector, mocker):
+    fast, slow = osdpl_collector.collector_instances
+    fast.refresh_data()
+    submit = mocker.patch.object(osdpl_collector, "submit_task")
+    metrics = {m.name: m for m in osdpl_collector.collect()}
+    submit.assert_not_called()
+    staleness = metrics["osdpl_scrape_collector_staleness_seconds"]
+    assert [s.labels["collector"] for s in staleness.samples] == ["fast"]
+    assert 0 <= staleness.samples[0].value < 10
+
+
+@pytest.fixture
+def nova_collector(mocker):
+    oc = mock.Mock()
+    mocker.patch.object(
+        nova.OsdplNovaMetricCollector,
+        "oc",
+        new_callable=mock.PropertyMock,
+        return_value=oc,
+    )
+    oc.oc.compute.aggregates.return_value = []
+    oc.oc.compute.availability_zones.return_value = [{"name": "nova"}]
+    oc.oc.compute.hypervisors.return_value = [
+        {"name": "cmp-1.local"},
+        {"name": "cmp-2.local"},
+    ]
+    oc.oc.compute.services.return_value = [
+        {
+            "host": "ctl-1",
+            "binary": "nova-scheduler",
+            "availability_zone": "internal",
+        },
+        {
+            "host": "cmp-1",
+            "binary": "nova-compute",
+            "availability_zone": "nova",
+        },
+        {
+            "host": "cmp-2",
+            "binary": "nova-compute",
+            "availability_zone": "az1",
+        },
+    ]
+    oc.oc.placement.resource_providers.return_value = [
+        resource_provider.ResourceProvider(id="rp-1", name="cmp-1.local"),
+        resource_provider.ResourceProvider(id="rp-2", name="cmp-2.local"),
+    ]
+    usages = {"VCPU": 2, "MEMORY_MB": 1024}
+    inventories = {
+        "VCPU": {"total": 8, "reserved": 0, "allocation_ratio": 2.0},
+        "MEMORY_MB": {"total": 4096, "reserved": 512, "allocation_ratio": 1.0},
+    }
+
+    def placement_get(url):
+        if url.endswith("/usages"):
+            return mock.Mock(**{"json.return_value": {"usages": usages}})
+        return mock.Mock(**{"json.return_value": {"inventories": inventories}})
+
+    oc.oc.placement.get.side_effect = placement_get
+    collector = nova.OsdplNovaMetricCollector()
+    collector.update_cache()
+    return collector
+
+
+def test_nova_availability_zones(nova_collector):
+    assert nova_collector.get_host_availability_zone("cmp-2") == "az1"
+    assert nova_collector.get_host_availability_zone("ctl-1") == "internal"
+    assert nova_collector.get_host_availability_zone("cmp-3") is None
+    assert nova_collector.get_availability_zone_hosts("nova") == ["cmp-1"]
+    assert nova_collector.get_availability_zone_hosts("internal") == []
+
+
+def test_nova_hosts_placement_metrics(nova_collector):
+    rp = nova_collector.get_host_resource_provider("cmp-2.local")
+    assert rp.id == "rp-2"
+    host_metrics = {
+        "vcpu_used": 2,
+        "vcpu": 16.0,
+        "vcpu_allocation_ratio": 2.0,
+        "vcpu_free": 14.0,
+        "memory_mb_used": 1024,
+        "memory_mb": 4096.0,
+        "memory_mb_allocation_ratio": 1.0,
+        "memory_mb_free": 2560.0,
+    }
+    assert nova_collector.get_hosts_placement_metrics() == {
+        "cmp-1": host_metrics,
+        "cmp-2": host_metrics,
+    }
+    assert nova_collector.oc.oc.placement.get.call_count == 4
+
+
+def test_nova_update_instances(nova_collector, mocker):
+    servers = nova_collector.oc.oc.compute.servers
+    servers.return_value = [
+        {"id": "1", "status": "ACTIVE", "compute_host": "cmp-1"},
+        {"id": "2", "status": "ERROR", "compute_host": "cmp-2"},
+        {"id": "3", "status": "BUILD", "availability_zone": "nova"},
+    ]
+    nova_collector.update_instances_samples()
+    servers.assert_called_once_with(all_projects=True)
+    assert nova_collector.families["instances"].samples[0].value == 3
+
+    servers.return_value = [
+        {"id": "2", "status": "DELETED", "compute_host": "cmp-2"},
+        {"id": "3", "status": "ACTIVE", "compute_host": "cmp-1"},
+    ]
+    changes_since = nova_collector.instances_changes_since
+    hypervisor_instances = nova_collector.update_instances_samples()
+    servers.assert_called_with(all_projects=True, changes_since=changes_since)
+    assert nova_collector.families["instances"].samples[0].value == 2
+    assert nova_collector.families["active_instances"].samples[0].value == 2
+    assert hypervisor_instances == {"cmp-1": {"total": 2}}
+
+    mocker.patch.object(
+        settings, "OSCTL_EXPORTER_NOVA_INSTANCES_RESYNC_INTERVAL", 0
+    )
+    servers.return_value = []
+    nova_collector.update_instances_samples()
+    servers.assert_called_with(all_projects=True)
+    assert nova_collector.instances == {}
+
+
+def test_list_resources(mocker):
+    mocker.patch.object(settings, "OSCTL_EXPORTER_LIST_LIMIT", 2)
+    collector = glance.OsdplGlanceMetricCollector()
+    pages = [
+        {"images": [{"id": "1", "status": "active"}, {"id": "2"}]},
+        {"images": [{"id": "3", "status": "queued"}]},
+    ]
+    proxy = mock.Mock()
+    proxy.get.side_effect = [
+        mock.Mock(**{"json.return_value": page}) for page in pages
+    ]
+    assert list(
+        collector.list_resources(proxy, "/images", "images", ["status"])
+    ) == [("active",), (None,), ("queued",)]
+    assert proxy.get.call_args_list == [
+        mock.call("/images", params={"limit": 2, "fields": ["id", "status"]}),
+        mock.call(
+            "/images",
+            params={"limit": 2, "fields": ["id", "status"], "marker": "2"},
+        ),
+    ]
+
+
+def test_list_resources_next_links(mocker):
+    mocker.patch.object(settings, "OSCTL_EXPORTER_LIST_LIMIT", 2)
+    collector = glance.OsdplGlanceMetricCollector()
+    next_url = "http://neutron/v2.0/ports?limit=2&marker=2"
+    pages = [
+        {
+            "ports": [{"id": "1", "status": "ACTIVE"}, {"id": "2"}],
+            "ports_links": [{"rel": "next", "href": next_url}],
+        },
+        {
+            "ports": [{"id": "3", "status": "DOWN"}],
+            "ports_links": [{"rel": "previous", "href": "http://neutron"}],
+        },
+    ]
+    proxy = mock.Mock()
+    proxy.get.side_effect = [
+        mock.Mock(**{"json.return_value": page}) for page in pages
+    ]
+    assert list(
+        collector.list_resources(proxy, "/ports", "ports", ["status"])
+    ) == [("ACTIVE",), (None,), ("DOWN",)]
+    assert proxy.get.call_args_list == [
+        mock.call("/ports", params={"limit": 2, "fields": ["id", "status"]}),
+        mock.call(next_url, params=None),
+    ]
+
+
+def test_list_resources_marker_ignored(mocker):
+    mocker.patch.object(settings, "OSCTL_EXPORTER_LIST_LIMIT", 2)
+    collector = glance.OsdplGlanceMetricCollector()
+    proxy = mock.Mock()
+    proxy.get.return_value = mock.Mock(
+        **{"json.return_value": {"ports": [{"id": "1"}, {"id": "2"}]}}
+    )
+    assert (
+        len(list(collector.list_resources(proxy, "/ports", "ports", []))) == 2
+    )
+    assert proxy.get.call_count == 2
+
+    # Limit is ignored as well, all resources are returned at once.
+    proxy.get.reset_mock()
+    proxy.get.return_value = mock.Mock(
+        **{
+            "json.return_value": {
+                "ports": [{"id": "1"}, {"id": "2"}, {"id": "3"}]
+            }
+        }
+    )
+    assert (
+        len(list(collector.list_resources(proxy, "/ports", "ports", []))) == 3
+    )
+    proxy.get.assert_called_once()
+
+
+def test_collector_response_bytes(shared_client, mocker):
+    collector = glance.OsdplGlanceMetricCollector()
+    mocker.patch.object(base.kube, "get_osdpl")
+    session = collector.oc.oc.session.session
+    response = requests.Response()
+    response._content = b"x" * 10
+
+    def _update_samples():
+        for _ in range(3):
+            session.hooks["response"][-1](response)
+
+    mocker.patch.object(
+        collector, "update_samples", side_effect=_update_samples
+    )
+    collector.refresh_data()
+    assert collector.scrape_response_bytes == 30
+
+
+def test_list_resources_no_projection(mocker):
+    collector = glance.OsdplGlanceMetricCollector()
+    proxy = mock.Mock()
+    proxy.get.return_value = mock.Mock(
+        content=b"", **{"json.return_value": {"images": [{"id": "1"}]}}
+    )
+    assert list(
+        collector.list_resources(
+            proxy, "/images", "images", ["size"], projection=False
+        )
+    ) == [(None,)]
+    proxy.get.assert_called_once_with(
+        "/images", params={"limit": settings.OSCTL_EXPORTER_LIST_LIMIT}
+    )
+
+
+@pytest.fixture
+def shared_client(mocker):
+    manager = mocker.patch.object(
+        openstack_base.openstack_utils, "OpenStackClientManager"
+    )
+
+    def _manager():
+        oc = mock.Mock()
+        oc.oc.session.session = requests.Session()
+        oc.oc.identity.services.return_value = [
+            mock.Mock(type="compute"),
+            mock.Mock(type="image"),
+        ]
+        return oc
+
+    manager.side_effect = _manager
+    client = openstack_base.SharedClient()
+    mocker.patch.object(openstack_base, "CLIENT", client)
+    return client
+
+
+def test_shared_client(shared_client):
+    nova_collector = nova.OsdplNovaMetricCollector()
+    glance_collector = glance.OsdplGlanceMetricCollector()
+    assert nova_collector.oc is glance_collector.oc
+    assert nova_collector.is_service_available
+    assert glance_collector.is_service_available
+    glance_collector._os_service_types = ["volumev3"]
+    assert not glance_collector.is_service_available
+    openstack_base.openstack_utils.OpenStackClientManager.assert_called_once()
+    nova_collector.oc.oc.identity.services.assert_called_once()
+
+
+def test_shared_client_catalog_ttl(shared_client, mocker):
+    assert shared_client.get_service_types() == {"compute", "image"}
+    shared_client.get_service_types()
+    assert shared_client.get().oc.identity.services.call_count == 1
+    mocker.patch.object(settings, "OSCTL_EXPORTER_CATALOG_TTL", 0)
+    shared_client._service_types_expire = 0
+    shared_client.get_service_types()
+    shared_client.get_service_types()
+    assert shared_client.get().oc.identity.services.call_count == 3
+
+
+def test_shared_client_catalog_not_blocking(shared_client):
+    oc = shared_client.get()
+
+    def _services():
+        # Client is available while catalog is fetched.
+        assert shared_client.lock.acquire(blocking=False)
+        shared_client.lock.release()
+        assert shared_client.get() is oc
+        return [mock.Mock(type="compute")]
+
+    oc.oc.identity.services.side_effect = _services
+    assert shared_client.get_service_types() == {"compute"}
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        keystoneauth1.exceptions.http.Unauthorized(),
+        keystoneauth1.exceptions.connection.ConnectFailure(),
+    ],
+)
+def test_shared_client_reset_on_error(shared_client, mocker, error):
+    collector = nova.OsdplNovaMetricCollector()
+    mocker.patch.object(base.kube, "get_osdpl")
+    mocker.patch.object(collector, "update_samples", side_effect=error)
+    oc = collector.oc
+    collector.refresh_data()
+    assert collector.oc is not oc
+
+
+def test_shared_client_reset_unauthorized(shared_client, mocker):
+    collector = nova.OsdplNovaMetricCollector()
+    mocker.patch.object(base.kube, "get_osdpl")
+    mocker.patch.object(
+        collector,
+        "update_samples",
+        side_effect=keystoneauth1.exceptions.http.Unauthorized(),
+    )
+    oc = collector.oc
+    collector.refresh_data()
+    assert not collector.scrape_success
+    assert collector.oc is not oc
+    assert (
+        openstack_base.openstack_utils.OpenStackClientManager.call_count == 2
+    )
+
+    mocker.patch.object(collector, "update_samples", side_effect=ValueError())
+    oc = collector.oc
+    collector.refresh_data()
+    assert collector.oc is oc
+
+
+def test_api_collector(shared_client, mocker):
+    collector = api.OsdplApiMetricCollector()
+    oc = collector.oc
+    oc.oc.auth_token = "token"
+    oc.service_type_manager.get_service_type.side_effect = lambda t: t
+    oc.oc.identity.services.return_value = [
+        service.Service(id="1", type="compute", name="nova"),
+        service.Service(id="2", type="image", name="glance"),
+    ]
+    oc.oc.identity.endpoints.return_value = [
+        endpoint.Endpoint(service_id="1", url="http://nova/v2/%(tenant_id)s"),
+        endpoint.Endpoint(service_id="2", url="http://glance/v2/"),
+    ]
+    responses = {
+        "http://nova/v2/": mock.Mock(status_code=200),
+        "http://glance/v2/": mock.Mock(status_code=503),
+    }
+    mocker.patch.object(
+        collector.session,
+        "get",
+        side_effect=lambda url, **kwargs: responses[url],
+    )
+    collector.update_samples()
+    collector.update_samples()
+
+    oc.oc.identity.services.assert_called_once()
+    collector.session.get.assert_any_call(
+        "http://nova/v2/", timeout=30, headers={"X-Auth-Token": "token"}
+    )
+    samples = {
+        (s.labels["service_name"], s.name): s.value
+        for name in ["status", "success", "latency_seconds"]
+        for s in collector.families[name].samples
+        if s.labels.get("le") in [None, "+Inf"]
+    }
+    assert samples[("nova", "osdpl_api_status")] == 200
+    assert samples[("nova", "osdpl_api_success")] == 1
+    assert samples[("glance", "osdpl_api_success")] == 0
+    assert samples[("glance", "osdpl_api_latency_seconds_bucket")] == 2
+    assert samples[("glance", "osdpl_api_latency_seconds_count")] == 2
+
+
+def _request(app, **environ):
+    response = {}
+
+    def start_response(status, headers):
+        response["status"] = status
+        response["headers"] = dict(headers)
+
+    response["body"] = b"".join(
+        app({"PATH_INFO": "/", **environ}, start_response)
+    )
+    return response
+
+
+def test_exposition_cache(osdpl_collector, mocker):
+    fast, slow = osdpl_collector.collector_instances
+    fast.refresh_data()
+    collect_snapshot = mocker.spy(osdpl_collector, "collect_snapshot")
+    app = exporter.make_wsgi_app(osdpl_collector, mock.Mock())
+
+    response = _request(app)
+    assert response["status"] == "200 OK"
+    etag = response["headers"]["ETag"]
+    assert etag.startswith('W/"') and etag.endswith('-0"')
+    assert b'osdpl_scrape_collector_success{collector="fast"} 1.0' in (
+        response["body"]
+    )
+    assert b'osdpl_scrape_collector_staleness_seconds{collector="fast"}' in (
+        response["body"]
+    )
+
+    response = _request(app, HTTP_ACCEPT_ENCODING="gzip, deflate")
+    assert response["headers"]["Content-Encoding"] == "gzip"
+    body = gzip.decompress(response["body"])
+    assert b'osdpl_scrape_collector_success{collector="fast"}' in body
+    assert (
+        b'osdpl_scrape_collector_staleness_seconds{collector="fast"}' in body
+    )
+
+    response = _request(app, HTTP_IF_NONE_MATCH=etag)
+    assert response["status"] == "304 Not Modified"
+    assert response["body"] == b""
+    assert collect_snapshot.call_count == 1
+
+    osdpl_collector.generation += 1
+    response = _request(app, HTTP_IF_NONE_MATCH=etag)
+    assert response["status"] == "200 OK"
+    assert response["headers"]["ETag"] == etag.replace('-0"', '-1"')
+    assert collect_snapshot.call_count == 2
+
+
+def test_exposition_etag_unique_per_instance(osdpl_collector):
+    fast, slow = osdpl_collector.collector_instances
+    fast.refresh_data()
+    app1 = exporter.make_wsgi_app(osdpl_collector, mock.Mock())
+    app2 = exporter.make_wsgi_app(osdpl_collector, mock.Mock())
+
+    etag = _request(app1)["headers"]["ETag"]
+    assert _request(app2)["headers"]["ETag"] != etag
+    response = _request(app2, HTTP_IF_NONE_MATCH=etag)
+    assert response["status"] == "200 OK"
+    assert b"osdpl_scrape_collector_success" in response["body"]
+
+
+def test_exposition_fallback(osdpl_collector):
+    fallback = mock.Mock(return_value=[b"fallback"])
+    with mock.patch.object(
+        exporter.prometheus_client, "make_wsgi_app", return_value=fallback
+    ):
+        app = exporter.make_wsgi_app(osdpl_collector, mock.Mock())
+    response = _request(
+        app, HTTP_ACCEPT="application/openmetrics-text; version=1.0.0"
+    )
+    assert response["body"] == b"fallback"
+    base.kube.get_osdpl.return_value = None
+    assert _request(app)["body"] == b""
+
+
+@pytest.mark.parametrize(
+    "url,template",
+    [
+        (
+            "https://nova/v2.1/servers/detail?all_tenants=1",
+            "/v2.1/servers/detail",
+        ),
+        (
+            "http://placement/resource_providers/"
+            "0e6a1f0c-6c5b-4c2f-9f3e-1b2c3d4e5f60/usages",
+            "/resource_providers/{id}/usages",
+        ),
+        (
+            "http://cinder/v3/9f2b5e1c3a4d4e6f8a7b6c5d4e3f2a1b/volumes/detail",
+            "/v3/{id}/volumes/detail",
+        ),
+    ],
+)
+def test_get_url_template(url, template):
+    assert exporter_metrics.get_url_template(url) == template
+
+
+def _get_sample(name, labels):
+    return exporter_metrics.REGISTRY.get_sample_value(name, labels) or 0
+
+
+class _FakeAdapter(requests.adapters.BaseAdapter):
+    def send(self, request, stream=False, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response.url = request.url
+        response.request = request
+        response.raw = io.BytesIO(b"x" * 10)
+        return response
+
+    def close(self):
+        pass
+
+
+def test_api_request_duration(shared_client, mocker):
+    oc = shared_client.get()
+    oc.oc.session.auth.auth_ref.service_catalog.catalog = [
+        {"type": "compute", "endpoints": [{"url": "http://nova/v2.1"}]},
+        {"type": "placement", "endpoints": [{"url": "http://nova/placement"}]},
+    ]
+    session = oc.oc.session.session
+    session.mount("http://", _FakeAdapter())
+    mocker.patch.object(
+        exporter_metrics.time, "perf_counter", side_effect=[10, 12.5]
+    )
+    labels = {
+        "collector": "osdpl_nova",
+        "service_type": "placement",
+        "url": "/placement/resource_providers/{id}",
+    }
+    count = _get_sample(
+        "osdpl_exporter_api_request_duration_seconds_count", labels
+    )
+    total = _get_sample(
+        "osdpl_exporter_api_request_duration_seconds_sum", labels
+    )
+    token = exporter_metrics.COLLECTOR.set("osdpl_nova")
+    assert (
+        session.get("http://nova/placement/resource_providers/1").content
+        == b"x" * 10
+    )
+    exporter_metrics.COLLECTOR.reset(token)
+    assert (
+        _get_sample(
+            "osdpl_exporter_api_request_duration_seconds_count", labels
+        )
+        == count + 1
+    )
+    assert (
+        _get_sample("osdpl_exporter_api_request_duration_seconds_sum", labels)
+        == total + 2.5
+    )
+    assert (
+        shared_client.get_service_type(oc, "http://glance/v2/images")
+        == "unknown"
+    )
+
+
+def test_collector_step_duration(nova_collector):
+    nova_collector.oc.oc.compute.servers.return_value = []
+    token = exporter_metrics.COLLECTOR.set("osdpl_nova")
+    nova_collector.update_instances_samples()
+    exporter_metrics.COLLECTOR.reset(token)
+    assert (
+        exporter_metrics.REGISTRY.get_sample_value(
+            "osdpl_exporter_collector_step_duration_seconds",
+            {
+                "collector": "osdpl_nova",
+                "step": "OsdplNovaMetricCollector.update_instances",
+            },
+        )
+        is not None
+    )
+
+
+def test_get_shard():
+    hosts = [f"cmp-{i}" for i in range(300)]
+    shards = [sharding.get_shard(host, 3) for host in hosts]
+    assert set(shards) == {0, 1, 2}
+    assert shards == [sharding.get_shard(host, 3) for host in hosts]
+    # Only keys of new shard are moved when shard is added.
+    for host, shard in zip(hosts, shards):
+        new_shard = sharding.get_shard(host, 4)
+        assert new_shard in [shard, 3]
+
+
+def test_sharded_collectors(osdpl_collector, mocker):
+    mocker.patch.object(settings, "OSCTL_EXPORTER_SHARDS", 2)
+    names = {}
+    for index in range(2):
+        mocker.patch.object(settings, "OSCTL_EXPORTER_SHARD_INDEX", index)
+        names[index] = [
+            instance._name
+            for instance in base.OsdplMetricsCollector().collector_instances
+        ]
+    assert sorted(names[0] + names[1]) == ["fast", "slow"]
+
+
+def test_nova_sharded(nova_collector, mocker):
+    mocker.patch.object(settings, "OSCTL_EXPORTER_SHARDS", 2)
+    metrics = {}
+    for index in range(2):
+        mocker.patch.object(settings, "OSCTL_EXPORTER_SHARD_INDEX", index)
+        metrics[index] = nova_collector.get_hosts_placement_metrics()
+    assert sorted([*metrics[0], *metrics[1]]) == ["cmp-1", "cmp-2"]
+    assert nova_collector.shard_labels == ["1"]
+
+
+def _make_cert(not_after):
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "test")])
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(1)
+        .not_valid_before(not_after - datetime.timedelta(days=1))
+        .not_valid_after(not_after)
+        .sign(key, hashes.SHA256())
+    )
+    return base64.b64encode(cert.public_bytes(serialization.Encoding.PEM))
+
+
+@pytest.fixture
+def certs_collector(mocker, tmp_path):
+    certs_info = tmp_path / "certs_info.yaml"
+    certs_info.write_text(
+        """
+server:
+  name: tls-certs
+  namespace: openstack
+  key_name: server_cert
+client:
+  name: tls-certs
+  namespace: openstack
+  key_name: client_cert
+missing:
+  name: missing-certs
+  namespace: openstack
+  key_name: cert
+"""
+    )
+    mocker.patch.object(
+        settings, "OSCTL_EXPORTER_CERTIFICATES_INFO_FILE", str(certs_info)
+    )
+    return certificates.OsdplCertsMetricCollector()
+
+
+def test_certificates_cache(certs_collector, mocker):
+    not_after = datetime.datetime(2030, 1, 1, tzinfo=datetime.timezone.utc)
+    secret = mock.Mock()
+    secret.obj = {
+        "metadata": {"resourceVersion": "1"},
+        "data": {
+            "server_cert": _make_cert(not_after),
+            "client_cert": _make_cert(not_after),
+        },
+    }
+    list_metadata = mocker.patch.object(
+        certificates.kube,
+        "resource_list_metadata",
+        return_value={"tls-certs": {"resourceVersion": "1"}},
+    )
+    find = mocker.patch.object(certificates.kube, "find", return_value=secret)
+
+    certs_collector.update_samples()
+    certs_collector.update_samples()
+    samples = certs_collector.families["expiry"].samples
+    assert {s.labels["identifier"]: s.value for s in samples} == {
+        "server": not_after.timestamp(),
+        "client": not_after.timestamp(),
+    }
+    list_metadata.assert_called_with(certificates.kube.Secret, "openstack")
+    assert list_metadata.call_count == 2
+    find.assert_called_once()
+
+    secret.obj["metadata"]["resourceVersion"] = "2"
+    list_metadata.return_value = {"tls-certs": {"resourceVersion": "2"}}
+    certs_collector.update_samples()
+    assert find.call_count == 2
+
+
+def test_credentials_cache(mocker):
+    osdplst = mock.Mock()
+    osdplst.obj = {
+        "metadata": {"resourceVersion": "1"},
+        "status": {
+            "credentials": {
+                "rotation": {
+                    "admin": {"timestamp": "2024-01-01 00:00:00.000000"}
+                }
+            }
+        },
+    }
+    mocker.patch.object(
+        credentials, "OpenStackDeploymentStatus", return_value=osdplst
+    )
+    datetime_spy = mocker.spy(credentials, "datetime")
+    collector = credentials.OsdplCredentialsMetricCollector()
+    collector.osdpl = mock.Mock()
+
+    collector.update_samples()
+    collector.update_samples()
+    samples = collector.families["rotation_timestamp"].samples
+    assert [s.labels["type"] for s in samples] == ["admin"]
+    assert osdplst.reload.call_count == 2
+    assert datetime_spy.strptime.call_count == 1
@@ -79,3 +79,27 @@ async def test_hook_called():
                 body={"status": status},
                 new={"desiredNumberScheduled": 2},
             )
+
+
+def test_cache_daemonset_updates_progress(mocker):
+    meta = {
+        "name": "image-precaching-1",
+        "labels": {"k8s-app": constants.CACHE_NAME},
+    }
+    status = {"desiredNumberScheduled": 1, "numberReady": 0}
+    mocker.patch.object(health.kube, "get_osdpl")
+    osdplst = mocker.patch.object(
+        health.osdplstatus, "OpenStackDeploymentStatus"
+    )
+    osdplst.return_value.get_osdpl_health.return_value = {}
+    mocker.patch.object(health.kube, "resource")
+    update_progress = mocker.patch.object(health.cache, "update_progress")
+    health.daemonsets(
+        meta["name"],
+        "openstack",
+        meta,
+        status,
+        "update",
+        body={"status": status},
+    )
+    update_progress.assert_called_once_with("openstack", osdplst.return_value)
@@ -14,6 +14,8 @@
 
 from unittest import mock
 import json
+import os
+import time
 
 import pytest
 
@@ -406,3 +408,53 @@ async def test_get_charet_url(mock_opif):
     mock_opif.return_value = True
     res = hc.get_chart_url("libvirt")
     assert res == "/opt/operator/charts/infra/libvirt"
+
+
+def _write_cache_file(path, data, age=0, access_age=None):
+    path.write_bytes(data)
+    mtime = time.time() - age
+    atime = time.time() - (access_age if access_age is not None else age)
+    os.utime(path, (atime, mtime))
+    return str(path)
+
+
+def test_repository_cache_cleanup(tmp_path):
+    cache = helm.RepositoryCache(str(tmp_path))
+    fresh = _write_cache_file(tmp_path / "fresh-index.yaml", b"a: 1\n")
+    expired = _write_cache_file(
+        tmp_path / "old-index.yaml", b"a: 1\n", age=7200
+    )
+    empty = _write_cache_file(tmp_path / "empty.txt", b"")
+    broken_yaml = _write_cache_file(tmp_path / "broken.yaml", b"a: [\n")
+    broken_tgz = _write_cache_file(tmp_path / "chart.tgz", b"notgzip")
+
+    size = cache.cleanup(max_size=1024, max_age=3600)
+
+    assert size == 5
+    assert os.path.exists(fresh)
+    for path in [expired, empty, broken_yaml, broken_tgz]:
+        assert not os.path.exists(path)
+    assert list(cache.checked) == [fresh]
+
+
+def test_repository_cache_lru_eviction(tmp_path):
+    cache = helm.RepositoryCache(str(tmp_path))
+    used = _write_cache_file(tmp_path / "used.txt", b"x" * 100, 300, 10)
+    unused = _write_cache_file(tmp_path / "unused.txt", b"x" * 100, 200)
+
+    assert cache.cleanup(max_size=150, max_age=3600) == 100
+    assert os.path.exists(used)
+    assert not os.path.exists(unused)
+
+
+def test_repository_cache_check_once(tmp_path, mocker):
+    cache = helm.RepositoryCache(str(tmp_path))
+    _write_cache_file(tmp_path / "index.yaml", b"a: 1\n")
+    is_valid = mocker.spy(cache, "_is_valid")
+    hits = helm.metrics.HELM_CACHE_FILES.labels("hit")._value.get()
+    cache.cleanup(max_size=1024, max_age=3600)
+    cache.cleanup(max_size=1024, max_age=3600)
+    assert is_valid.call_count == 1
+    assert helm.metrics.HELM_CACHE_FILES.labels("hit")._value.get() == (
+        hits + 1
+    )
@@ -1,10 +1,19 @@
+import asyncio
+import json
+import threading
 from unittest import mock
 
 import pykube
+import pytest
 
 from openstack_controller import kube
 
 
+class AsyncMock(mock.Mock):
+    async def __call__(self, *args, **kwargs):
+        return super().__call__(*args, **kwargs)
+
+
 def test_get_kubernetes_objects():
     kube_objects = kube.get_kubernetes_objects()
     assert kube_objects[("v1", "Secret")] == kube.Secret
@@ -17,3 +26,284 @@ def test_bare_pod_vs_job_child():
     o = dict(metadata={"name": "spam", "namespace": "ham"})
     p = kube.Pod(api=mock.Mock(), obj=o)
     assert p.job_child is False, "bare Pod is a job child"
+
+
+def _get_watch_api(responses):
+    api = mock.Mock()
+
+    def _get(url, stream=False, **kwargs):
+        body = responses.pop(0) if responses else []
+        resp = mock.Mock()
+        if stream:
+            resp.iter_lines.return_value = [
+                json.dumps(event).encode() for event in body
+            ]
+        else:
+            resp.json.return_value = {
+                "metadata": {"resourceVersion": "1"},
+                "items": body,
+            }
+        return resp
+
+    api.get.side_effect = _get
+    return api
+
+
+def _get_job_obj(name, ready=False):
+    status = "True" if ready else "False"
+    return {
+        "metadata": {"name": name, "namespace": "openstack"},
+        "status": {"conditions": [{"type": "Complete", "status": status}]},
+    }
+
+
+@pytest.mark.asyncio
+async def test_wait_for_watch_events():
+    api = _get_watch_api(
+        [
+            [_get_job_obj("job1")],
+            [
+                {"type": "MODIFIED", "object": _get_job_obj("job1")},
+                {"type": "MODIFIED", "object": _get_job_obj("job1", True)},
+            ],
+        ]
+    )
+    job = kube.Job(api, _get_job_obj("job1"))
+    actual = await kube.wait_for(job, lambda obj: obj.is_ready, timeout=5)
+    assert actual.is_ready
+    assert actual is not job
+    assert not job.is_ready
+    assert api.get.call_count == 2
+    list_call, watch_call = api.get.call_args_list
+    assert "fieldSelector=metadata.name%3Djob1" in list_call.kwargs["url"]
+    assert "watch=true" in watch_call.kwargs["url"]
+    assert "resourceVersion=1" in watch_call.kwargs["url"]
+
+
+@pytest.mark.asyncio
+async def test_wait_for_relist_on_error_event():
+    api = _get_watch_api(
+        [
+            [_get_job_obj("job1")],
+            [{"type": "ERROR", "object": {"code": 410}}],
+            [_get_job_obj("job1", True)],
+        ]
+    )
+    job = kube.Job(api, _get_job_obj("job1"))
+    await kube.wait_for(job, lambda obj: obj.is_ready, timeout=5)
+    assert api.get.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_wait_for_deleted():
+    api = _get_watch_api(
+        [
+            [_get_job_obj("job1")],
+            [{"type": "DELETED", "object": _get_job_obj("job1")}],
+        ]
+    )
+    job = kube.Job(api, _get_job_obj("job1"))
+    assert await kube.wait_for_deleted(job, times=5, seconds=1)
+
+
+@pytest.mark.asyncio
+async def test_wait_for_timeout():
+    api = _get_watch_api([[_get_job_obj("job1")], []] * 1000)
+    job = kube.Job(api, _get_job_obj("job1"))
+    with pytest.raises(asyncio.TimeoutError):
+        await kube.wait_for(job, lambda obj: obj.is_ready, timeout=0.1)
+
+
+@pytest.mark.asyncio
+async def test_wait_for_timeout_closes_watch():
+    closed = threading.Event()
+    finished = threading.Event()
+
+    def _iter_lines():
+        # Blocks as streaming watch without events until closed.
+        closed.wait(10)
+        finished.set()
+        return iter([])
+
+    api = mock.Mock()
+
+    def _get(url, stream=False, **kwargs):
+        resp = mock.Mock()
+        if stream:
+            resp.iter_lines.side_effect = _iter_lines
+            sock = resp.raw._fp.fp.raw._sock
+            sock.shutdown.side_effect = lambda how: closed.set()
+        else:
+            resp.json.return_value = {
+                "metadata": {"resourceVersion": "1"},
+                "items": [_get_job_obj("job1")],
+            }
+        return resp
+
+    api.get.side_effect = _get
+    job = kube.Job(api, _get_job_obj("job1"))
+    with pytest.raises(asyncio.TimeoutError):
+        await kube.wait_for(job, lambda obj: obj.is_ready, timeout=0.5)
+    assert finished.wait(1)
+
+
+def _get_ds_pod(node_name, generation):
+    pod = mock.Mock()
+    pod.name = f"pod-{node_name}"
+    pod.obj = {"spec": {"nodeName": node_name}}
+    pod.generation = generation
+    return pod
+
+
+@pytest.fixture
+def rollout_ds(mocker):
+    ds = mock.Mock()
+    ds.name = "openvswitch-vswitchd"
+    ds.generation = 2
+    ds.obj = {"status": {"desiredNumberScheduled": 5}}
+    ds.pods_by_node = {
+        "cmp1": _get_ds_pod("cmp1", 1),
+        "cmp2": _get_ds_pod("cmp2", 1),
+        "cmp3": _get_ds_pod("cmp3", 1),
+        "cmp4": _get_ds_pod("cmp4", 2),
+        "cmp5": _get_ds_pod("cmp5", 1),
+    }
+    restarted = []
+
+    async def _wait_pod_on_node(node_name):
+        restarted.append(node_name)
+
+    ds.wait_pod_on_node.side_effect = _wait_pod_on_node
+    ds.restarted = restarted
+    nodes = [
+        mock.Mock(labels={"topology.kubernetes.io/zone": zone})
+        for zone in ["az1", "az2", "az1", "az1", "az1"]
+    ]
+    for i, node in enumerate(nodes):
+        node.name = f"cmp{i + 1}"
+    mocker.patch.object(kube, "kube_client")
+    mocker.patch.object(kube.Node, "objects", return_value=nodes)
+    mocker.patch.object(kube, "wait_for", AsyncMock(return_value=ds))
+    yield ds
+    mocker.stopall()
+
+
+def test_rollout_max_unavailable():
+    engine = kube.DaemonSetRolloutEngine(mock.Mock(), max_unavailable="10%")
+    assert engine.get_max_unavailable(400) == 40
+    assert engine.get_max_unavailable(5) == 1
+    engine = kube.DaemonSetRolloutEngine(mock.Mock(), max_unavailable=3)
+    assert engine.get_max_unavailable(400) == 3
+
+
+@pytest.mark.asyncio
+async def test_rollout_batches_by_topology(rollout_ds):
+    osdplst = mock.Mock()
+    osdplst.get_daemonset_rollout.return_value = {}
+    engine = kube.DaemonSetRolloutEngine(
+        rollout_ds, osdplst=osdplst, max_unavailable=2
+    )
+    await engine.run()
+    batches = [
+        c[0][1]["batch"] for c in osdplst.set_daemonset_rollout.call_args_list
+    ]
+    assert batches == [["cmp1", "cmp3"], ["cmp5"], ["cmp2"], []]
+    assert rollout_ds.restarted == ["cmp1", "cmp3", "cmp5", "cmp2"]
+    for pod in rollout_ds.pods_by_node.values():
+        assert pod.delete.called == (pod.generation == 1)
+    osdplst.set_daemonset_rollout.assert_called_with(
+        "openvswitch-vswitchd",
+        {
+            "generation": 2,
+            "state": "APPLIED",
+            "updated": 5,
+            "total": 5,
+            "batch": [],
+        },
+    )
+
+
+@pytest.mark.asyncio
+async def test_rollout_resume(rollout_ds):
+    osdplst = mock.Mock()
+    osdplst.get_daemonset_rollout.return_value = {
+        "generation": 2,
+        "state": "APPLYING",
+        "batch": ["cmp4"],
+    }
+    rollout_ds.pods_by_node = {"cmp4": _get_ds_pod("cmp4", 2)}
+    engine = kube.DaemonSetRolloutEngine(
+        rollout_ds, osdplst=osdplst, max_unavailable=2
+    )
+    await engine.run()
+    assert rollout_ds.restarted == ["cmp4"]
+    osdplst.set_daemonset_rollout.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_rollout_batch_not_ready(rollout_ds):
+    rollout_ds.wait_pod_on_node.side_effect = asyncio.TimeoutError
+    engine = kube.DaemonSetRolloutEngine(rollout_ds, max_unavailable=2)
+    with pytest.raises(asyncio.TimeoutError):
+        await engine.run()
+    deleted = [
+        pod.name
+        for pod in rollout_ds.pods_by_node.values()
+        if pod.delete.called
+    ]
+    assert deleted == ["pod-cmp1", "pod-cmp3"]
+
+
+@pytest.mark.asyncio
+async def test_rollout_too_many_unavailable(rollout_ds, mocker):
+    rollout_ds.obj["status"]["numberUnavailable"] = 2
+
+    async def _wait_for(obj, predicate, timeout=None, **kwargs):
+        if not predicate(obj):
+            raise asyncio.TimeoutError()
+        return obj
+
+    mocker.patch.object(kube, "wait_for", _wait_for)
+    osdplst = mock.Mock()
+    osdplst.get_daemonset_rollout.return_value = {}
+    engine = kube.DaemonSetRolloutEngine(
+        rollout_ds, osdplst=osdplst, max_unavailable=2
+    )
+    with pytest.raises(asyncio.TimeoutError):
+        await engine.run()
+    for pod in rollout_ds.pods_by_node.values():
+        pod.delete.assert_not_called()
+    osdplst.set_daemonset_rollout.assert_called_once_with(
+        "openvswitch-vswitchd",
+        {
+            "generation": 2,
+            "state": "FAILED",
+            "updated": 1,
+            "total": 5,
+            "batch": [],
+        },
+    )
+
+
+def test_daemonset_get_pod_on_node(mocker):
+    mocker.patch.object(kube, "kube_client")
+    pods = [
+        mock.Mock(**{"is_owned_by.return_value": False}),
+        mock.Mock(**{"is_owned_by.return_value": True}),
+    ]
+    objects = mocker.patch.object(kube.Pod, "objects")
+    objects.return_value.filter.return_value = pods
+    ds = kube.DaemonSet(
+        mock.Mock(),
+        {
+            "metadata": {"name": "ds", "namespace": "openstack", "uid": "1"},
+            "spec": {"selector": {"matchLabels": {"application": "nova"}}},
+        },
+    )
+    assert ds.get_pod_on_node("cmp1") is pods[1]
+    objects.return_value.filter.assert_called_once_with(
+        namespace="openstack",
+        selector={"application__in": ["nova"]},
+        field_selector={"spec.nodeName": "cmp1"},
+    )
+    ds.api.get.assert_not_called()
@@ -0,0 +1,329 @@
+#    Copyright 2020 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from unittest import mock
+
+import openstack
+import pytest
+
+from openstack_controller import maintenance
+
+
+class AsyncMock(mock.Mock):
+    async def __call__(self, *args, **kwargs):
+        return super().__call__(*args, **kwargs)
+
+
+def _get_server_obj(obj=None):
+    srv = openstack.compute.v2.server.Server()
+    for k, v in (obj or {}).items():
+        setattr(srv, k, v)
+    return srv
+
+
+def _get_migration_obj(obj=None):
+    migration = openstack.compute.v2.migration.Migration()
+    for k, v in (obj or {}).items():
+        setattr(migration, k, v)
+    return migration
+
+
+@pytest.fixture
+def asyncio_sleep(mocker):
+    sleep = mocker.patch.object(
+        maintenance.asyncio, "sleep", AsyncMock(return_value=None)
+    )
+    yield sleep
+    mocker.stopall()
+
+
+@pytest.mark.asyncio
+async def test_live_migration_engine_no_servers(asyncio_sleep):
+    os_client = mock.Mock()
+    nwl = mock.Mock()
+    os_client.compute_get_servers_valid_for_live_migration.return_value = []
+    engine = maintenance.LiveMigrationEngine(os_client, "host1", nwl)
+    assert await engine.run() == (set(), set())
+    os_client.compute_get_migrations.assert_not_called()
+    os_client.oc.compute.live_migrate_server.assert_not_called()
+    nwl.set_inactivation_progress.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_live_migration_engine_concurrency_and_order(asyncio_sleep):
+    os_client = mock.Mock()
+    nwl = mock.Mock()
+    servers = [
+        _get_server_obj({"id": "small", "flavor": {"ram": 512}}),
+        _get_server_obj({"id": "big", "flavor": {"ram": 8192}}),
+        _get_server_obj({"id": "medium", "flavor": {"ram": 2048}}),
+    ]
+    os_client.compute_get_servers_valid_for_live_migration.side_effect = [
+        servers,
+        [],
+    ]
+    started = []
+    os_client.oc.compute.live_migrate_server.side_effect = (
+        lambda srv: started.append(srv.id)
+    )
+
+    def _migrations(**kwargs):
+        return [
+            _get_migration_obj(
+                {"id": i, "server_id": srv_id, "status": "completed"}
+            )
+            for i, srv_id in enumerate(started)
+        ]
+
+    os_client.compute_get_migrations.side_effect = _migrations
+    engine = maintenance.LiveMigrationEngine(
+        os_client, "host1", nwl, concurrency=2
+    )
+    completed, abandoned = await engine.run()
+    assert completed == {"small", "big", "medium"}
+    assert abandoned == set()
+    assert started == ["big", "medium", "small"]
+    # Migrations of previous runs are loaded before start, two migrations
+    # started in the first round, one in the second.
+    assert os_client.compute_get_migrations.call_count == 3
+    assert (
+        os_client.compute_get_servers_valid_for_live_migration.call_count == 2
+    )
+    nwl.set_inactivation_progress.assert_called_with(100, mock.ANY)
+
+
+@pytest.mark.asyncio
+async def test_live_migration_engine_retry_and_give_up(asyncio_sleep):
+    os_client = mock.Mock()
+    nwl = mock.Mock()
+    server = _get_server_obj({"id": "srv1", "flavor": {}})
+    os_client.compute_get_servers_valid_for_live_migration.return_value = [
+        server
+    ]
+    migrations = []
+
+    def _live_migrate(srv):
+        migrations.append(
+            _get_migration_obj(
+                {"id": len(migrations), "server_id": srv.id, "status": "error"}
+            )
+        )
+
+    os_client.oc.compute.live_migrate_server.side_effect = _live_migrate
+    os_client.compute_get_migrations.side_effect = lambda **kw: list(
+        migrations
+    )
+    engine = maintenance.LiveMigrationEngine(
+        os_client, "host1", nwl, concurrency=1, attempts=3
+    )
+    engine.retry_backoff = 0
+    completed, abandoned = await engine.run()
+    assert completed == set()
+    assert abandoned == {"srv1"}
+    assert os_client.oc.compute.live_migrate_server.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_live_migration_engine_api_error(asyncio_sleep):
+    os_client = mock.Mock()
+    nwl = mock.Mock()
+    server = _get_server_obj({"id": "srv1", "flavor": {}})
+    os_client.compute_get_servers_valid_for_live_migration.return_value = [
+        server
+    ]
+    os_client.oc.compute.live_migrate_server.side_effect = (
+        openstack.exceptions.ConflictException("foo")
+    )
+    os_client.compute_get_migrations.return_value = []
+    engine = maintenance.LiveMigrationEngine(
+        os_client, "host1", nwl, concurrency=1, attempts=2
+    )
+    engine.retry_backoff = 0
+    completed, abandoned = await engine.run()
+    assert abandoned == {"srv1"}
+    assert os_client.oc.compute.live_migrate_server.call_count == 2
+    os_client.compute_get_migrations.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_live_migration_engine_ignores_previous_migrations(
+    asyncio_sleep,
+):
+    os_client = mock.Mock()
+    nwl = mock.Mock()
+    server = _get_server_obj({"id": "srv1", "flavor": {}})
+    os_client.compute_get_servers_valid_for_live_migration.side_effect = [
+        [server],
+        [],
+    ]
+    migrations = [
+        _get_migration_obj({"id": 1, "server_id": "srv1", "status": "error"})
+    ]
+
+    started = []
+    os_client.oc.compute.live_migrate_server.side_effect = started.append
+
+    def _get_migrations(**kwargs):
+        res = list(migrations)
+        # The record of new migration appears with delay.
+        if started and len(migrations) == 1:
+            migrations.append(
+                _get_migration_obj(
+                    {"id": 2, "server_id": "srv1", "status": "completed"}
+                )
+            )
+        return res
+
+    os_client.compute_get_migrations.side_effect = _get_migrations
+    engine = maintenance.LiveMigrationEngine(os_client, "host1", nwl)
+    completed, abandoned = await engine.run()
+    assert completed == {"srv1"}
+    assert abandoned == set()
+    os_client.oc.compute.live_migrate_server.assert_called_once()
+
+
+def _get_nwl_body(
+    node_name, inner_state=None, controller="openstack", version=None
+):
+    annotations = {}
+    if inner_state:
+        annotations["inner_state"] = inner_state
+    metadata = {
+        "name": f"openstack-{node_name}",
+        "annotations": annotations,
+    }
+    if version is not None:
+        metadata["resourceVersion"] = str(version)
+    return {
+        "metadata": metadata,
+        "spec": {"nodeName": node_name, "controllerName": controller},
+    }
+
+
+def _get_node_body(node_name, labels):
+    return {"metadata": {"name": node_name, "labels": labels}}
+
+
+@pytest.fixture
+def locks_index(mocker):
+    nwls = [
+        mock.Mock(obj=_get_nwl_body("cmp1", "active")),
+        mock.Mock(obj=_get_nwl_body("cmp2", "inactive")),
+        mock.Mock(obj=_get_nwl_body("gtw1", "active", controller="ceph")),
+    ]
+    nodes = [
+        mock.Mock(
+            obj=_get_node_body("cmp1", {"openstack-compute-node": "enabled"})
+        ),
+        mock.Mock(
+            obj=_get_node_body("cmp2", {"openstack-compute-node": "enabled"})
+        ),
+        mock.Mock(
+            obj=_get_node_body("gtw1", {"openstack-gateway": "enabled"})
+        ),
+    ]
+    mocker.patch.object(
+        maintenance.NodeWorkloadLock, "objects", return_value=nwls
+    )
+    mocker.patch.object(maintenance.kube.Node, "objects", return_value=nodes)
+    yield maintenance.MaintenanceLocksIndex()
+    mocker.stopall()
+
+
+def _lock_names(locks):
+    return {role: [nwl.name for nwl in nwls] for role, nwls in locks.items()}
+
+
+def test_maintenance_locks_index_primed(locks_index):
+    locks = locks_index.maintenance_locks()
+    assert _lock_names(locks) == {
+        "controller": [],
+        "gateway": [],
+        "compute": ["openstack-cmp1"],
+    }
+    locks_index.maintenance_locks()
+    maintenance.NodeWorkloadLock.objects.assert_called_once()
+    maintenance.kube.Node.objects.assert_called_once()
+
+
+def test_maintenance_locks_index_watch_updates(locks_index):
+    locks_index.maintenance_locks()
+    locks_index.update_nwl(_get_nwl_body("cmp2", "active"))
+    locks_index.update_nwl(_get_nwl_body("cmp1", "inactive"))
+    locks_index.update_node(
+        _get_node_body("ctl1", {"openstack-control-plane": "enabled"})
+    )
+    locks_index.update_nwl(_get_nwl_body("ctl1", "active"))
+    assert _lock_names(locks_index.maintenance_locks()) == {
+        "controller": ["openstack-ctl1"],
+        "gateway": [],
+        "compute": ["openstack-cmp2"],
+    }
+    locks_index.update_node(
+        _get_node_body("ctl1", {"openstack-control-plane": "enabled"}),
+        deleted=True,
+    )
+    locks_index.update_nwl(_get_nwl_body("cmp2", "active"), deleted=True)
+    assert _lock_names(locks_index.maintenance_locks()) == {
+        "controller": [],
+        "gateway": [],
+        "compute": [],
+    }
+    maintenance.NodeWorkloadLock.objects.assert_called_once()
+
+
+def test_maintenance_locks_index_stores_copy(locks_index):
+    locks_index.maintenance_locks()
+    body = _get_nwl_body("cmp2", "active")
+    locks_index.update_nwl(body)
+    body["spec"]["nodeName"] = "cmp3"
+    assert locks_index._locks["cmp2"]["spec"]["nodeName"] == "cmp2"
+
+
+def test_maintenance_locks_index_skips_outdated_events(locks_index):
+    locks_index.maintenance_locks()
+    locks_index.update_nwl(_get_nwl_body("cmp2", "active", version=12))
+    locks_index.update_nwl(_get_nwl_body("cmp2", "inactive", version=11))
+    assert _lock_names(locks_index.maintenance_locks())["compute"] == [
+        "openstack-cmp1",
+        "openstack-cmp2",
+    ]
+    locks_index.update_nwl(
+        _get_nwl_body("cmp1", "active", version=10), deleted=True
+    )
+    locks_index.update_nwl(_get_nwl_body("cmp1", "active", version=20))
+    locks_index.update_nwl(
+        _get_nwl_body("cmp1", "active", version=15), deleted=True
+    )
+    assert _lock_names(locks_index.maintenance_locks())["compute"] == [
+        "openstack-cmp2",
+        "openstack-cmp1",
+    ]
+
+
+def test_nmr_batcher_join():
+    batcher = maintenance.NodeMaintenanceBatcher()
+    nodes = [mock.Mock() for _ in range(3)]
+    for i, node in enumerate(nodes):
+        node.name = f"cmp{i}"
+    batch1, leader1 = batcher.join("key", 2, nodes[0], None)
+    batch2, leader2 = batcher.join("key", 2, nodes[1], None)
+    batch3, leader3 = batcher.join("key", 2, nodes[2], None)
+    assert (leader1, leader2, leader3) == (True, False, True)
+    assert batch1 is batch2
+    assert batch1 is not batch3
+    assert [n.name for n, _ in batcher.close(batch1)] == ["cmp0", "cmp1"]
+    batcher.close(batch3)
+    batch4, leader4 = batcher.join("key", 2, nodes[0], None)
+    assert leader4
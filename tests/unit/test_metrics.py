@@ -0,0 +1,165 @@
+#    Copyright 2024 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+from unittest import mock
+
+import kopf
+import pytest
+import requests
+
+from openstack_controller import metrics
+
+
+def _get_sample(name, labels):
+    return metrics.REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_instrument_handler_sync():
+    caller = []
+
+    def handler(**kwargs):
+        caller.append(metrics.CALLER.get())
+        if kwargs.get("fail"):
+            raise kopf.TemporaryError("BOOM")
+        return "ok"
+
+    labels = {"handler": "test_sync", "outcome": "success"}
+    count = _get_sample("osctl_handler_duration_seconds_count", labels)
+    wrapped = metrics.instrument_handler(handler, "test_sync")
+    assert wrapped(name="foo") == "ok"
+    with pytest.raises(kopf.TemporaryError):
+        wrapped(fail=True)
+    assert caller == ["test_sync", "test_sync"]
+    assert metrics.CALLER.get() == "unknown"
+    assert (
+        _get_sample("osctl_handler_duration_seconds_count", labels)
+        == count + 1
+    )
+    assert (
+        _get_sample(
+            "osctl_handler_duration_seconds_count",
+            {"handler": "test_sync", "outcome": "temporary_error"},
+        )
+        >= 1
+    )
+    assert metrics.instrument_handler(wrapped, "test_sync") is wrapped
+
+
+@pytest.mark.asyncio
+async def test_instrument_handler_async():
+    async def handler(**kwargs):
+        raise ValueError()
+
+    wrapped = metrics.instrument_handler(handler, "test_async")
+    with pytest.raises(ValueError):
+        await wrapped()
+    assert (
+        _get_sample(
+            "osctl_handler_duration_seconds_count",
+            {"handler": "test_async", "outcome": "error"},
+        )
+        == 1
+    )
+
+
+def test_instrument_handlers():
+    registry = kopf.OperatorRegistry()
+
+    @kopf.on.update("v1", "configmaps", registry=registry)
+    def cm_handler(**kwargs):
+        pass
+
+    metrics.instrument_handlers(registry)
+    handler = registry._changing._handlers[0]
+    assert handler.fn._osctl_instrumented
+    assert handler.fn.__wrapped__ is cm_handler
+
+
+def test_instrument_handlers_unsupported_registry():
+    registry = kopf.OperatorRegistry()
+
+    @kopf.on.update("v1", "configmaps", registry=registry)
+    def cm_handler(**kwargs):
+        pass
+
+    handlers = registry._changing._handlers
+    del registry._spawning
+    metrics.instrument_handlers(registry)
+    assert registry._changing._handlers is handlers
+    assert registry._changing._handlers[0].fn is cm_handler
+
+
+def test_instrument_session():
+    session = metrics.instrument_session(requests.Session(), "kubernetes")
+    response = mock.Mock(
+        status_code=200, elapsed=datetime.timedelta(seconds=0.5)
+    )
+    response.request.method = "GET"
+    response.request.url = (
+        "https://10.0.0.1:6443/api/v1/namespaces/openstack/pods/foo/status"
+    )
+    labels = {"api": "kubernetes", "method": "GET", "caller": "unknown"}
+    count = _get_sample("osctl_api_requests_total", {**labels, "code": "200"})
+    token = metrics.CALLER.set("unknown")
+    for hook in session.hooks["response"]:
+        hook(response)
+    metrics.CALLER.reset(token)
+    assert (
+        _get_sample("osctl_api_requests_total", {**labels, "code": "200"})
+        == count + 1
+    )
+    assert _get_sample("osctl_api_request_duration_seconds_sum", labels) >= 0.5
+
+
+@pytest.mark.parametrize(
+    "path,resource",
+    [
+        ("/api/v1/namespaces/openstack/pods", "pods"),
+        ("/api/v1/namespaces/openstack/pods/foo/status", "pods/status"),
+        ("/api/v1/nodes/cmp1", "nodes"),
+        ("/api/v1/namespaces/openstack", "namespaces"),
+        ("/apis/apps/v1/namespaces/openstack/daemonsets/foo", "daemonsets"),
+        ("/apis/lcm.mirantis.com/v1alpha1", ""),
+    ],
+)
+def test_get_kubernetes_resource(path, resource):
+    assert metrics.get_kubernetes_resource(path) == resource
+
+
+@pytest.mark.parametrize(
+    "path,resource",
+    [
+        ("/v2.1/servers/detail", "servers"),
+        ("/v3/9f2b5e1c3a4d4e6f8a7b6c5d4e3f2a1b/volumes/detail", "volumes"),
+        ("/placement/resource_providers", "placement"),
+        ("/", ""),
+    ],
+)
+def test_get_openstack_resource(path, resource):
+    assert metrics.get_openstack_resource(path) == resource
+
+
+def test_record_api_calls():
+    session = metrics.instrument_session(requests.Session(), "openstack")
+    response = mock.Mock(status_code=200, elapsed=datetime.timedelta())
+    response.request.method = "GET"
+    response.request.url = "http://nova-api:8774/v2.1/servers/detail"
+    with metrics.record_api_calls() as calls:
+        for hook in session.hooks["response"]:
+            hook(response)
+    for hook in session.hooks["response"]:
+        hook(response)
+    assert calls == {("openstack", "GET", "servers", "unknown"): 1}
+    assert metrics.API_CALL_RECORDERS == []
@@ -12,6 +12,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import asyncio
 from unittest import mock
 
 import kopf
@@ -513,3 +514,188 @@ def test_nwl_deletion_cleanup(mocker, nova_registry_service, safe_node, osdpl):
     osdpl.return_value.exists.assert_called_once()
     nova_registry_service.return_value.cleanup_metadata.assert_called_once()
     nova_registry_service.return_value.cleanup_persistent_data.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_nmr_batched_leader(mocker, nova_registry_service, osdpl):
+    node = mock.Mock()
+    node.name = "cmp1"
+    nmr = mock.Mock()
+    mocker.patch.object(
+        maintenance_controller,
+        "get_nmr_batch_key",
+        return_value=(("compute",), "nova"),
+    )
+    mocker.patch.object(
+        maintenance, "get_max_parallel_by_role", return_value=1
+    )
+    nwl = mock.Mock()
+    mocker.patch.object(
+        maintenance.NodeWorkloadLock, "get_by_node", return_value=nwl
+    )
+    nova_registry_service.return_value.maintenance_api = True
+    nova_registry_service.return_value.process_nmrs = AsyncMock()
+    await maintenance_controller.process_nmr_batched(
+        node, nmr, {}, mock.Mock(), mock.Mock()
+    )
+    nova_registry_service.return_value.process_nmrs.assert_called_once_with(
+        [(node, nmr)]
+    )
+    nwl.set_hooks_durations.assert_called_once_with(
+        "process_nmrs", {"compute": mock.ANY}
+    )
+
+
+def _get_ordered_service(name, calls, after=None, fail=False):
+    service_class = mock.Mock()
+    service = service_class.return_value
+    service.service = name
+    service.maintenance_api = True
+    service.maintenance_delete_after = after or []
+
+    async def _hook(*args):
+        calls.append(f"{name}-start")
+        await asyncio.sleep(0)
+        if fail:
+            raise kopf.TemporaryError("BOOM")
+        calls.append(f"{name}-end")
+
+    service.delete_nmr = _hook
+    return (name, service_class)
+
+
+@pytest.mark.asyncio
+async def test_run_maintenance_hooks_order(mocker, osdpl):
+    calls = []
+    mocker.patch.object(
+        services,
+        "ORDERED_SERVICES",
+        [
+            _get_ordered_service("compute", calls, after=["networking"]),
+            _get_ordered_service("networking", calls),
+            _get_ordered_service("block-storage", calls),
+        ],
+    )
+    nwl = mock.Mock()
+    await maintenance_controller.run_maintenance_hooks(
+        "delete_nmr", [nwl], {}, mock.Mock(), mock.Mock(), "node", "nmr"
+    )
+    # networking and block-storage run concurrently, compute waits networking
+    assert calls[:2] == ["networking-start", "block-storage-start"]
+    assert calls.index("compute-start") > calls.index("networking-end")
+    nwl.set_hooks_durations.assert_called_once_with(
+        "delete_nmr",
+        {
+            "compute": mock.ANY,
+            "networking": mock.ANY,
+            "block-storage": mock.ANY,
+        },
+    )
+
+
+@pytest.mark.asyncio
+async def test_run_maintenance_hooks_dependency_failed(mocker, osdpl):
+    calls = []
+    mocker.patch.object(
+        services,
+        "ORDERED_SERVICES",
+        [
+            _get_ordered_service("compute", calls, after=["networking"]),
+            _get_ordered_service("networking", calls, fail=True),
+            _get_ordered_service("block-storage", calls),
+        ],
+    )
+    nwl = mock.Mock()
+    with pytest.raises(kopf.TemporaryError):
+        await maintenance_controller.run_maintenance_hooks(
+            "delete_nmr", [nwl], {}, mock.Mock(), mock.Mock(), "node", "nmr"
+        )
+    assert "compute-start" not in calls
+    assert "block-storage-end" in calls
+    nwl.set_hooks_durations.assert_called_once_with(
+        "delete_nmr", {"block-storage": mock.ANY}
+    )
+
+
+@pytest.mark.asyncio
+async def test_nmr_batched_follower_error(
+    mocker, nova_registry_service, osdpl
+):
+    leader_node = mock.Mock()
+    leader_node.name = "cmp1"
+    node = mock.Mock()
+    node.name = "cmp2"
+    key = (("compute",), "nova")
+    mocker.patch.object(
+        maintenance_controller, "get_nmr_batch_key", return_value=key
+    )
+    mocker.patch.object(
+        maintenance, "get_max_parallel_by_role", return_value=2
+    )
+    nwl = mock.Mock()
+    mocker.patch.object(
+        maintenance.NodeWorkloadLock, "get_by_node", return_value=nwl
+    )
+    batch, leader = maintenance.NMR_BATCHER.join(
+        key, 2, leader_node, mock.Mock()
+    )
+    assert leader
+    batch.error = kopf.TemporaryError("BOOM")
+    batch.done.set()
+    with pytest.raises(kopf.TemporaryError):
+        await maintenance_controller.process_nmr_batched(
+            node, mock.Mock(), {}, mock.Mock(), mock.Mock()
+        )
+    assert list(batch.members) == ["cmp1", "cmp2"]
+    nova_registry_service.return_value.process_nmrs.assert_not_called()
+    nwl.set_error_message.assert_called_once()
+    maintenance.NMR_BATCHER.close(batch)
+
+
+@pytest.mark.asyncio
+async def test_nmr_batched_follower_timeout(
+    mocker, nova_registry_service, osdpl
+):
+    leader_node = mock.Mock()
+    leader_node.name = "cmp1"
+    node = mock.Mock()
+    node.name = "cmp2"
+    key = (("compute",), "nova")
+    mocker.patch.object(
+        maintenance_controller, "get_nmr_batch_key", return_value=key
+    )
+    mocker.patch.object(
+        maintenance, "get_max_parallel_by_role", return_value=2
+    )
+    mocker.patch.object(maintenance_controller.CONF, "getint", return_value=0)
+    nwl = mock.Mock()
+    mocker.patch.object(
+        maintenance.NodeWorkloadLock, "get_by_node", return_value=nwl
+    )
+    batch, leader = maintenance.NMR_BATCHER.join(
+        key, 2, leader_node, mock.Mock()
+    )
+    assert leader
+    with pytest.raises(kopf.TemporaryError, match="Timed out"):
+        await maintenance_controller.process_nmr_batched(
+            node, mock.Mock(), {}, mock.Mock(), mock.Mock()
+        )
+    assert not batch.done.is_set()
+    assert batch.error is None
+    nwl.set_error_message.assert_called_once()
+    maintenance.NMR_BATCHER.close(batch)
+
+
+def test_node_event_handler_updates_locks_index(mocker):
+    locks_index = maintenance.MaintenanceLocksIndex()
+    mocker.patch.object(maintenance, "LOCKS_INDEX", locks_index)
+    body = {
+        "metadata": {
+            "name": "cmp1",
+            "labels": {"openstack-compute-node": "enabled"},
+        }
+    }
+    maintenance_controller.node_event_handler(type="ADDED", body=body)
+    assert locks_index._roles == {"cmp1": {"compute"}}
+    maintenance_controller.node_event_handler(type="DELETED", body=body)
+    assert locks_index._roles == {}
@@ -52,6 +52,100 @@ async def test_openstack_client_no_creds(mocker, openstack_connect):
     openstack_utils.OpenStackClientManager()
 
 
+def test_volume_get_volumes_host_filter(openstack_connect):
+    block_storage = openstack_connect.return_value.block_storage
+    page1 = mock.Mock()
+    page1.json.return_value = {
+        "volumes": [
+            {"id": "1", "os-vol-host-attr:host": "host1@lvm#lvm"},
+            {"id": "2", "os-vol-host-attr:host": "host10@lvm#lvm"},
+        ],
+        "volumes_links": [{"rel": "next", "href": "http://cinder/next"}],
+    }
+    page2 = mock.Mock()
+    page2.json.return_value = {
+        "volumes": [{"id": "3", "os-vol-host-attr:host": "host1"}],
+    }
+    block_storage.get.side_effect = [page1, page2]
+    ocm = openstack_utils.OpenStackClientManager()
+    with mock.patch.object(openstack.exceptions, "raise_from_response"):
+        volumes = [v["id"] for v in ocm.volume_get_volumes(host="host1")]
+    assert volumes == ["1", "3"]
+    block_storage.get.assert_has_calls(
+        [
+            mock.call(
+                "/volumes/detail",
+                params={"limit": 1000, "all_tenants": True},
+            ),
+            mock.call("http://cinder/next", params=None),
+        ],
+        any_order=True,
+    )
+
+
+def test_volume_get_volumes_host_backend_pool(openstack_connect):
+    block_storage = openstack_connect.return_value.block_storage
+    page = mock.Mock()
+    page.json.return_value = {
+        "volumes": [
+            {"id": "1", "os-vol-host-attr:host": "cmp-1@lvm#pool"},
+            {"id": "2", "os-vol-host-attr:host": "cmp-10@lvm#pool"},
+            {"id": "3", "os-vol-host-attr:host": None},
+        ],
+    }
+    block_storage.get.return_value = page
+    ocm = openstack_utils.OpenStackClientManager()
+    with mock.patch.object(openstack.exceptions, "raise_from_response"):
+        volumes = [v["id"] for v in ocm.volume_get_volumes(host="cmp-1")]
+    assert volumes == ["1"]
+    block_storage.get.assert_called_once_with(
+        "/volumes/detail", params={"limit": 1000, "all_tenants": True}
+    )
+
+
+def test_compute_get_servers_valid_for_live_migration(openstack_connect):
+    compute = openstack_connect.return_value.compute
+    compute.servers.return_value = [
+        mock.Mock(id="1", task_state=None),
+        mock.Mock(id="2", task_state="migrating"),
+    ]
+    ocm = openstack_utils.OpenStackClientManager()
+    servers = list(
+        ocm.compute_get_servers_valid_for_live_migration(host="host1")
+    )
+    assert [s.id for s in servers] == ["1"]
+    compute.servers.assert_called_once_with(
+        details=True,
+        all_projects=True,
+        limit=1000,
+        compute_host="host1",
+        status=["ACTIVE", "PAUSED"],
+    )
+
+
+def test_placement_resource_provider_absent_by_name(openstack_connect):
+    placement = openstack_connect.return_value.placement
+    rp = {"name": "host1"}
+    placement.resource_providers.return_value = [rp]
+    ocm = openstack_utils.OpenStackClientManager()
+    ocm.placement_resource_provider_absent(host="host1")
+    placement.resource_providers.assert_called_once_with(name="host1")
+    placement.delete_resource_provider.assert_called_once_with(rp)
+
+
+def test_placement_resource_provider_absent_fqdn(openstack_connect):
+    placement = openstack_connect.return_value.placement
+    rp = {"name": "host1.example.com"}
+    placement.resource_providers.side_effect = [
+        [],
+        [{"name": "host2.example.com"}, rp],
+    ]
+    ocm = openstack_utils.OpenStackClientManager()
+    ocm.placement_resource_provider_absent(host="host1")
+    assert placement.resource_providers.call_count == 2
+    placement.delete_resource_provider.assert_called_once_with(rp)
+
+
 @mock.patch.object(openstack_utils, "OpenStackClientManager")
 def test_notify_masakari_host_down(
     openstack_client_manager,
@@ -1,7 +1,23 @@
 import copy
+import ipaddress
+from unittest import mock
+
 import pytest
 import kopf
+import pykube
+
 import openstack_controller.controllers.openstackdeployment as osdpl
+from openstack_controller import ceph_api
+from openstack_controller import helm
+from openstack_controller import kube
+from openstack_controller import metrics
+from tests.unit import fake_kube_api as fake_kube_api_module
+
+
+class AsyncMock(mock.Mock):
+    async def __call__(self, *args, **kwargs):
+        return super().__call__(*args, **kwargs)
+
 
 OBJ = {
     "spec": {
@@ -118,3 +134,102 @@ def test_allowed_handling_on_resume():
     ] = False
     old = copy.deepcopy(new)
     osdpl.check_handling_allowed(old, new, event)
+
+
+# Upper bound of kubernetes API calls per reconcile of tests/fixtures
+# osdpl, lower them when reducing number of calls.
+API_CALLS_BUDGET = 1500
+API_WRITE_CALLS_BUDGET = 70
+
+
+@pytest.fixture
+def fake_kube_api(mocker):
+    api = fake_kube_api_module.FakeKubeAPI()
+    api.start()
+    mocker.patch.object(
+        kube.pykube.KubeConfig, "from_env", return_value=api.get_config()
+    )
+    mocker.patch.object(kube.pykube, "HTTPClient", pykube.http.HTTPClient)
+    yield api
+    api.stop()
+    mocker.stopall()
+
+
+def _add_ceph_keys(api):
+    def _save_secret(namespace, name, data):
+        api.add(
+            "v1",
+            "secrets",
+            {"metadata": {"name": name, "namespace": namespace}, "data": data},
+        )
+
+    services = [
+        ceph_api.OSServiceCreds(
+            user=ceph_api.OSUser[user],
+            key="secret",
+            key_name=f"client.{user}",
+            pools=[
+                ceph_api.PoolDescription(
+                    device_class="hdd",
+                    role=ceph_api.PoolRole[role],
+                    name=f"{role}-hdd",
+                )
+                for role in roles
+            ],
+        )
+        for user, roles in ceph_api.CEPH_POOL_ROLE_SERVICES_MAP.items()
+    ]
+    params = ceph_api.OSCephParams(
+        admin_key="secret",
+        mon_endpoints=[(ipaddress.IPv4Address("10.0.0.1"), 6789)],
+        services=services,
+        rgw=ceph_api.RGWParams(
+            internal_url="http://rgw.rook-ceph:8080",
+            external_url="https://rgw.it.just.works",
+        ),
+    )
+    ceph_api.set_os_ceph_params(params, _save_secret)
+
+
+async def _reconcile(osdpl_obj, reason):
+    kwargs = {"patch": {}, "diff": [], "old": {}, "new": osdpl_obj}
+    with metrics.record_api_calls() as calls:
+        await osdpl._handle(
+            osdpl_obj,
+            osdpl_obj["metadata"],
+            osdpl_obj["spec"],
+            mock.Mock(),
+            reason,
+            **kwargs,
+        )
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_handle_api_calls_budget(
+    mocker, fake_kube_api, openstackdeployment
+):
+    osdpl_obj = fake_kube_api.add(
+        "lcm.mirantis.com/v1alpha1",
+        "openstackdeployments",
+        openstackdeployment,
+    )
+    _add_ceph_keys(fake_kube_api)
+    mocker.patch("kopf.info")
+    mocker.patch("kopf.warn")
+    mocker.patch("kopf.event")
+    mocker.patch("openstack.connect")
+    mocker.patch.object(
+        helm.HelmManager, "run_cmd", AsyncMock(return_value=("[]", ""))
+    )
+    mocker.patch.object(osdpl.asyncio, "sleep", AsyncMock())
+    mocker.patch.object(osdpl, "cleanup_helm_cache")
+
+    await _reconcile(osdpl_obj, "create")
+    # Steady state reconcile, all children already exist.
+    calls = await _reconcile(osdpl_obj, "update")
+    report = "\n".join(f"{k}: {v}" for k, v in sorted(calls.items()))
+    writes = sum(v for k, v in calls.items() if k[1] != "GET")
+    assert sum(calls.values()) <= API_CALLS_BUDGET, report
+    assert writes <= API_WRITE_CALLS_BUDGET, report
+    assert not [k for k in calls if k[3] == "unknown"], report
@@ -1362,6 +1362,50 @@ async def test_nova_migrate_servers_live_one_power_unknown(
     openstack_client.compute_get_servers_valid_for_live_migration.assert_called_once()
 
 
+@pytest.mark.asyncio
+async def test_nova_process_nmrs(
+    openstack_client,
+    node_maintenance_config,
+    openstackdeployment_mspec,
+    mock_kube_get_osdpl,
+    child_view,
+    nwl,
+):
+    osdplstmock = mock.Mock()
+    nodes_nmrs = [
+        (
+            kube.Node(mock.Mock, copy.deepcopy(_get_node(host=host))),
+            mock.Mock(),
+        )
+        for host in ["host1", "host2"]
+    ]
+    services_list = [
+        _get_service_obj({"host": host})
+        for host in ["host1", "host2", "host3"]
+    ]
+    openstack_client.return_value.compute_get_services.return_value = (
+        services_list
+    )
+    with mock.patch.object(
+        services.Nova, "_migrate_servers", AsyncMock()
+    ) as mock_migrate:
+        await services.Nova(
+            openstackdeployment_mspec, logging, osdplstmock, child_view
+        ).process_nmrs(nodes_nmrs)
+        assert mock_migrate.call_count == 2
+    openstack_client.return_value.compute_get_services.assert_called_once_with()
+    openstack_client.return_value.compute_ensure_service_disabled.assert_has_calls(
+        [
+            mock.call(services_list[0], disabled_reason=mock.ANY),
+            mock.call(services_list[1], disabled_reason=mock.ANY),
+        ]
+    )
+    assert (
+        openstack_client.return_value.compute_ensure_service_disabled.call_count
+        == 2
+    )
+
+
 @pytest.mark.asyncio
 async def test_nova_can_handle_nmr_controller(
     mocker,
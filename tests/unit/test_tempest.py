@@ -0,0 +1,65 @@
+#    Copyright 2024 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from openstack_controller.filters.tempest import base_section
+from openstack_controller.filters.tempest.conf import compute
+
+HELMBUNDLES = {
+    "compute": {
+        "spec": {
+            "releases": [
+                {
+                    "chart": "nova",
+                    "values": {"conf": {"nova": {"libvirt": {"virt": 1}}}},
+                },
+                {"chart": "placement", "values": {}},
+            ]
+        }
+    },
+    "compute-extra": {
+        "spec": {
+            "releases": [
+                {
+                    "chart": "nova",
+                    "values": {"conf": {"nova": {"libvirt": {"virt": 2}}}},
+                }
+            ]
+        }
+    },
+    "identity": {"spec": {}},
+}
+
+
+def test_get_charts_values():
+    charts_values = base_section.get_charts_values(HELMBUNDLES)
+    assert charts_values == {
+        "nova": {"conf": {"nova": {"libvirt": {"virt": 1}}}},
+        "placement": {},
+    }
+
+
+def test_section_values_lookup():
+    section = compute.Compute({}, HELMBUNDLES)
+    assert section.get_values_item("nova", "conf.nova.libvirt.virt") == 1
+    assert section.get_values_item("nova", "conf.nova.x", "foo") == "foo"
+    assert section.get_values_item("keystone", "conf", "foo") is None
+    assert section.is_service_enabled("placement")
+    assert not section.is_service_enabled("keystone")
+
+
+def test_section_shared_index():
+    charts_values = {"nova": {"foo": "bar"}}
+    section = compute.Compute({}, {}, charts_values)
+    assert section.get_values_item("nova", "foo") == "bar"
+    assert section.charts_values is charts_values
@@ -13,6 +13,7 @@
 #    under the License.
 
 import base64
+import jsonpath_ng
 import pytest
 
 from openstack_controller import utils
@@ -248,3 +249,39 @@ def test_merge_allows_int_over_float():
     d1 = {"value": 1.1}
     d2 = {"value": 1}
     assert utils.merger.merge(d1, d2) == {"value": 1}
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "a",
+        "a.b",
+        "a.c",
+        "a.d.e",
+        "a.x",
+        "a.d.e.x",
+        "f.g",
+        "i-j.k",
+        "a.*",
+        "a.c[0]",
+        "f[*].g",
+    ],
+)
+def test_jsonpath_find(path):
+    data = {
+        "a": {"b": None, "c": [1, 2], "d": {"e": "x"}},
+        "f": [{"g": 1}],
+        "i-j": {"k": 0},
+    }
+    expected = [m.value for m in jsonpath_ng.parse(path).find(data)]
+    assert utils.jsonpath_find(path, data) == expected
+
+
+def test_jsonpath_find_simple_path_not_parsed(mocker):
+    parse = mocker.spy(utils.jsonpath_ng, "parse")
+    utils.jsonpath_find("conf.nova.DEFAULT.cpu_allocation_ratio", {})
+    parse.assert_not_called()
+    utils.jsonpath_parse.cache_clear()
+    utils.jsonpath_find("bootstrap.*", {})
+    utils.jsonpath_find("bootstrap.*", {})
+    parse.assert_called_once_with("bootstrap.*")